@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de registros de movimento sobre um arquivo mapeado em memória
+
+Em vez de criar um objeto com onze strings para cada linha, o arquivo é mapeado
+com mmap e cada registro é exposto como uma visão sobre o seu quadro de tamanho
+fixo. Os campos só são decodificados quando acessados, de modo que o tempo de
+abertura e o consumo de memória não dependem do tamanho do arquivo.
+"""
+
+import mmap
+from array import array
+from itertools import compress
+
+from leitor_movimentacao import TAMANHO_REGISTRO, REGISTROS_POR_BLOCO
+from registros_movimentacao import RegistroMovimento
+
+_INVERTER_MASCARA = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class RegistroMovimentoMapeado(RegistroMovimento):
+    """Visão de um registro de movimento sobre o arquivo mapeado
+
+    Enquanto não é alterada, a visão guarda apenas a posição do quadro e decodifica
+    a linha a cada acesso. Na primeira alteração a linha é copiada para a própria
+    visão, que passa a ser mantida pelo armazenamento no lugar do quadro original.
+    """
+
+    __slots__ = ('_armazenamento', '_quadro', '_copia')
+
+    def __init__(self, armazenamento, quadro: int):
+        self._armazenamento = armazenamento
+        self._quadro = quadro
+        self._copia = None
+
+    @property
+    def _linha(self) -> str:
+        if self._copia is not None:
+            return self._copia
+        posicao = self._armazenamento.posicao_quadro(self._quadro)
+        return self._armazenamento.mapa[posicao:posicao + TAMANHO_REGISTRO].decode('ascii')
+
+    @_linha.setter
+    def _linha(self, linha: str):
+        self._copia = linha
+        self._armazenamento.registrar_edicao(self)
+
+
+class MovimentosMapeados:
+    """Sequência de registros de movimento apoiada em um arquivo mapeado em memória
+
+    Comporta-se como a lista de ``RegistroMovimento`` usada por ``ArquivoMovimentacao``:
+    aceita acesso por índice e fatia, iteração, ``del``, ``append`` e ``insert``. A ordem
+    dos registros é mantida em um vetor de números de quadro, criado apenas na primeira
+    alteração estrutural.
+    """
+
+    def __init__(self, caminho_arquivo: str):
+        """Mapeia o arquivo e localiza header, movimentos e trailer sem percorrê-lo"""
+        self.caminho_arquivo = caminho_arquivo
+        with open(caminho_arquivo, 'rb') as f:
+            if not f.read(1):
+                raise ValueError("Primeiro registro deve ser do tipo Header (H)")
+            self.mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        tamanho_arquivo = len(self.mapa)
+        if self.mapa[TAMANHO_REGISTRO:TAMANHO_REGISTRO + 2] == b'\r\n':
+            self.terminador = b'\r\n'
+        elif self.mapa[TAMANHO_REGISTRO:TAMANHO_REGISTRO + 1] == b'\n':
+            self.terminador = b'\n'
+        else:
+            raise ValueError("Linha 1 deveria ter 91 caracteres")
+        self.tamanho_quadro = TAMANHO_REGISTRO + len(self.terminador)
+
+        # O último registro pode não ter quebra de linha
+        if not self.mapa[tamanho_arquivo - len(self.terminador):].endswith(b'\n'):
+            tamanho_arquivo += len(self.terminador)
+        if tamanho_arquivo % self.tamanho_quadro:
+            raise ValueError("Tamanho do arquivo não é múltiplo do tamanho do registro (91 caracteres)")
+
+        total_quadros = tamanho_arquivo // self.tamanho_quadro
+        if self.mapa[0:1] != b'H':
+            raise ValueError("Primeiro registro deve ser do tipo Header (H)")
+        self.inicio_trailer = (total_quadros - 1) * self.tamanho_quadro
+        if total_quadros < 2 or self.mapa[self.inicio_trailer:self.inicio_trailer + 1] != b'T':
+            raise ValueError("Último registro deve ser do tipo Trailer (T)")
+
+        self.linha_header = self.mapa[0:TAMANHO_REGISTRO].decode('ascii')
+        self.linha_trailer = self.mapa[self.inicio_trailer:self.inicio_trailer + TAMANHO_REGISTRO].decode('ascii')
+        self.total_quadros = total_quadros - 2
+
+        total_trailer = int(self.linha_trailer[1:6])
+        if self.total_quadros != total_trailer:
+            raise ValueError(f"Número de registros M ({self.total_quadros}) não corresponde ao valor no Trailer ({total_trailer})")
+
+        self._quadros = range(self.total_quadros)
+        self._editados = {}
+        self._proximo_quadro_novo = -1
+
+    def posicao_quadro(self, quadro: int) -> int:
+        """Retorna a posição em bytes do quadro de movimento no arquivo"""
+        return (quadro + 1) * self.tamanho_quadro
+
+    def registrar_edicao(self, registro):
+        """Passa a manter o registro alterado no lugar do quadro original"""
+        self._editados[registro._quadro] = registro
+
+    def validar(self):
+        """Confere o tipo e a soma dos registros de movimento com o trailer
+
+        Cada coluna de bytes é lida de todos os quadros por uma fatia com passo,
+        sem laço por registro: o tipo é contado na coluna 0 e a soma sai dígito a
+        dígito do valor (soma dos bytes da coluna menos '0' vezes a quantidade).
+        """
+        inicio, fim, passo = self.posicao_quadro(0), self.inicio_trailer, self.tamanho_quadro
+        tipos = self.mapa[inicio:fim:passo]
+        if tipos.count(b'M') != len(tipos):
+            quadro = len(tipos) - len(tipos.lstrip(b'M'))
+            raise ValueError(f"Registro na linha {quadro + 2} deveria ser do tipo Movimento (M)")
+        colunas = [self.mapa[inicio + posicao:fim:passo] for posicao in range(33, 50)]
+        if all(digitos.isdigit() for digitos in colunas):
+            soma_centavos = 0
+            for digitos in colunas:
+                soma_centavos = soma_centavos * 10 + sum(digitos) - 48 * len(digitos)
+        else:
+            # Valores com espaços, que int() aceita como na lista: soma registro a registro
+            soma_centavos = sum(int(self.mapa[posicao + 33:posicao + 50]) for posicao in range(inicio, fim, passo))
+
+        valor_trailer = int(self.linha_trailer[7:16])
+        if soma_centavos != valor_trailer:
+            raise ValueError(f"Soma dos valores dos registros M ({soma_centavos / 100}) não corresponde ao valor no Trailer ({valor_trailer / 100})")
+
+    def _registro(self, quadro: int):
+        """Obtém o registro de um quadro, preferindo a versão alterada"""
+        registro = self._editados.get(quadro)
+        if registro is None:
+            registro = RegistroMovimentoMapeado(self, quadro)
+        return registro
+
+    def _quadros_mutaveis(self) -> array:
+        """Converte a ordem dos quadros em vetor na primeira alteração estrutural"""
+        if isinstance(self._quadros, range):
+            self._quadros = array('q', self._quadros)
+        return self._quadros
+
+    def _novo_quadro(self, registro) -> int:
+        """Guarda um registro que não pertence ao arquivo mapeado e retorna o seu quadro"""
+        quadro = self._proximo_quadro_novo
+        self._proximo_quadro_novo -= 1
+        self._editados[quadro] = registro
+        return quadro
+
+    def __len__(self):
+        return len(self._quadros)
+
+    def __iter__(self):
+        editados = self._editados
+        for quadro in self._quadros:
+            registro = editados.get(quadro)
+            yield registro if registro is not None else RegistroMovimentoMapeado(self, quadro)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._registro(quadro) for quadro in self._quadros[indice]]
+        return self._registro(self._quadros[indice])
+
+    def __setitem__(self, indice, registro):
+        if isinstance(indice, slice):
+            raise TypeError("Atribuição por fatia não é suportada")
+        quadros = self._quadros_mutaveis()
+        # O quadro substituído deixa a sequência: a versão alterada dele não pode ficar para trás
+        self._editados.pop(quadros[indice], None)
+        quadros[indice] = self._novo_quadro(registro)
+
+    def __delitem__(self, indice):
+        quadros = self._quadros_mutaveis()
+        removidos = quadros[indice] if isinstance(indice, slice) else [quadros[indice]]
+        del quadros[indice]
+        for quadro in removidos:
+            self._editados.pop(quadro, None)
+
+    def manter(self, mascara):
+        """Mantém apenas os registros marcados na máscara (uma posição por registro), em uma passada"""
+        if len(mascara) != len(self):
+            raise ValueError("A máscara deve ter uma posição para cada registro")
+        self._quadros = array('q', compress(self._quadros, mascara))
+        if self._editados:
+            mantidos = set(self._quadros)
+            self._editados = {quadro: registro for quadro, registro in self._editados.items() if quadro in mantidos}
+
+    def removidos(self, mascara):
+        """Quadros (e registros alterados) que manter(mascara) removeria, para restaurar depois"""
+        quadros = array('q', compress(self._quadros, bytes(mascara).translate(_INVERTER_MASCARA)))
+        editados = {}
+        if self._editados:
+            removidos = set(quadros)
+            editados = {quadro: registro for quadro, registro in self._editados.items() if quadro in removidos}
+        return quadros, editados
+
+    def restaurar(self, mascara, removidos):
+        """Desfaz manter(mascara), reintercalando os quadros removidos nas posições de origem"""
+        quadros, editados = removidos
+        origens = (iter(quadros), iter(self._quadros))
+        self._quadros = array('q', map(next, map(origens.__getitem__, mascara)))
+        self._editados.update(editados)
+
+    def insert(self, indice: int, registro):
+        self._quadros_mutaveis().insert(indice, self._novo_quadro(registro))
+
+    def append(self, registro):
+        self._quadros_mutaveis().append(self._novo_quadro(registro))
+
+    def serializar(self, registros_por_bloco: int = REGISTROS_POR_BLOCO):
+        """Produz os registros de movimento como blocos de bytes terminados em LF
+
+        Sequências de quadros originais não alterados são copiadas do mapeamento
+        como estão (com CRLF trocado por LF, como no salvamento linha a linha); só
+        os registros alterados ou novos são convertidos em texto.
+        """
+        editados = self._editados
+        inicio = fim = None
+        for quadro in self._quadros:
+            if quadro == fim and quadro not in editados and fim - inicio < registros_por_bloco:
+                fim += 1
+                continue
+            if inicio is not None:
+                yield self._trecho(inicio, fim)
+                inicio = fim = None
+            registro = editados.get(quadro)
+            if registro is None:
+                inicio, fim = quadro, quadro + 1
+            else:
+                yield (str(registro) + '\n').encode('utf-8')
+        if inicio is not None:
+            yield self._trecho(inicio, fim)
+
+    def _trecho(self, inicio: int, fim: int) -> bytes:
+        """Bytes dos quadros originais de inicio a fim (exclusive), terminados em LF"""
+        trecho = self.mapa[self.posicao_quadro(inicio):self.posicao_quadro(fim)]
+        if self.terminador != b'\n':
+            trecho = trecho.replace(self.terminador, b'\n')
+        return trecho
+
+    def fechar(self):
+        """Libera o mapeamento do arquivo"""
+        self.mapa.close()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos métodos de busca por valor (soma de subconjuntos)
+
+Compara, para cenários sintéticos de quantidade de candidatos e alvo, o tempo da
+programação dinâmica por dicionário, do bitset de somas alcançáveis e do
+encontro no meio, junto com o custo estimado de cada um e o método que a
+escolha automática de encontrar_subconjunto usaria.
+
+Métodos cujo custo estimado passa do limite (ou cujas máscaras não cabem no
+limite de memória) aparecem como "recusado", sem serem executados.
+
+Uso: python3 benchmark_conciliacao.py [limite_de_operacoes]
+"""
+
+import sys
+import time
+import random
+
+import conciliacao
+from conciliacao import (preparar_candidatos, escolher_metodo, estimar_operacoes, estimar_operacoes_bitset,
+                         estimar_operacoes_meio, estimar_memoria_bitset, METODOS)
+
+# (quantidade de candidatos, menor valor, maior valor) em centavos
+CENARIOS = [
+    (16, 1_000, 500_000),
+    (24, 10_000, 5_000_000),
+    (32, 100_000, 50_000_000),
+    (40, 100_000, 50_000_000),
+    (44, 1_000_000, 100_000_000),
+    (200, 1_000, 500_000),
+    (2000, 1_000, 500_000),
+]
+
+ESTIMATIVAS = {
+    'dicionario': estimar_operacoes,
+    'bitset': estimar_operacoes_bitset,
+    'meio': estimar_operacoes_meio,
+}
+
+
+def gerar_cenario(quantidade: int, minimo: int, maximo: int, semente: int = 42):
+    """Valores aleatórios e um alvo formado por um terço deles (sempre alcançável)"""
+    aleatorio = random.Random(semente)
+    valores = [aleatorio.randint(minimo, maximo) for _ in range(quantidade)]
+    alvo = sum(aleatorio.sample(valores, max(1, quantidade // 3)))
+    return valores, alvo
+
+
+def medir(metodo: str, candidatos, alvo: int, limite: int):
+    """Executa o método e retorna o tempo, ou None se ele seria recusado"""
+    if ESTIMATIVAS[metodo](candidatos, alvo) > limite:
+        return None
+    if metodo == 'bitset' and estimar_memoria_bitset(candidatos, alvo) > 2 * conciliacao.LIMITE_MEMORIA_MASCARAS:
+        return None
+    ordenados = sorted(candidatos, key=lambda item: item[1], reverse=True)
+    inicio = time.perf_counter()
+    indices = METODOS[metodo](ordenados, alvo)
+    tempo = time.perf_counter() - inicio
+    assert indices is not None and sum(dict(candidatos)[i] for i in indices) == alvo
+    return tempo
+
+
+def main():
+    limite = int(sys.argv[1]) if len(sys.argv) > 1 else conciliacao.LIMITE_OPERACOES
+
+    print("=" * 96)
+    print(f"BENCHMARK DA BUSCA POR VALOR - limite de {limite} operações")
+    print("=" * 96)
+    print(f"{'n':>5} {'alvo (R$)':>16} | {'dicionario':>12} {'bitset':>12} {'meio':>12} | {'automático':>12}")
+    print("-" * 96)
+
+    for quantidade, minimo, maximo in CENARIOS:
+        valores, alvo = gerar_cenario(quantidade, minimo, maximo)
+        candidatos, alvo_reduzido = preparar_candidatos(valores, alvo)
+
+        tempos = []
+        for metodo in ('dicionario', 'bitset', 'meio'):
+            tempo = medir(metodo, candidatos, alvo_reduzido, limite)
+            tempos.append("recusado" if tempo is None else f"{tempo:.3f}s")
+        try:
+            automatico = escolher_metodo(candidatos, alvo_reduzido, limite)
+        except ValueError:
+            automatico = "recusado"
+
+        print(f"{quantidade:>5} {alvo / 100:>16,.2f} | {tempos[0]:>12} {tempos[1]:>12} {tempos[2]:>12} | {automatico:>12}")
+
+
+if __name__ == "__main__":
+    main()
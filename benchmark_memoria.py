@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memória dos registros de movimento
+
+Compara os bytes por registro do layout anterior (um atributo str por campo em
+__dict__) com o RegistroMovimento compacto (__slots__ com a linha de 91
+caracteres) e com a tabela colunar, para um volume sintético de registros.
+
+Os registros são montados diretamente a partir das linhas geradas: o trailer
+comporta no máximo 99.999 registros, então um arquivo de 1 milhão de linhas não
+passaria pela validação do carregamento.
+
+Uso: python3 benchmark_memoria.py [quantidade_de_registros]
+"""
+
+import gc
+import sys
+import time
+import random
+import tracemalloc
+
+from registros_movimentacao import RegistroMovimento
+from tabela_movimentos import TabelaMovimentos
+
+
+class RegistroMovimentoAnterior:
+    """Réplica do layout anterior de RegistroMovimento, com um atributo por campo"""
+
+    def __init__(self, linha: str):
+        self.tipo = linha[0]
+        self.codigo_adquirente = linha[1:3]
+        self.data_movimento = linha[3:11]
+        self.numero_cartao = linha[11:31]
+        self.parcelas = linha[31:33]
+        self.valor_venda = linha[33:50]
+        self.data_venda = linha[50:58]
+        self.cvnsu = linha[58:67]
+        self.zeros_fixos = linha[67:69]
+        self.cpf_cnpj = linha[69:84]
+        self.numero_pedido = linha[84:91]
+
+
+def gerar_linhas(quantidade: int, semente: int = 42):
+    """Gera linhas de movimento sintéticas e válidas"""
+    aleatorio = random.Random(semente)
+    adquirentes = ['03', '08', '12', '46']
+    for i in range(quantidade):
+        yield (f"M{aleatorio.choice(adquirentes)}202506{aleatorio.randint(1, 28):02d}"
+               f"{aleatorio.randrange(10 ** 16):020d}{aleatorio.randint(1, 12):02d}"
+               f"{aleatorio.randint(100, 999999):017d}20250616{i % 10 ** 9:09d}00"
+               f"{aleatorio.randrange(10 ** 15):015d}{aleatorio.randrange(10 ** 7):07d}")
+
+
+def medir(descricao: str, construir, quantidade: int):
+    """Mede a memória retida e o tempo para construir a estrutura"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    estrutura = construir()
+    tempo = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{descricao:<35} {memoria / quantidade:>10.1f} bytes/registro {memoria / 2 ** 20:>10.1f} MiB {tempo:>8.2f}s")
+    del estrutura
+    return memoria / quantidade
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print("=" * 80)
+    print(f"BENCHMARK DE MEMÓRIA - {quantidade} registros de movimento")
+    print("=" * 80)
+
+    anterior = medir("Anterior (__dict__, 11 str)",
+                     lambda: [RegistroMovimentoAnterior(linha) for linha in gerar_linhas(quantidade)],
+                     quantidade)
+    compacto = medir("Compacto (__slots__, linha única)",
+                     lambda: [RegistroMovimento(linha) for linha in gerar_linhas(quantidade)],
+                     quantidade)
+    colunar = medir("Tabela colunar",
+                    lambda: TabelaMovimentos.do_buffer(''.join(gerar_linhas(quantidade)).encode('ascii'), 91, quantidade),
+                    quantidade)
+
+    print("-" * 80)
+    print(f"Redução do registro compacto: {anterior / compacto:.1f}x")
+    print(f"Redução da tabela colunar: {anterior / colunar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
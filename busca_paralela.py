@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca por valor dividida entre dois processos pelas metades dos candidatos
+
+Cada processo calcula as somas alcançáveis (MascarasPrefixo) de metade dos
+candidatos, com o alvo inteiro: cada um faz metade dos deslocamentos da busca
+serial. O processo principal cruza os dois bitsets. A soma t é alcançável com
+todos os candidatos quando alguma soma s da primeira metade tem t - s na
+segunda, o que se testa com um E entre o bitset da primeira e o da segunda
+espelhado (bit alvo - b para cada soma b). Como os bitsets são completos, a
+ausência de combinação exata é definitiva; a melhor aproximação é localizada
+por saltos de potências de 2, com O(log alvo) operações sobre os bitsets.
+Cada processo reconstrói então a sua parte com as máscaras que guardou.
+
+Se uma metade sozinha alcança o alvo, ela para ali e a outra é dispensada,
+como a busca serial faz. Quando as máscaras de uma metade não cabem na metade
+do orçamento de memória (os dois processos rodam ao mesmo tempo), ou a busca é
+pequena demais para compensar os processos, a busca serial de
+BuscaEmSegundoPlano é usada: o resultado nunca é pior que o dela.
+
+A divisão é sempre em duas partes, usando no máximo dois núcleos: o cruzamento
+só é barato entre dois bitsets (um E por faixa de somas). Juntar um terceiro
+exigiria a soma de conjuntos de dois bitsets completos, um deslocamento por
+soma alcançável, o que custa mais que a própria busca.
+"""
+
+import time
+import multiprocessing
+
+from conciliacao import (preparar_aproximacao, soma_gulosa, estimar_memoria_bitset, estimar_operacoes_bitset,
+                         MascarasPrefixo, LIMITE_MEMORIA_MASCARAS)
+from busca_segundo_plano import BuscaEmSegundoPlano, INTERVALO_PROGRESSO, TEMPO_ENCERRAMENTO
+
+# Abaixo deste custo estimado (operações do bitset) a busca serial é mais rápida que iniciar os processos
+OPERACOES_MINIMAS_PARALELO = 2_000_000
+
+
+def _calcular_metade(valores, alvo: int, limite_memoria: int, conexao, parar, itens_processados, posicao: int):
+    """Corpo de cada processo: envia as somas alcançáveis da metade e reconstrói a soma pedida depois"""
+    def progresso(itens, mascara):
+        itens_processados[posicao] = itens
+        return parar.is_set()
+
+    try:
+        mascaras = MascarasPrefixo(valores, alvo, progresso=progresso, limite_memoria=limite_memoria)
+        if parar.is_set() and not mascaras.alcancavel(alvo):
+            conexao.send(('interrompida',))
+            return
+        conexao.send(('mascara', mascaras.final))
+        soma = conexao.recv()
+        conexao.send(('posicoes', mascaras.reconstruir(soma)))
+    except (ValueError, MemoryError) as e:
+        conexao.send(('erro', str(e) or type(e).__name__))
+    except (EOFError, BrokenPipeError):
+        # O processo principal desistiu da busca
+        pass
+
+
+def dividir_candidatos(candidatos):
+    """Divide os candidatos (do maior para o menor) em duas metades alternadas, de somas parecidas"""
+    return candidatos[0::2], candidatos[1::2]
+
+
+def estimar_memoria_cruzamento(alvo: int) -> int:
+    """Memória, em bytes, do cruzamento: o texto do espelho e um bitset espalhado por nível"""
+    return (alvo.bit_length() + 3) * (alvo // 8 + 1) + 2 * (alvo + 1)
+
+
+def maior_soma_combinada(primeira: int, segunda: int, alvo: int):
+    """Maior t <= alvo formado por uma soma s da primeira metade e t - s da segunda
+
+    primeira e segunda são os bitsets de somas alcançáveis (bits 0 a alvo). Com o
+    espelho da segunda (bit alvo - b para cada soma b), as somas s da primeira que
+    completam t são os bits de primeira & (espelho >> (alvo - t)). As faixas
+    [t - 2^k + 1, t] são testadas de uma vez com o espelho "espalhado" por 2^k
+    posições, descendo de t enquanto a faixa não tem solução. Retorna (t, s).
+    """
+    largura = alvo + 1
+    espelho = int(format(segunda, f'0{largura}b')[::-1], 2)
+    espalhados = [espelho]
+    while 1 << len(espalhados) <= largura:
+        passo = 1 << (len(espalhados) - 1)
+        espalhados.append(espalhados[-1] | (espalhados[-1] >> passo))
+
+    topo = alvo
+    for nivel in range(len(espalhados) - 1, -1, -1):
+        # Se nenhuma soma em [topo - 2^nivel + 1, topo] é alcançável, a faixa inteira é pulada
+        if topo - (1 << nivel) + 1 >= 0 and not primeira & (espalhados[nivel] >> (alvo - topo)):
+            topo -= 1 << nivel
+    comuns = primeira & (espelho >> (alvo - topo))
+    return topo, (comuns & -comuns).bit_length() - 1
+
+
+def buscar_em_paralelo(valores, alvo: int, tempo_limite: float = None,
+                       limite_memoria: int = LIMITE_MEMORIA_MASCARAS, ao_progresso=None, deve_cancelar=None,
+                       operacoes_minimas: int = OPERACOES_MINIMAS_PARALELO):
+    """Busca a combinação exata (ou a mais próxima sem passar do alvo) em dois processos
+
+    Com busca pequena ou máscaras que não cabem no orçamento, usa a busca serial
+    em segundo plano. A divisão é fixa em dois processos, qualquer que seja o
+    número de núcleos (ver o cabeçalho do módulo). ao_progresso(candidatos
+    processados, diferença da aproximação inicial) é chamado periodicamente e
+    deve_cancelar() é consultado a cada volta. Retorna um dicionário com
+    'indices', 'soma', 'exato', 'interrompida' e 'completa', como
+    BuscaEmSegundoPlano.executar.
+    """
+    valores = list(valores)
+    if alvo <= 0:
+        return {'indices': [], 'soma': 0, 'exato': alvo == 0, 'interrompida': False, 'completa': True}
+
+    candidatos, divisor, alvo_reduzido = preparar_aproximacao(valores, alvo)
+    indices, soma = soma_gulosa(candidatos, alvo_reduzido)
+    metades = dividir_candidatos(candidatos)
+    memoria_metade = limite_memoria // 2
+    if (soma == alvo_reduzido
+            or estimar_operacoes_bitset(candidatos, alvo_reduzido) < operacoes_minimas
+            or estimar_memoria_cruzamento(alvo_reduzido) > limite_memoria
+            or any(estimar_memoria_bitset(metade, alvo_reduzido, memoria_metade) > memoria_metade
+                   for metade in metades)):
+        busca = BuscaEmSegundoPlano(valores, alvo, float('inf') if tempo_limite is None else tempo_limite,
+                                    limite_memoria)
+        return busca.executar(ao_progresso=ao_progresso, deve_cancelar=deve_cancelar)
+
+    melhor = {'indices': indices, 'soma': soma * divisor, 'exato': False, 'interrompida': False, 'completa': True}
+    parar = multiprocessing.Event()
+    itens_processados = multiprocessing.Array('q', len(metades))
+    conexoes, processos = [], []
+    for posicao, metade in enumerate(metades):
+        local, remota = multiprocessing.Pipe()
+        processo = multiprocessing.Process(
+            target=_calcular_metade,
+            args=([v for _, v in metade], alvo_reduzido, memoria_metade, remota, parar, itens_processados, posicao),
+            daemon=True
+        )
+        processo.start()
+        remota.close()
+        conexoes.append(local)
+        processos.append(processo)
+
+    inicio = time.monotonic()
+    ultimo_progresso = 0.0
+    try:
+        # Primeira etapa: o bitset de cada metade (ou o aviso de que ela sozinha alcançou o alvo)
+        mascaras = [None] * len(metades)
+        while None in mascaras:
+            for posicao, conexao in enumerate(conexoes):
+                if mascaras[posicao] is not None or not conexao.poll(0.05):
+                    if mascaras[posicao] is None and not processos[posicao].is_alive() and not conexao.poll():
+                        return {'indices': None, 'soma': 0, 'exato': False, 'interrompida': False, 'completa': False,
+                                'erro': "O processo de busca terminou sem resultado"}
+                    continue
+                mensagem = conexao.recv()
+                if mensagem[0] == 'erro':
+                    return {'indices': None, 'soma': 0, 'exato': False, 'interrompida': False, 'completa': False,
+                            'erro': mensagem[1]}
+                if mensagem[0] == 'interrompida':
+                    melhor.update(interrompida=True, completa=False)
+                    return melhor
+                mascaras[posicao] = mensagem[1]
+                if mascaras[posicao] >> alvo_reduzido & 1:
+                    # Esta metade sozinha alcançou o alvo: a outra não contribui
+                    parar.set()
+                    outra = 1 - posicao
+                    conexao.send(alvo_reduzido)
+                    posicoes = conexao.recv()[1]
+                    melhor.update(indices=sorted(metades[posicao][p][0] for p in posicoes),
+                                  soma=alvo_reduzido * divisor, exato=alvo_reduzido * divisor == alvo)
+                    conexoes[outra].close()
+                    return melhor
+
+            agora = time.monotonic()
+            if ao_progresso and agora - ultimo_progresso >= INTERVALO_PROGRESSO:
+                ultimo_progresso = agora
+                ao_progresso(sum(itens_processados), (alvo_reduzido - soma) * divisor)
+            if (tempo_limite is not None and agora - inicio >= tempo_limite) or (deve_cancelar and deve_cancelar()):
+                parar.set()
+                melhor.update(interrompida=True, completa=False)
+                return melhor
+
+        # Segunda etapa: cruzar os bitsets e pedir a cada metade a sua parte da soma
+        total, soma_primeira = maior_soma_combinada(mascaras[0], mascaras[1], alvo_reduzido)
+        if ao_progresso:
+            ao_progresso(len(candidatos), (alvo_reduzido - total) * divisor)
+        if total <= soma:
+            return melhor
+        conexoes[0].send(soma_primeira)
+        conexoes[1].send(total - soma_primeira)
+        indices = []
+        for metade, conexao in zip(metades, conexoes):
+            indices.extend(metade[p][0] for p in conexao.recv()[1])
+        melhor.update(indices=sorted(indices), soma=total * divisor, exato=total * divisor == alvo)
+        return melhor
+    finally:
+        parar.set()
+        for conexao in conexoes:
+            conexao.close()
+        # Um processo dispensado pode estar preso enviando o bitset que ninguém vai ler
+        for processo in processos:
+            if processo.is_alive():
+                processo.terminate()
+            processo.join(timeout=TEMPO_ENCERRAMENTO)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca por valor em processo separado, com orçamento de tempo e memória
+
+A busca roda em um processo filho que envia o progresso (candidatos explorados
+e melhor diferença até ali) por uma fila. Quando o tempo acaba ou a busca é
+cancelada, o filho é avisado e devolve a melhor aproximação encontrada, em vez
+de nada; se não responder a tempo, é encerrado.
+"""
+
+import os
+import sys
+import time
+import multiprocessing
+from queue import Empty
+
+from conciliacao import buscar_mais_proximo, LIMITE_MEMORIA_MASCARAS
+
+# Orçamento de tempo padrão da busca, em segundos
+TEMPO_LIMITE_BUSCA = 30.0
+
+# Intervalo mínimo entre mensagens de progresso enviadas pelo processo filho
+INTERVALO_PROGRESSO = 0.2
+
+# Tempo que o filho tem para devolver a aproximação depois de avisado
+TEMPO_ENCERRAMENTO = 5.0
+
+
+def _executar_busca(valores, alvo, limite_memoria, fila, cancelar):
+    """Corpo do processo filho: busca e envia progresso e resultado pela fila"""
+    ultimo_envio = [0.0]
+
+    def progresso(explorados, diferenca):
+        agora = time.monotonic()
+        if agora - ultimo_envio[0] >= INTERVALO_PROGRESSO:
+            ultimo_envio[0] = agora
+            fila.put(('progresso', explorados, diferenca))
+        return cancelar.is_set()
+
+    try:
+        indices, soma, completa = buscar_mais_proximo(valores, alvo, progresso, limite_memoria)
+        fila.put(('resultado', indices, soma, completa))
+    except (ValueError, MemoryError) as e:
+        fila.put(('erro', str(e) or type(e).__name__))
+
+
+def enter_pressionado() -> bool:
+    """Indica, sem bloquear, se o usuário pressionou Enter no terminal"""
+    if os.name == 'nt':
+        import msvcrt
+        return msvcrt.kbhit() and msvcrt.getwch() in '\r\n'
+    if not sys.stdin.isatty():
+        return False
+    import select
+    pronto, _, _ = select.select([sys.stdin], [], [], 0)
+    if pronto:
+        sys.stdin.readline()
+        return True
+    return False
+
+
+class BuscaEmSegundoPlano:
+    """Busca da combinação de valores mais próxima do alvo em um processo filho"""
+
+    def __init__(self, valores, alvo: int, tempo_limite: float = TEMPO_LIMITE_BUSCA,
+                 limite_memoria: int = LIMITE_MEMORIA_MASCARAS):
+        """Prepara a busca; valores e alvo em centavos, tempo em segundos e memória em bytes"""
+        self.valores = list(valores)
+        self.alvo = alvo
+        self.tempo_limite = tempo_limite
+        self.limite_memoria = limite_memoria
+        self.explorados = 0
+        self.melhor_diferenca = None
+        self._fila = multiprocessing.Queue()
+        self._cancelar = multiprocessing.Event()
+        self._processo = None
+
+    def iniciar(self):
+        """Inicia o processo filho"""
+        self._processo = multiprocessing.Process(
+            target=_executar_busca,
+            args=(self.valores, self.alvo, self.limite_memoria, self._fila, self._cancelar),
+            daemon=True
+        )
+        self._processo.start()
+
+    def cancelar(self):
+        """Pede ao processo filho que pare e devolva a melhor aproximação"""
+        self._cancelar.set()
+
+    def executar(self, ao_progresso=None, deve_cancelar=None):
+        """Executa a busca até o resultado, o fim do orçamento ou o cancelamento
+
+        ao_progresso(explorados, melhor_diferenca) é chamado a cada mensagem de
+        progresso e deve_cancelar() é consultado periodicamente. Retorna um
+        dicionário com 'indices', 'soma', 'exato', 'interrompida' e 'completa'
+        (se a busca exaustiva foi até o fim, garantindo que não há combinação
+        exata melhor); 'indices' é None se o filho falhou ou não respondeu, e
+        nesse caso 'erro' traz o motivo.
+        """
+        if self._processo is None:
+            self.iniciar()
+        inicio = time.monotonic()
+        prazo_encerramento = None
+
+        try:
+            while True:
+                try:
+                    mensagem = self._fila.get(timeout=0.1)
+                except Empty:
+                    mensagem = None
+
+                if mensagem and mensagem[0] == 'progresso':
+                    _, self.explorados, self.melhor_diferenca = mensagem
+                    if ao_progresso:
+                        ao_progresso(self.explorados, self.melhor_diferenca)
+                elif mensagem and mensagem[0] == 'resultado':
+                    _, indices, soma, completa = mensagem
+                    return {'indices': indices, 'soma': soma, 'exato': soma == self.alvo,
+                            'interrompida': self._cancelar.is_set(), 'completa': completa}
+                elif mensagem and mensagem[0] == 'erro':
+                    return {'indices': None, 'soma': 0, 'exato': False, 'interrompida': False, 'completa': False,
+                            'erro': mensagem[1]}
+                elif mensagem is None and not self._processo.is_alive() and self._fila.empty():
+                    return {'indices': None, 'soma': 0, 'exato': False, 'interrompida': self._cancelar.is_set(),
+                            'completa': False, 'erro': "O processo de busca terminou sem resultado"}
+
+                if prazo_encerramento is None:
+                    if time.monotonic() - inicio >= self.tempo_limite or (deve_cancelar and deve_cancelar()):
+                        self.cancelar()
+                        prazo_encerramento = time.monotonic() + TEMPO_ENCERRAMENTO
+                elif time.monotonic() >= prazo_encerramento:
+                    return {'indices': None, 'soma': 0, 'exato': False, 'interrompida': True, 'completa': False,
+                            'erro': "A busca não respondeu ao cancelamento"}
+        finally:
+            self.encerrar()
+
+    def encerrar(self):
+        """Encerra o processo filho, se ainda estiver rodando"""
+        if self._processo is not None and self._processo.is_alive():
+            self._processo.terminate()
+        if self._processo is not None:
+            self._processo.join(timeout=1)
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de conciliação por valor (soma de subconjuntos) em centavos inteiros
+
+Encontra um subconjunto de valores cuja soma é exatamente igual ao alvo. Toda a
+aritmética é feita em centavos (int), sem tolerâncias de ponto flutuante, e o
+custo da busca é estimado antes de começar: se ultrapassar o limite configurado,
+a busca é recusada em vez de rodar por tempo indeterminado.
+"""
+
+from functools import reduce
+from math import gcd, isqrt
+
+# Limite de operações aceito pela busca (aproximadamente operações Python elementares)
+LIMITE_OPERACOES = 100_000_000
+
+# Memória máxima ocupada pelas máscaras guardadas para reconstruir o subconjunto
+LIMITE_MEMORIA_MASCARAS = 256 * 2 ** 20
+
+# Estados explorados pela enumeração ordenada antes de desistir
+LIMITE_ESTADOS = 1_000_000
+
+# Operações Python por soma de metade no encontro no meio (gerar, ordenar e percorrer)
+OPERACOES_POR_SOMA_MEIO = 8
+
+# Maior quantidade de candidatos aceita pelo encontro no meio na busca aproximada
+LIMITE_CANDIDATOS_MEIO = 44
+
+# Quantos bits o deslocamento de um inteiro grande processa no tempo de uma operação Python
+BITS_POR_OPERACAO = 256
+
+
+def preparar_candidatos(valores, alvo: int):
+    """Descarta valores que não podem participar da soma e reduz pelo MDC comum
+
+    Retorna (candidatos, alvo_reduzido), onde candidatos é uma lista de
+    (índice original, valor reduzido), ou (None, None) se o alvo é inalcançável
+    por divisibilidade.
+    """
+    candidatos = [(i, v) for i, v in enumerate(valores) if 0 < v <= alvo]
+    divisor = reduce(gcd, (v for _, v in candidatos), 0)
+    if divisor > 1:
+        if alvo % divisor:
+            return None, None
+        candidatos = [(i, v // divisor) for i, v in candidatos]
+        alvo //= divisor
+    return candidatos, alvo
+
+
+def estimar_operacoes(candidatos, alvo: int) -> int:
+    """Estimativa de pior caso do custo da programação dinâmica por somas alcançáveis"""
+    return len(candidatos) * min(alvo + 1, 2 ** min(len(candidatos), 62))
+
+
+def estimar_operacoes_meio(candidatos, alvo: int) -> int:
+    """Estimativa do custo do encontro no meio: gerar, ordenar e percorrer as somas das metades"""
+    return OPERACOES_POR_SOMA_MEIO * 2 ** ((len(candidatos) + 1) // 2)
+
+
+def estimar_operacoes_bitset(candidatos, alvo: int) -> int:
+    """Estimativa do custo do bitset: um deslocamento de alvo bits por item"""
+    return len(candidatos) * (alvo // BITS_POR_OPERACAO + 1)
+
+
+def intervalo_pontos(total_mascaras: int, bytes_mascara: int, limite_memoria: int = None) -> int:
+    """Intervalo entre máscaras guardadas para que os pontos de verificação ocupem até metade do limite"""
+    if limite_memoria is None:
+        limite_memoria = LIMITE_MEMORIA_MASCARAS
+    if total_mascaras * bytes_mascara <= limite_memoria:
+        return 1
+    intervalo = -(-total_mascaras * bytes_mascara // max(1, limite_memoria // 2))
+    return min(intervalo, isqrt(total_mascaras) + 1)
+
+
+def estimar_memoria_bitset(candidatos, alvo: int, limite_memoria: int = None) -> int:
+    """Memória, em bytes, das máscaras guardadas para a reconstrução"""
+    bytes_mascara = alvo // 8 + 1
+    total = len(candidatos) + 1
+    intervalo = intervalo_pontos(total, bytes_mascara, limite_memoria)
+    if intervalo == 1:
+        return total * bytes_mascara
+    return (-(-total // intervalo) + intervalo) * bytes_mascara
+
+
+class MascarasPrefixo:
+    """Somas alcançáveis com os primeiros itens, como bits de um inteiro grande
+
+    O bit s da máscara i está ligado quando a soma s pode ser formada com os i
+    primeiros valores. Cada item custa um deslocamento e um OU sobre a máscara
+    inteira. Para reconstruir o subconjunto são guardadas máscaras em pontos de
+    verificação; as máscaras intermediárias de um trecho são recalculadas sob
+    demanda e os trechos mais recentes ficam em cache até o limite de memória.
+    Quando todas não cabem, a memória fica limitada a O(sqrt(n)) máscaras.
+    """
+
+    def __init__(self, valores, alvo: int, parar_no_alvo: bool = True, progresso=None, limite_memoria: int = None):
+        """Calcula as máscaras, interrompendo quando o alvo é alcançado
+
+        progresso, se informado, é chamado com (itens processados, máscara atual)
+        após cada item; se retornar True o cálculo é interrompido ali.
+        """
+        self.valores = valores
+        self.alvo = alvo
+        self.limite = (1 << (alvo + 1)) - 1
+        if limite_memoria is None:
+            limite_memoria = LIMITE_MEMORIA_MASCARAS
+
+        bytes_mascara = alvo // 8 + 1
+        total = len(valores) + 1
+        self.intervalo = intervalo_pontos(total, bytes_mascara, limite_memoria)
+        memoria_pontos = -(-total // self.intervalo) * bytes_mascara
+        self.trechos_em_cache = max(1, (limite_memoria - memoria_pontos) // (self.intervalo * bytes_mascara))
+
+        mascara = 1
+        self.pontos = [mascara]
+        self.total_itens = 0
+        for posicao, valor in enumerate(valores):
+            mascara |= (mascara << valor) & self.limite
+            self.total_itens = posicao + 1
+            if self.total_itens % self.intervalo == 0:
+                self.pontos.append(mascara)
+            if parar_no_alvo and (mascara >> alvo) & 1:
+                break
+            if progresso and progresso(self.total_itens, mascara):
+                break
+        self.final = mascara
+        self._trechos = {}
+
+    def alcancavel(self, soma: int) -> bool:
+        """Indica se a soma pode ser formada com os itens processados"""
+        return self.contem(self.total_itens, soma)
+
+    def maior_alcancavel(self) -> int:
+        """Maior soma, sem passar do alvo, que pode ser formada com os itens processados"""
+        return self.final.bit_length() - 1
+
+    def contem(self, itens: int, soma: int) -> bool:
+        """Indica se a soma pode ser formada com os primeiros itens"""
+        if not 0 <= soma <= self.alvo:
+            return False
+        # Deslocar copia os bits acima da soma e a máscara isolada copia os de baixo: usar o menor
+        if soma > self.alvo // 2:
+            return bool((self.mascara(itens) >> soma) & 1)
+        return bool(self.mascara(itens) & (1 << soma))
+
+    def mascara(self, itens: int) -> int:
+        """Máscara de somas alcançáveis usando apenas os primeiros itens"""
+        if itens == self.total_itens:
+            return self.final
+        if self.intervalo == 1:
+            return self.pontos[itens]
+
+        numero_trecho = itens // self.intervalo
+        # Retirar e reinserir mantém o dicionário em ordem de uso (o primeiro é o mais antigo)
+        mascaras = self._trechos.pop(numero_trecho, None)
+        if mascaras is None:
+            inicio = numero_trecho * self.intervalo
+            mascara = self.pontos[numero_trecho]
+            mascaras = [mascara]
+            for valor in self.valores[inicio:min(inicio + self.intervalo, self.total_itens)]:
+                mascara |= (mascara << valor) & self.limite
+                mascaras.append(mascara)
+            if len(self._trechos) >= self.trechos_em_cache:
+                del self._trechos[next(iter(self._trechos))]
+        self._trechos[numero_trecho] = mascaras
+        return mascaras[itens - numero_trecho * self.intervalo]
+
+    def reconstruir(self, soma: int):
+        """Posições dos itens que formam a soma, percorrendo as máscaras de trás para frente"""
+        if not self.alcancavel(soma):
+            return None
+        posicoes = []
+        for itens in range(self.total_itens, 0, -1):
+            if not soma:
+                break
+            # Se a soma já era alcançável sem o item, ele não é necessário
+            if not self.contem(itens - 1, soma):
+                posicoes.append(itens - 1)
+                soma -= self.valores[itens - 1]
+        return posicoes
+
+
+def subconjunto_bitset(candidatos, alvo: int):
+    """Busca por bitset de somas alcançáveis; retorna os índices originais ou None"""
+    mascaras = MascarasPrefixo([v for _, v in candidatos], alvo)
+    posicoes = mascaras.reconstruir(alvo)
+    if posicoes is None:
+        return None
+    return sorted(candidatos[p][0] for p in posicoes)
+
+
+def somas_da_metade(valores):
+    """Todas as somas de subconjuntos dos valores, em ordem crescente
+
+    Cada soma vem empacotada com a máscara dos itens que a formam, como
+    (soma << len(valores)) | máscara, para que a lista seja de inteiros simples.
+    Cada item dobra a lista: as novas somas já saem ordenadas, e o sort do Python
+    junta as duas sequências ordenadas em tempo linear.
+    """
+    largura = len(valores)
+    somas = [0]
+    for bit, valor in enumerate(valores):
+        incremento = (valor << largura) | (1 << bit)
+        somas += [soma + incremento for soma in somas]
+        somas.sort()
+    return somas
+
+
+def encontro_no_meio(candidatos, alvo: int, progresso=None):
+    """Encontro no meio: somas ordenadas de cada metade e busca com dois ponteiros
+
+    Retorna (índices originais, soma) da combinação de maior soma sem passar do
+    alvo, que é o próprio alvo quando existe combinação exata. progresso, se
+    informado, é chamado com (metades geradas, diferença da melhor soma até ali)
+    e interrompe a busca retornando True.
+    """
+    meio = len(candidatos) // 2
+    esquerda, direita = candidatos[:meio], candidatos[meio:]
+    largura_esquerda, largura_direita = len(esquerda), len(direita)
+    somas_esquerda = somas_da_metade([v for _, v in esquerda])
+    if progresso and progresso(1, alvo):
+        return [], 0
+    somas_direita = somas_da_metade([v for _, v in direita])
+    if progresso and progresso(2, alvo):
+        return [], 0
+
+    # Esquerda crescente, direita decrescente
+    melhor, melhor_soma = (0, 0), 0
+    i, j = 0, len(somas_direita) - 1
+    while i < len(somas_esquerda) and j >= 0:
+        total = (somas_esquerda[i] >> largura_esquerda) + (somas_direita[j] >> largura_direita)
+        if total > alvo:
+            j -= 1
+            continue
+        if total > melhor_soma:
+            melhor, melhor_soma = (i, j), total
+            if total == alvo:
+                break
+        i += 1
+
+    mascara_esquerda = somas_esquerda[melhor[0]] & ((1 << largura_esquerda) - 1)
+    mascara_direita = somas_direita[melhor[1]] & ((1 << largura_direita) - 1)
+    indices = [indice for bit, (indice, _) in enumerate(esquerda) if mascara_esquerda >> bit & 1]
+    indices += [indice for bit, (indice, _) in enumerate(direita) if mascara_direita >> bit & 1]
+    return sorted(indices), melhor_soma
+
+
+def subconjunto_meio(candidatos, alvo: int):
+    """Encontro no meio para soma exata; retorna os índices originais ou None
+
+    Custa O(2^(n/2)) independentemente do alvo, então vale para poucos candidatos
+    com alvos altos, em que as máscaras de somas alcançáveis ficam grandes.
+    """
+    indices, soma = encontro_no_meio(candidatos, alvo)
+    return indices if soma == alvo else None
+
+
+def subconjunto_dicionario(candidatos, alvo: int):
+    """Programação dinâmica com dicionário de somas alcançáveis (soma -> item e soma anterior)
+
+    Retorna a lista de índices originais cuja soma é o alvo, ou None se não existir.
+    """
+    pais = {0: None}
+    for posicao, (_, valor) in enumerate(candidatos):
+        novas = [(soma + valor, soma) for soma in pais if soma + valor <= alvo and soma + valor not in pais]
+        for soma, anterior in novas:
+            pais[soma] = (posicao, anterior)
+        if alvo in pais:
+            break
+
+    if alvo not in pais:
+        return None
+
+    indices = []
+    soma = alvo
+    while soma:
+        posicao, soma = pais[soma]
+        indices.append(candidatos[posicao][0])
+    return sorted(indices)
+
+
+def escolher_metodo(candidatos, alvo: int, limite_operacoes: int = LIMITE_OPERACOES) -> str:
+    """Escolhe o método de menor custo estimado que respeita os limites de operações e memória"""
+    custos = {
+        'dicionario': estimar_operacoes(candidatos, alvo),
+        'meio': estimar_operacoes_meio(candidatos, alvo),
+    }
+    if estimar_memoria_bitset(candidatos, alvo) <= 2 * LIMITE_MEMORIA_MASCARAS:
+        custos['bitset'] = estimar_operacoes_bitset(candidatos, alvo)
+
+    metodo = min(custos, key=custos.get)
+    if custos[metodo] > limite_operacoes:
+        raise ValueError(f"Busca por valor excede o limite de {limite_operacoes} operações "
+                         f"({len(candidatos)} registros candidatos)")
+    return metodo
+
+
+METODOS = {
+    'dicionario': subconjunto_dicionario,
+    'bitset': subconjunto_bitset,
+    'meio': subconjunto_meio,
+}
+
+
+def encontrar_subconjunto(valores, alvo: int, limite_operacoes: int = LIMITE_OPERACOES, metodo: str = 'auto'):
+    """Encontra índices de valores (em centavos) cuja soma é exatamente o alvo
+
+    O método é escolhido pelo tamanho do problema: casos triviais são resolvidos
+    diretamente, e quando o alvo passa da metade do total procura-se o complemento,
+    que tem alvo menor. Entre programação dinâmica por dicionário, bitset e encontro
+    no meio fica o de menor custo estimado. Lança ValueError se a estimativa
+    exceder o limite.
+    """
+    if alvo < 0:
+        return None
+    if alvo == 0:
+        return []
+
+    candidatos, alvo_reduzido = preparar_candidatos(valores, alvo)
+    if candidatos is None:
+        return None
+
+    total = sum(v for _, v in candidatos)
+    if total < alvo_reduzido:
+        return None
+    if total == alvo_reduzido:
+        return [i for i, _ in candidatos]
+
+    # Buscar o complemento quando ele tiver alvo menor
+    complemento = total - alvo_reduzido < alvo_reduzido
+    alvo_busca = total - alvo_reduzido if complemento else alvo_reduzido
+
+    if metodo == 'auto':
+        metodo = escolher_metodo(candidatos, alvo_busca, limite_operacoes)
+
+    # Valores maiores primeiro costumam alcançar o alvo em menos passos
+    ordenados = sorted(candidatos, key=lambda item: item[1], reverse=True)
+    indices = METODOS[metodo](ordenados, alvo_busca)
+    if indices is None:
+        return None
+    if complemento:
+        excluidos = set(indices)
+        return [i for i, _ in candidatos if i not in excluidos]
+    return indices
+
+
+def soma_gulosa(candidatos, alvo: int):
+    """Aproximação inicial: percorre os candidatos somando cada valor que ainda cabe no alvo
+
+    Retorna (índices originais, soma).
+    """
+    indices, soma = [], 0
+    for indice, valor in candidatos:
+        if soma + valor <= alvo:
+            indices.append(indice)
+            soma += valor
+    return sorted(indices), soma
+
+
+def preparar_aproximacao(valores, alvo: int):
+    """Candidatos da busca aproximada, do maior para o menor, reduzidos pelo MDC
+
+    Sem exigir divisibilidade pelo MDC: a melhor aproximação também é múltipla
+    dele. Retorna (candidatos, divisor, alvo reduzido), onde candidatos é uma
+    lista de (índice original, valor reduzido).
+    """
+    candidatos = [(i, v) for i, v in enumerate(valores) if 0 < v <= alvo]
+    divisor = reduce(gcd, (v for _, v in candidatos), 0) or 1
+    candidatos = sorted(((i, v // divisor) for i, v in candidatos), key=lambda item: item[1], reverse=True)
+    return candidatos, divisor, alvo // divisor
+
+
+def buscar_mais_proximo(valores, alvo: int, progresso=None, limite_memoria: int = None):
+    """Busca a combinação de soma mais próxima do alvo sem ultrapassá-lo (a exata, se existir)
+
+    Começa por uma aproximação gulosa e passa ao bitset ou, quando as máscaras não
+    cabem no limite de memória, ao encontro no meio. progresso, se informado, é
+    chamado periodicamente com (candidatos explorados, melhor diferença em
+    centavos); se retornar True a busca para e devolve a melhor aproximação até
+    ali. Sem método que caiba no limite, fica a aproximação gulosa.
+    Retorna (índices, soma em centavos, completa); completa é False quando a
+    busca exaustiva não foi até o fim (interrompida ou sem método que caiba no
+    limite), e então a falta da combinação exata não está garantida.
+    """
+    if limite_memoria is None:
+        limite_memoria = LIMITE_MEMORIA_MASCARAS
+    if alvo <= 0:
+        return [], 0, True
+
+    interrompida = False
+
+    def consultar(explorados, diferenca):
+        nonlocal interrompida
+        interrompida = interrompida or bool(progresso(explorados, diferenca))
+        return interrompida
+
+    candidatos, divisor, alvo_reduzido = preparar_aproximacao(valores, alvo)
+    indices, soma = soma_gulosa(candidatos, alvo_reduzido)
+    if progresso and consultar(0, (alvo_reduzido - soma) * divisor) or soma == alvo_reduzido:
+        return indices, soma * divisor, soma == alvo_reduzido
+
+    if estimar_memoria_bitset(candidatos, alvo_reduzido, limite_memoria) <= limite_memoria:
+        def acompanhar(itens, mascara):
+            return consultar(itens, (alvo_reduzido - mascara.bit_length() + 1) * divisor)
+
+        mascaras = MascarasPrefixo([v for _, v in candidatos], alvo_reduzido, progresso=progresso and acompanhar,
+                                   limite_memoria=limite_memoria)
+        melhor = mascaras.maior_alcancavel()
+        if melhor > soma:
+            indices = sorted(candidatos[p][0] for p in mascaras.reconstruir(melhor))
+            soma = melhor
+    elif len(candidatos) <= LIMITE_CANDIDATOS_MEIO:
+        def acompanhar_metades(metades, diferenca):
+            return consultar(metades * len(candidatos) // 2, min(diferenca, alvo_reduzido - soma) * divisor)
+
+        indices_meio, melhor = encontro_no_meio(candidatos, alvo_reduzido, progresso and acompanhar_metades)
+        if melhor > soma:
+            indices, soma = indices_meio, melhor
+    else:
+        return indices, soma * divisor, False
+    return indices, soma * divisor, not interrompida
+
+
+def enumerar_subconjuntos(valores, alvo: int, custos=None, limite_estados: int = LIMITE_ESTADOS,
+                          limite_operacoes: int = LIMITE_OPERACOES):
+    """Gera, sob demanda, os subconjuntos cuja soma é exatamente o alvo
+
+    Os itens são ordenados do menor para o maior custo por centavo (por padrão
+    custo 1 por item, ou seja, maiores valores primeiro) e a busca trabalha sobre
+    grupos crescentes desse prefixo: o primeiro grupo é o menor prefixo que já
+    alcança o alvo, e cada grupo seguinte dobra de tamanho. Em cada grupo a busca
+    é em profundidade (inclusão antes da exclusão) guiada pelas máscaras de somas
+    alcançáveis dos sufixos, então só se desce por ramos que levam a uma solução e
+    cada nova solução sai após no máximo 2n testes, sem explosão exponencial. Um
+    grupo só gera soluções com pelo menos um item novo, o que evita repetições.
+    Lança ValueError se o bitset ou a exploração excederem os limites.
+    """
+    if alvo < 0:
+        return
+    if custos is None:
+        custos = [1] * len(valores)
+    if alvo == 0:
+        yield []
+        return
+
+    candidatos, alvo_reduzido = preparar_candidatos(valores, alvo)
+    if candidatos is None or sum(v for _, v in candidatos) < alvo_reduzido:
+        return
+    if (estimar_operacoes_bitset(candidatos, alvo_reduzido) > limite_operacoes
+            or estimar_memoria_bitset(candidatos, alvo_reduzido) > 2 * LIMITE_MEMORIA_MASCARAS):
+        raise ValueError(f"Busca por valor excede o limite de {limite_operacoes} operações "
+                         f"({len(candidatos)} registros candidatos)")
+
+    ordenados = sorted(candidatos, key=lambda item: (custos[item[0]] / item[1], -item[1]))
+    prefixo = MascarasPrefixo([v for _, v in ordenados], alvo_reduzido)
+    if not prefixo.alcancavel(alvo_reduzido):
+        return
+
+    explorados = 0
+    anterior, atual = 0, prefixo.total_itens
+    while anterior < len(ordenados):
+        # Itens novos do grupo primeiro: a exigência de incluir algum deles corta cedo
+        grupo = ordenados[anterior:atual] + ordenados[:anterior]
+        novos = atual - anterior
+        itens = [v for _, v in grupo]
+        sufixos = MascarasPrefixo(itens[::-1], alvo_reduzido, parar_no_alvo=False)
+
+        # Pilha de (posição, soma restante, caminho); o caminho é uma lista encadeada de posições
+        pilha = [(0, alvo_reduzido, None)] if sufixos.alcancavel(alvo_reduzido) else []
+        while pilha:
+            posicao, soma, caminho = pilha.pop()
+            if soma == 0:
+                indices = []
+                while caminho:
+                    item, caminho = caminho
+                    indices.append(grupo[item][0])
+                yield sorted(indices)
+                continue
+
+            explorados += 1
+            if explorados > limite_estados:
+                raise ValueError(f"Enumeração por valor excede o limite de {limite_estados} estados")
+
+            valor = itens[posicao]
+            restantes = len(itens) - posicao - 1
+            # Excluir o último item novo sem ter incluído nenhum repetiria soluções de grupos anteriores
+            pode_excluir = caminho is not None or posicao + 1 < novos
+            # Empilhar a exclusão antes para que a inclusão seja explorada primeiro
+            if pode_excluir and sufixos.contem(restantes, soma):
+                pilha.append((posicao + 1, soma, caminho))
+            if valor <= soma and sufixos.contem(restantes, soma - valor):
+                pilha.append((posicao + 1, soma - valor, (posicao, caminho)))
+
+        anterior, atual = atual, min(2 * atual, len(ordenados))
+
+
+def melhores_subconjuntos(valores, alvo: int, quantidade: int, custos=None, amostra: int = None, **limites):
+    """Lista os k subconjuntos mais baratos entre as primeiras soluções enumeradas
+
+    São consideradas as primeiras `amostra` soluções da enumeração (por padrão
+    4 vezes a quantidade pedida), ordenadas pelo custo total e depois pelos índices.
+    """
+    if amostra is None:
+        amostra = 4 * quantidade
+    if custos is None:
+        custos = [1] * len(valores)
+
+    encontrados = []
+    try:
+        for indices in enumerar_subconjuntos(valores, alvo, custos, **limites):
+            encontrados.append(indices)
+            if len(encontrados) >= amostra:
+                break
+    except ValueError:
+        # Limite de estados: ranquear o que já foi encontrado
+        if not encontrados:
+            raise
+
+    encontrados.sort(key=lambda indices: (sum(custos[i] for i in indices), indices))
+    return encontrados[:quantidade]
+
+
+# Critérios de ranqueamento das combinações por valor
+CRITERIOS = {
+    'menos_registros': "Menos registros",
+    'data_venda_antiga': "Vendas mais antigas",
+    'adquirente_preferido': "Adquirente preferido",
+}
+
+
+def custos_por_criterio(movimentos, criterio: str, adquirente_preferido: str = None):
+    """Custo inteiro de cada registro de movimento segundo o critério de ranqueamento"""
+    if criterio == 'menos_registros':
+        return [1] * len(movimentos)
+    if criterio == 'data_venda_antiga':
+        # Cada data custa a sua posição entre as datas distintas: a mais antiga custa 1
+        datas = [mov.data_venda for mov in movimentos]
+        posicoes = {data: posicao for posicao, data in enumerate(sorted(set(datas)), start=1)}
+        return [posicoes[data] for data in datas]
+    if criterio == 'adquirente_preferido':
+        if not adquirente_preferido:
+            raise ValueError("Informe o adquirente preferido")
+        # Um registro de outro adquirente custa mais que qualquer combinação do preferido
+        penalidade = len(movimentos) + 1
+        return [1 if mov.codigo_adquirente == adquirente_preferido else penalidade for mov in movimentos]
+    raise ValueError(f"Critério de ranqueamento desconhecido: {criterio}")
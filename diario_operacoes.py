@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diário binário de operações da sessão de edição, para recuperação após uma queda
+
+Cada alteração feita pelo ArquivoMovimentacao (linha alterada, inclusão,
+exclusão, máscara de registros mantidos, desfazer ou refazer) é anexada ao diário assim que
+acontece, em um registro curto com tipo, tamanho e CRC32. O cabeçalho guarda
+tamanho e data de modificação do arquivo original: na próxima abertura, se o
+original não mudou, as operações são reaplicadas sobre ele para reconstruir a
+sessão. Um registro final incompleto (queda no meio da escrita) é ignorado.
+"""
+
+import os
+import struct
+import zlib
+
+from leitor_movimentacao import TAMANHO_REGISTRO, CODIFICACAO
+
+MAGICO = b'EDCJ1'
+CABECALHO = struct.Struct('<5sQQ')     # mágico, tamanho e mtime_ns do arquivo original
+REGISTRO = struct.Struct('<cII')       # operação, tamanho dos dados e CRC32 dos dados
+INDICE = struct.Struct('<Q')
+
+OP_LINHA = b'L'      # índice + linha de 91 caracteres que substitui o registro
+OP_INSERIR = b'I'    # índice + linha de 91 caracteres inserida
+OP_EXCLUIR = b'D'    # índice do registro excluído
+OP_MANTER = b'K'     # quantidade de registros + máscara de mantidos com um bit por registro
+OP_DESFAZER = b'U'   # sem dados: desfaz a última alteração do histórico
+OP_REFAZER = b'R'    # sem dados: refaz a última alteração desfeita
+
+_PARA_DIGITOS = bytes.maketrans(b'\x00\x01', b'01')
+_PARA_MASCARA = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def compactar_mascara(mascara) -> bytes:
+    """Compacta uma máscara de um byte por registro (0 ou 1) para um bit por registro"""
+    digitos = bytes(mascara).translate(_PARA_DIGITOS)[::-1]
+    return int(digitos or b'0', 2).to_bytes((len(mascara) + 7) // 8, 'little')
+
+
+def expandir_mascara(dados: bytes, total: int) -> bytes:
+    """Operação inversa de compactar_mascara"""
+    if not total:
+        return b''
+    digitos = format(int.from_bytes(dados, 'little'), f'0{total}b').encode('ascii')
+    return digitos[::-1].translate(_PARA_MASCARA)
+
+
+def caminho_diario(caminho_arquivo: str) -> str:
+    """Caminho do diário associado a um arquivo de movimentação"""
+    return caminho_arquivo + '.diario'
+
+
+def assinatura_arquivo(caminho_arquivo: str):
+    """Tamanho e data de modificação que identificam a versão do arquivo original"""
+    estado = os.stat(caminho_arquivo)
+    return estado.st_size, estado.st_mtime_ns
+
+
+class DiarioOperacoes:
+    """Diário de operações anexado a um arquivo de movimentação"""
+
+    def __init__(self, caminho: str, sincronizar: bool = False):
+        """Prepara o diário; com sincronizar=True cada operação é seguida de fsync"""
+        self.caminho = caminho
+        self.sincronizar = sincronizar
+        self._descritor = None
+
+    def iniciar(self, caminho_arquivo: str):
+        """Começa um diário vazio para a versão atual do arquivo original"""
+        self.fechar()
+        tamanho, modificacao = assinatura_arquivo(caminho_arquivo)
+        self._descritor = os.open(self.caminho, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.write(self._descritor, CABECALHO.pack(MAGICO, tamanho, modificacao))
+        if self.sincronizar:
+            os.fsync(self._descritor)
+
+    def continuar(self):
+        """Volta a anexar operações a um diário existente (depois de recuperá-lo)"""
+        self.fechar()
+        self._descritor = os.open(self.caminho, os.O_WRONLY | os.O_APPEND)
+
+    def _anexar(self, operacao: bytes, dados: bytes):
+        """Anexa um registro ao diário em uma única escrita"""
+        if self._descritor is None:
+            return
+        os.write(self._descritor, REGISTRO.pack(operacao, len(dados), zlib.crc32(dados)) + dados)
+        if self.sincronizar:
+            os.fsync(self._descritor)
+
+    # As linhas chegam já validadas pelos registros (registros_movimentacao.validar_texto),
+    # antes da alteração em memória: a codificação aqui não falha depois do fato
+
+    def registrar_linha(self, indice: int, linha: str):
+        self._anexar(OP_LINHA, INDICE.pack(indice) + linha.encode(CODIFICACAO))
+
+    def registrar_insercao(self, indice: int, linha: str):
+        self._anexar(OP_INSERIR, INDICE.pack(indice) + linha.encode(CODIFICACAO))
+
+    def registrar_exclusao(self, indice: int):
+        self._anexar(OP_EXCLUIR, INDICE.pack(indice))
+
+    def registrar_mascara(self, mascara):
+        self._anexar(OP_MANTER, INDICE.pack(len(mascara)) + compactar_mascara(mascara))
+
+    def registrar_desfazer(self):
+        self._anexar(OP_DESFAZER, b'')
+
+    def registrar_refazer(self):
+        self._anexar(OP_REFAZER, b'')
+
+    def operacoes(self, caminho_arquivo: str):
+        """Lê as operações gravadas, ou retorna None se o diário não vale para o arquivo
+
+        O diário só vale se foi iniciado para a versão atual do arquivo (mesmo
+        tamanho e data de modificação). A leitura para no primeiro registro
+        incompleto ou com CRC inválido.
+        """
+        if not os.path.exists(self.caminho):
+            return None
+        with open(self.caminho, 'rb') as f:
+            conteudo = f.read()
+        if len(conteudo) < CABECALHO.size:
+            return None
+        magico, tamanho, modificacao = CABECALHO.unpack_from(conteudo)
+        if magico != MAGICO or (tamanho, modificacao) != assinatura_arquivo(caminho_arquivo):
+            return None
+
+        operacoes = []
+        posicao = CABECALHO.size
+        while posicao + REGISTRO.size <= len(conteudo):
+            operacao, tamanho_dados, crc = REGISTRO.unpack_from(conteudo, posicao)
+            inicio = posicao + REGISTRO.size
+            dados = conteudo[inicio:inicio + tamanho_dados]
+            if len(dados) != tamanho_dados or zlib.crc32(dados) != crc:
+                break
+            if operacao in (OP_LINHA, OP_INSERIR):
+                linha = dados[INDICE.size:].decode(CODIFICACAO)
+                if len(linha) != TAMANHO_REGISTRO:
+                    break
+                operacoes.append((operacao, INDICE.unpack_from(dados)[0], linha))
+            elif operacao == OP_EXCLUIR:
+                operacoes.append((operacao, INDICE.unpack_from(dados)[0]))
+            elif operacao == OP_MANTER:
+                total = INDICE.unpack_from(dados)[0]
+                operacoes.append((operacao, expandir_mascara(dados[INDICE.size:], total)))
+            elif operacao in (OP_DESFAZER, OP_REFAZER):
+                operacoes.append((operacao,))
+            else:
+                break
+            posicao = inicio + tamanho_dados
+        return operacoes
+
+    def fechar(self):
+        """Fecha o diário, mantendo o arquivo"""
+        if self._descritor is not None:
+            os.close(self._descritor)
+            self._descritor = None
+
+    def descartar(self):
+        """Fecha e apaga o diário (sessão encerrada sem necessidade de recuperação)"""
+        self.fechar()
+        if os.path.exists(self.caminho):
+            os.unlink(self.caminho)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Valores monetários em centavos inteiros
+
+Os valores do arquivo já estão em centavos; somas, trailer e busca por valor
+trabalham só com inteiros. A conversão de valores digitados (ou decimais) para
+centavos passa por Decimal, sem float, evitando truncamentos como 19.99 → 1998.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+def para_centavos(valor) -> int:
+    """Converte um valor em reais para centavos, arredondando meio centavo para cima
+
+    Aceita Decimal, int, float ou texto como '19.99', '19,99', '1.234,56' ou
+    'R$ 10'. Texto inválido levanta ValueError.
+    """
+    if isinstance(valor, str):
+        texto = valor.strip().replace('R$', '').replace(' ', '')
+        if ',' in texto:
+            # Vírgula decimal: pontos são separadores de milhar
+            texto = texto.replace('.', '').replace(',', '.')
+        try:
+            valor = Decimal(texto)
+        except InvalidOperation:
+            raise ValueError(f"Valor inválido: {valor!r}") from None
+    elif isinstance(valor, float):
+        # repr dá a menor representação decimal do float (19.99 e não 19.989999...)
+        valor = Decimal(repr(valor))
+    elif not isinstance(valor, (int, Decimal)):
+        raise ValueError(f"Valor inválido: {valor!r}")
+    if not Decimal(valor).is_finite():
+        raise ValueError(f"Valor inválido: {valor!r}")
+    return int((Decimal(valor) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def formatar_centavos(centavos: int) -> str:
+    """Formata centavos como reais com duas casas ('1234.56'), sem passar por float"""
+    sinal = '-' if centavos < 0 else ''
+    reais, resto = divmod(abs(centavos), 100)
+    return f"{sinal}{reais}.{resto:02d}"
@@ -7,136 +7,58 @@ Aplicação para manipulação de arquivos de movimentação financeira
 import os
 import sys
 import logging
+import weakref
 from typing import List, Tuple
 from datetime import datetime
 
-# Importar componentes TUI
-from planilha_registros import PlanilhaRegistros
-from menu_principal_tui import MenuPrincipalTUI
+from registros_movimentacao import RegistroHeader, RegistroMovimento, RegistroTrailer, formatar_numero
+from leitor_movimentacao import TAMANHO_REGISTRO
+from dinheiro import para_centavos, formatar_centavos
+from historico_alteracoes import HistoricoAlteracoes
+from indices_secundarios import IndicesSecundarios
 
-# Configurar logging
-logging.basicConfig(
-    filename='log.txt',
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] [%(funcName)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+def configurar_log():
+    """Envia o log das operações para log.txt; chamada só pela aplicação, não ao importar o módulo"""
+    logging.basicConfig(
+        filename='log.txt',
+        level=logging.INFO,
+        format='[%(asctime)s] [%(levelname)s] [%(funcName)s] %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+# Mensagem mostrada quando o salvamento sobre o original esvazia o histórico (ver _reiniciar_diario)
+AVISO_HISTORICO_DESCARTADO = "Histórico de desfazer/refazer descartado ao salvar."
 
 def log_operacao(acao: str, detalhes: str):
     """Registra uma operação no log"""
     logging.info(f"[{acao}] {detalhes}")
 
 
-class RegistroHeader:
-    def __init__(self, linha: str):
-        if len(linha) != 91:
-            raise ValueError("Registro Header deve ter exatamente 91 caracteres")
-        
-        self.tipo = linha[0]
-        self.data_processamento = linha[1:9]
-        self.codigo_unidade = linha[9:11]
-        self.data_processamento2 = linha[11:19]
-        self.espacos = linha[19:27]
-        self.zeros = linha[27:91]
-    
-    def __str__(self):
-        return f"H{self.data_processamento}{self.codigo_unidade}{self.data_processamento2}{self.espacos}{self.zeros}"
-
-class RegistroMovimento:
-    def __init__(self, linha: str):
-        if len(linha) != 91:
-            raise ValueError("Registro de Movimento deve ter exatamente 91 caracteres")
-        
-        self.tipo = linha[0]
-        self.codigo_adquirente = linha[1:3]
-        self.data_movimento = linha[3:11]
-        self.numero_cartao = linha[11:31]
-        self.parcelas = linha[31:33]
-        self.valor_venda = linha[33:50]
-        self.data_venda = linha[50:58]
-        self.cvnsu = linha[58:67]
-        self.zeros_fixos = linha[67:69]
-        self.cpf_cnpj = linha[69:84]
-        self.numero_pedido = linha[84:91]
-    
-    @classmethod
-    def criar_registro(cls, tipo='M', codigo_adquirente='00', data_movimento='00000000', 
-                      numero_cartao=' ' * 20, parcelas='00', valor_venda='0' * 17, 
-                      data_venda='00000000', cvnsu='0' * 9, zeros_fixos='00', 
-                      cpf_cnpj='0' * 15, numero_pedido='0' * 7):
-        """Cria um RegistroMovimento com parâmetros individuais"""
-        # Formatar os campos para garantir o tamanho correto
-        tipo = tipo.ljust(1)[:1]
-        codigo_adquirente = codigo_adquirente.ljust(2)[:2]
-        data_movimento = data_movimento.ljust(8)[:8]
-        numero_cartao = numero_cartao.ljust(20)[:20]
-        parcelas = parcelas.ljust(2)[:2]
-        valor_venda = valor_venda.rjust(17, '0')[:17]
-        data_venda = data_venda.ljust(8)[:8]
-        cvnsu = cvnsu.ljust(9)[:9]
-        zeros_fixos = zeros_fixos.ljust(2)[:2]
-        cpf_cnpj = cpf_cnpj.ljust(15)[:15]
-        numero_pedido = numero_pedido.ljust(7)[:7]
-        
-        # Construir a linha formatada
-        linha = (f"{tipo}{codigo_adquirente}{data_movimento}{numero_cartao}"
-                f"{parcelas}{valor_venda}{data_venda}{cvnsu}"
-                f"{zeros_fixos}{cpf_cnpj}{numero_pedido}")
-        
-        # Criar e retornar a instância
-        instancia = cls(linha)
-        return instancia
-    
-    def get_valor_decimal(self) -> float:
-        """Retorna o valor da venda como decimal"""
-        valor = int(self.valor_venda)
-        return valor / 100
-    
-    def set_valor_decimal(self, valor: float):
-        """Define o valor da venda a partir de um decimal"""
-        valor_centavos = int(valor * 100)
-        self.valor_venda = f"{valor_centavos:017d}"
-    
-    def __str__(self):
-        return (f"{self.tipo}{self.codigo_adquirente}{self.data_movimento}{self.numero_cartao}"
-                f"{self.parcelas}{self.valor_venda}{self.data_venda}{self.cvnsu}"
-                f"{self.zeros_fixos}{self.cpf_cnpj}{self.numero_pedido}")
-
-class RegistroTrailer:
-    def __init__(self, linha: str):
-        if len(linha) != 91:
-            raise ValueError("Registro Trailer deve ter exatamente 91 caracteres")
-        
-        self.tipo = linha[0]
-        self.total_registros = linha[1:6]
-        self.espaco = linha[6]
-        self.valor_total = linha[7:16]
-        self.noves = linha[16:91]
-    
-    def get_total_registros(self) -> int:
-        return int(self.total_registros)
-    
-    def set_total_registros(self, total: int):
-        self.total_registros = f"{total:05d}"
-    
-    def get_valor_total_decimal(self) -> float:
-        valor = int(self.valor_total)
-        return valor / 100
-    
-    def set_valor_total_decimal(self, valor: float):
-        valor_centavos = int(valor * 100)
-        self.valor_total = f"{valor_centavos:09d}"
-    
-    def __str__(self):
-        return f"{self.tipo}{self.total_registros}{self.espaco}{self.valor_total}{self.noves}"
-
 class ArquivoMovimentacao:
-    def __init__(self, caminho_arquivo: str = None):
+    # Confere o trailer com uma soma completa após cada ajuste incremental (depuração)
+    verificar_totais = False
+    
+    def __init__(self, caminho_arquivo: str = None, armazenamento: str = 'lista'):
+        """Inicializa o arquivo; armazenamento pode ser 'lista' (padrão), 'mmap' ou 'colunas'"""
         self.caminho_arquivo = caminho_arquivo
+        self.armazenamento = armazenamento
         self.header = None
         self.movimentos = []
         self.trailer = None
-        self.conteudo_original = []
+        self.terminador = None
+        # Disposição do arquivo em disco, para o salvamento incremental (None se desconhecida)
+        self.disposicao = None
+        self.alterados = set()
+        # Diário de operações da sessão (diario_operacoes.DiarioOperacoes), se ativo
+        self.diario = None
+        # Alterações que podem ser desfeitas e refeitas (None desliga o histórico)
+        self.historico = HistoricoAlteracoes()
+        # Contador de alterações, para quem guarda visões derivadas dos registros (ex: a planilha)
+        self.versao = 0
+        # Índices por adquirente, data, cartão e CVNSU, construídos na primeira consulta
+        self.indices_secundarios = IndicesSecundarios(self)
+        # Quem acompanha as alterações dos registros (índices, seleções da planilha); ver _notificar
+        self.acompanhantes = weakref.WeakSet([self.indices_secundarios])
         
         if caminho_arquivo and os.path.exists(caminho_arquivo):
             self.carregar_arquivo(caminho_arquivo)
@@ -150,87 +72,593 @@ class ArquivoMovimentacao:
     def carregar_arquivo(self, caminho_arquivo: str):
         """Carrega e valida o arquivo de movimentação"""
         log_operacao("CARREGAR_ARQUIVO", f"Iniciando carregamento do arquivo {caminho_arquivo}")
+        if self.historico:
+            self.historico.limpar()
+        self.versao += 1
         
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-            linhas = [linha.rstrip('\n') for linha in f.readlines()]
-        
-        self.conteudo_original = linhas.copy()
+        if self.armazenamento == 'mmap':
+            self.carregar_arquivo_mapeado(caminho_arquivo)
+            return
+        if self.armazenamento == 'colunas':
+            self.carregar_arquivo_colunar(caminho_arquivo)
+            return
         
-        # Validar tamanho das linhas
-        for i, linha in enumerate(linhas):
-            if len(linha) != 91:
-                log_operacao("ERRO_VALIDACAO", f"Linha {i+1} tem {len(linha)} caracteres, deveria ter 91")
-                raise ValueError(f"Linha {i+1} tem {len(linha)} caracteres, deveria ter 91")
+        self.movimentos = list(self.iterar_movimentos(caminho_arquivo))
+        self.registrar_disposicao(caminho_arquivo, self.terminador)
         
-        # Validar primeiro registro (Header)
-        if not linhas or linhas[0][0] != 'H':
-            log_operacao("ERRO_VALIDACAO", "Primeiro registro deve ser do tipo Header (H)")
-            raise ValueError("Primeiro registro deve ser do tipo Header (H)")
+        log_operacao("CARREGAR_ARQUIVO", f"{len(self.movimentos)} registros de movimento carregados")
+        log_operacao("CARREGAR_ARQUIVO", f"Arquivo {caminho_arquivo} carregado e validado com sucesso")
+    
+    def iterar_movimentos(self, caminho_arquivo: str = None):
+        """Percorre o arquivo em fluxo, produzindo os registros de movimento sob demanda
         
-        self.header = RegistroHeader(linhas[0])
-        log_operacao("CARREGAR_ARQUIVO", "Registro Header carregado com sucesso")
+        O arquivo é lido em blocos de registros de tamanho fixo, de modo que o consumo
+        de memória não depende do tamanho do arquivo. Header e trailer são atribuídos
+        ao objeto durante a leitura; a contagem de registros e a soma dos valores são
+        conferidas com o trailer ao final da passada.
+        """
+        from leitor_movimentacao import LeitorMovimentacao
         
-        # Processar registros de movimento
-        self.movimentos = []
-        registros_movimento = []
+        caminho = caminho_arquivo if caminho_arquivo else self.caminho_arquivo
+        leitor = LeitorMovimentacao(caminho)
         
-        for i in range(1, len(linhas) - 1):
-            if linhas[i][0] == 'M':
-                movimento = RegistroMovimento(linhas[i])
-                self.movimentos.append(movimento)
-                registros_movimento.append(movimento)
-            else:
-                log_operacao("ERRO_VALIDACAO", f"Registro na linha {i+1} deveria ser do tipo Movimento (M)")
-                raise ValueError(f"Registro na linha {i+1} deveria ser do tipo Movimento (M)")
+        try:
+            for tipo, linha in leitor:
+                if tipo == 'M':
+                    yield RegistroMovimento(linha)
+                elif tipo == 'H':
+                    self.header = RegistroHeader(linha)
+                    log_operacao("CARREGAR_ARQUIVO", "Registro Header carregado com sucesso")
+                else:
+                    self.trailer = RegistroTrailer(linha)
+                    log_operacao("CARREGAR_ARQUIVO", "Registro Trailer carregado com sucesso")
+            self.terminador = leitor.terminador
+        except ValueError as e:
+            log_operacao("ERRO_VALIDACAO", str(e))
+            raise
+    
+    def carregar_arquivo_mapeado(self, caminho_arquivo: str, validar: bool = True):
+        """Abre o arquivo mapeado em memória, expondo os movimentos como visões sobre o arquivo
         
-        log_operacao("CARREGAR_ARQUIVO", f"{len(registros_movimento)} registros de movimento carregados")
+        A abertura lê o header e o trailer e confere a contagem de registros pelo
+        tamanho do arquivo; como no armazenamento 'lista', o tipo dos registros e
+        a soma dos valores também são conferidos com o trailer (por fatias do
+        mapeamento, sem criar os registros). validar=False dispensa essa
+        conferência, e então MovimentosMapeados.validar() deve ser chamado por
+        quem abre o arquivo.
+        """
+        from armazenamento_mmap import MovimentosMapeados
         
-        # Validar último registro (Trailer)
-        if not linhas or linhas[-1][0] != 'T':
-            log_operacao("ERRO_VALIDACAO", "Último registro deve ser do tipo Trailer (T)")
-            raise ValueError("Último registro deve ser do tipo Trailer (T)")
+        try:
+            movimentos = MovimentosMapeados(caminho_arquivo)
+            if validar:
+                movimentos.validar()
+        except ValueError as e:
+            log_operacao("ERRO_VALIDACAO", str(e))
+            raise
         
-        self.trailer = RegistroTrailer(linhas[-1])
-        log_operacao("CARREGAR_ARQUIVO", "Registro Trailer carregado com sucesso")
+        self.header = RegistroHeader(movimentos.linha_header)
+        self.trailer = RegistroTrailer(movimentos.linha_trailer)
+        self.movimentos = movimentos
+        self.registrar_disposicao(caminho_arquivo, movimentos.terminador)
         
-        # Validar contagem de registros
-        total_registros_m = len(registros_movimento)
-        if total_registros_m != self.trailer.get_total_registros():
-            log_operacao("ERRO_VALIDACAO", f"Número de registros M ({total_registros_m}) não corresponde ao valor no Trailer ({self.trailer.get_total_registros()})")
-            raise ValueError(f"Número de registros M ({total_registros_m}) não corresponde ao valor no Trailer ({self.trailer.get_total_registros()})")
+        log_operacao("CARREGAR_ARQUIVO", f"Arquivo {caminho_arquivo} mapeado em memória com {len(movimentos)} registros de movimento")
+    
+    def carregar_arquivo_colunar(self, caminho_arquivo: str):
+        """Carrega os movimentos em uma tabela colunar montada diretamente do buffer do arquivo"""
+        from armazenamento_mmap import MovimentosMapeados
+        from tabela_movimentos import TabelaMovimentos
         
-        # Validar soma dos valores
-        soma_valores = sum(mov.get_valor_decimal() for mov in registros_movimento)
-        valor_trailer = self.trailer.get_valor_total_decimal()
+        try:
+            mapeado = MovimentosMapeados(caminho_arquivo)
+            try:
+                mapeado.validar()
+                tabela = TabelaMovimentos.do_buffer(mapeado.mapa, mapeado.tamanho_quadro,
+                                                    mapeado.total_quadros, inicio=mapeado.tamanho_quadro)
+            finally:
+                mapeado.fechar()
+        except ValueError as e:
+            log_operacao("ERRO_VALIDACAO", str(e))
+            raise
         
-        if abs(soma_valores - valor_trailer) > 0.01:  # Tolerância para erros de arredondamento
-            log_operacao("ERRO_VALIDACAO", f"Soma dos valores dos registros M ({soma_valores}) não corresponde ao valor no Trailer ({valor_trailer})")
-            raise ValueError(f"Soma dos valores dos registros M ({soma_valores}) não corresponde ao valor no Trailer ({valor_trailer})")
+        self.header = RegistroHeader(mapeado.linha_header)
+        self.trailer = RegistroTrailer(mapeado.linha_trailer)
+        self.movimentos = tabela
+        self.registrar_disposicao(caminho_arquivo, mapeado.terminador)
         
-        log_operacao("CARREGAR_ARQUIVO", f"Arquivo {caminho_arquivo} carregado e validado com sucesso")
+        log_operacao("CARREGAR_ARQUIVO", f"Arquivo {caminho_arquivo} carregado em tabela colunar com {len(tabela)} registros de movimento")
     
     def recalcular_trailer(self):
-        """Recalcula o trailer com base nos registros atuais"""
-        # Atualizar total de registros
+        """Recalcula o trailer do zero, percorrendo todos os registros atuais
+        
+        As alterações feitas pelos métodos do arquivo já mantêm o trailer em dia;
+        a passada completa fica para conferência e para quem altera os registros
+        diretamente.
+        """
+        # Somar em centavos inteiros e conferir os dois campos antes de alterar o trailer
         total_registros = len(self.movimentos)
+        total_centavos = sum(int(mov.valor_venda) for mov in self.movimentos)
+        formatar_numero(total_registros, 5, "Total de registros do trailer")
+        formatar_numero(total_centavos, 9, "Valor total do trailer")
+        self.versao += 1
         self.trailer.set_total_registros(total_registros)
+        self.trailer.set_valor_total_centavos(total_centavos)
+    
+    def conferir_trailer(self):
+        """Confere o trailer contra a soma completa dos registros (modo de depuração)"""
+        total_centavos = sum(int(mov.valor_venda) for mov in self.movimentos)
+        if int(self.trailer.total_registros) != len(self.movimentos):
+            raise ValueError(f"Trailer indica {int(self.trailer.total_registros)} registros, mas há {len(self.movimentos)}")
+        if self.trailer.get_valor_total_centavos() != total_centavos:
+            raise ValueError(f"Trailer indica {self.trailer.get_valor_total_centavos()} centavos, mas a soma é {total_centavos}")
+    
+    def conferir_ajuste(self, variacao_registros: int, variacao_centavos: int):
+        """Recusa, antes de qualquer registro mudar, uma alteração que o trailer não comporta
+        
+        A contagem e o total resultantes precisam caber nos campos do trailer
+        (5 e 9 dígitos, sem sinal); senão ValueError é lançado e nada é alterado.
+        """
+        if not self.trailer:
+            return
+        formatar_numero(len(self.movimentos) + variacao_registros, 5, "Total de registros do trailer")
+        formatar_numero(self.trailer.get_valor_total_centavos() + variacao_centavos, 9, "Valor total do trailer")
+    
+    def ajustar_trailer(self, variacao_centavos: int = 0):
+        """Atualiza o trailer em O(1): contagem pelo tamanho atual e total somando a variação
+        
+        Toda alteração feita pelos métodos do arquivo passa por aqui, então é
+        também onde a versão dos registros avança. A alteração já foi conferida
+        por conferir_ajuste antes de mudar os registros.
+        """
+        self.versao += 1
+        if not self.trailer:
+            return
+        self.trailer.set_total_registros(len(self.movimentos))
+        self.trailer.set_valor_total_centavos(self.trailer.get_valor_total_centavos() + variacao_centavos)
+        if self.verificar_totais:
+            self.conferir_trailer()
+    
+    def alterar_campo(self, indice: int, campo: str, valor: str):
+        """Altera um campo de um registro (já no tamanho do campo), ajustando o trailer se for o valor"""
+        mov = self.movimentos[indice]
+        anterior = str(mov)
+        if campo == 'valor_venda':
+            self.conferir_ajuste(0, int(valor) - int(anterior[33:50]))
+        setattr(mov, campo, valor)
+        self._linha_alterada(indice, anterior)
+    
+    def definir_valor_venda(self, indice: int, valor_centavos: int):
+        """Altera o valor de venda de um registro, ajustando o total do trailer pela diferença"""
+        self.alterar_campo(indice, 'valor_venda', formatar_numero(valor_centavos, 17, "Valor de venda"))
+    
+    def substituir_movimento(self, indice: int, registro):
+        """Substitui o registro da posição informada, ajustando o trailer pela diferença de valor"""
+        anterior = str(self.movimentos[indice])
+        self.conferir_ajuste(0, int(registro.valor_venda) - int(anterior[33:50]))
+        self.movimentos[indice] = registro
+        self._linha_alterada(indice, anterior)
+    
+    def _linha_alterada(self, indice: int, anterior: str):
+        """Registra a troca da linha de um registro no histórico, no diário e no trailer"""
+        nova = str(self.movimentos[indice])
+        if self.historico:
+            self.historico.registrar(('linha', indice, anterior, nova))
+        self.marcar_alterado(indice)
+        self.ajustar_trailer(int(nova[33:50]) - int(anterior[33:50]))
+        self._notificar('linha_alterada', indice, anterior, nova)
+    
+    def inserir_movimento(self, indice: int, registro):
+        """Insere um registro na posição informada, somando seu valor ao trailer"""
+        indice = range(len(self.movimentos) + 1)[indice]
+        self.conferir_ajuste(1, int(registro.valor_venda))
+        self.movimentos.insert(indice, registro)
+        self.disposicao = None
+        if self.historico:
+            self.historico.registrar(('inserir', indice, str(registro)))
+        if self.diario:
+            self.diario.registrar_insercao(indice, str(registro))
+        self.ajustar_trailer(int(registro.valor_venda))
+        self._notificar('inserido', indice, str(registro))
+    
+    def excluir_movimento(self, indice: int):
+        """Exclui o registro da posição informada, descontando seu valor do trailer"""
+        indice = range(len(self.movimentos))[indice]
+        linha = str(self.movimentos[indice])
+        self.conferir_ajuste(-1, -int(linha[33:50]))
+        del self.movimentos[indice]
+        self.disposicao = None
+        if self.historico:
+            self.historico.registrar(('excluir', indice, linha))
+        if self.diario:
+            self.diario.registrar_exclusao(indice)
+        self.ajustar_trailer(-int(linha[33:50]))
+        self._notificar('excluido', indice, linha)
+    
+    def manter_mascara(self, mascara) -> int:
+        """Mantém apenas os registros marcados na máscara (uma posição por registro), em uma passada
+
+        A lista ou a tabela de movimentos é reconstruída de uma vez e o trailer é
+        atualizado descontando apenas os registros removidos. Para desfazer, o
+        histórico guarda só os registros removidos e a máscara compactada.
+        Retorna a quantidade de registros excluídos.
+        """
+        from itertools import compress
+        from diario_operacoes import compactar_mascara
+        
+        mascara = bytes(mascara)
+        if len(mascara) != len(self.movimentos):
+            raise ValueError("A máscara deve ter uma posição para cada registro")
+        excluidos = mascara.translate(bytes.maketrans(b'\x00\x01', b'\x01\x00'))
+        
+        # Na tabela colunar a coluna de valores já está em centavos
+        colunas = getattr(self.movimentos, 'colunas', None)
+        if colunas is not None:
+            centavos_excluidos = sum(compress(colunas['valor_venda'], excluidos))
+        else:
+            centavos_excluidos = sum(int(mov.valor_venda) for mov in compress(self.movimentos, excluidos))
+        self.conferir_ajuste(-excluidos.count(1), -centavos_excluidos)
+        
+        total_original = len(self.movimentos)
+        removidos = None
+        if isinstance(self.movimentos, list):
+            if self.historico and total_original != mascara.count(1):
+                removidos = list(compress(self.movimentos, excluidos))
+            self.movimentos[:] = compress(self.movimentos, mascara)
+        else:
+            if self.historico and total_original != mascara.count(1):
+                removidos = self.movimentos.removidos(mascara)
+            self.movimentos.manter(mascara)
+        
+        if len(self.movimentos) != total_original:
+            self.disposicao = None
+            if removidos is not None:
+                self.historico.registrar(('manter', compactar_mascara(mascara), total_original,
+                                          removidos, centavos_excluidos))
+            if self.diario:
+                self.diario.registrar_mascara(mascara)
+        self.ajustar_trailer(-centavos_excluidos)
+        self._notificar('mascara_mantida', mascara)
+        return total_original - len(self.movimentos)
+    
+    def excluir_adquirente(self, codigo_adquirente: str) -> int:
+        """Exclui os registros do adquirente informado, localizados pelo índice; retorna a quantidade excluída"""
+        indices = self.indices_secundarios.iguais('codigo_adquirente', codigo_adquirente)
+        if not indices:
+            return 0
+        return self.excluir_indices(indices)
+    
+    def manter_indices(self, indices) -> int:
+        """Mantém apenas os registros dos índices informados; retorna a quantidade excluída"""
+        mascara = bytearray(len(self.movimentos))
+        for indice in indices:
+            mascara[indice] = 1
+        return self.manter_mascara(mascara)
+    
+    def excluir_indices(self, indices) -> int:
+        """Exclui os registros dos índices informados; retorna a quantidade excluída"""
+        mascara = bytearray(b'\x01') * len(self.movimentos)
+        for indice in indices:
+            mascara[indice] = 0
+        return self.manter_mascara(mascara)
+    
+    def excluir_onde(self, predicado) -> int:
+        """Exclui os registros para os quais predicado(registro) é verdadeiro; retorna a quantidade excluída"""
+        return self.manter_mascara(bytes(not predicado(mov) for mov in self.movimentos))
+    
+    def _notificar(self, evento: str, *argumentos):
+        """Repassa a alteração recém-feita (já com a versão avançada) a quem acompanha os registros
+        
+        Eventos: linha_alterada(indice, anterior, nova), inserido(indice, linha),
+        excluido(indice, linha), mascara_mantida(mascara) e mascara_restaurada(mascara).
+        """
+        for acompanhante in list(self.acompanhantes):
+            getattr(acompanhante, evento)(*argumentos)
+    
+    def pode_desfazer(self) -> bool:
+        return bool(self.historico) and self.historico.pode_desfazer()
+    
+    def pode_refazer(self) -> bool:
+        return bool(self.historico) and self.historico.pode_refazer()
+    
+    def desfazer(self) -> str:
+        """Desfaz a última alteração e retorna o seu tipo ('linha', 'inserir', 'excluir' ou 'manter')"""
+        alteracao = self.historico.retirar_para_desfazer()
+        self._aplicar_alteracao(alteracao, desfazer=True)
+        if self.diario:
+            self.diario.registrar_desfazer()
+        log_operacao("DESFAZER", f"Alteração '{alteracao[0]}' desfeita")
+        return alteracao[0]
+    
+    def refazer(self) -> str:
+        """Refaz a última alteração desfeita e retorna o seu tipo"""
+        alteracao = self.historico.retirar_para_refazer()
+        self._aplicar_alteracao(alteracao, desfazer=False)
+        if self.diario:
+            self.diario.registrar_refazer()
+        log_operacao("REFAZER", f"Alteração '{alteracao[0]}' refeita")
+        return alteracao[0]
+    
+    def _aplicar_alteracao(self, alteracao: tuple, desfazer: bool):
+        """Aplica uma alteração do histórico no sentido pedido, sem anotá-la de novo
+        
+        O histórico e o diário ficam desligados enquanto a alteração é aplicada;
+        o diário recebe só a marca de desfazer/refazer, que basta para reproduzir
+        a sessão na recuperação.
+        """
+        from diario_operacoes import expandir_mascara
+        
+        historico, diario = self.historico, self.diario
+        self.historico = self.diario = None
+        try:
+            tipo = alteracao[0]
+            if tipo == 'linha':
+                _, indice, anterior, nova = alteracao
+                self.substituir_movimento(indice, RegistroMovimento(anterior if desfazer else nova))
+            elif tipo in ('inserir', 'excluir'):
+                _, indice, linha = alteracao
+                # Desfazer uma inclusão é excluir e desfazer uma exclusão é incluir
+                if (tipo == 'inserir') != desfazer:
+                    self.inserir_movimento(indice, RegistroMovimento(linha))
+                else:
+                    self.excluir_movimento(indice)
+            else:
+                _, mascara, total, removidos, centavos_removidos = alteracao
+                mascara = expandir_mascara(mascara, total)
+                if not desfazer:
+                    self.manter_mascara(mascara)
+                else:
+                    self.conferir_ajuste(total - len(self.movimentos), centavos_removidos)
+                    self._restaurar_mascara(mascara, removidos)
+                    self.disposicao = None
+                    self.ajustar_trailer(centavos_removidos)
+                    self._notificar('mascara_restaurada', mascara)
+        finally:
+            self.historico, self.diario = historico, diario
+    
+    def _restaurar_mascara(self, mascara: bytes, removidos):
+        """Reintercala os registros removidos por manter_mascara nas posições de origem
+        
+        Cada posição da máscara indica de onde vem o próximo registro: dos
+        mantidos (1) ou dos removidos (0). A intercalação é feita por iteradores,
+        em uma passada e sem laço Python por registro.
+        """
+        if isinstance(self.movimentos, list):
+            origens = (iter(removidos), iter(self.movimentos))
+            self.movimentos[:] = list(map(next, map(origens.__getitem__, mascara)))
+        else:
+            self.movimentos.restaurar(mascara, removidos)
+    
+    def registrar_disposicao(self, caminho: str, terminador: bytes):
+        """Guarda como os registros estão dispostos no arquivo em disco
+        
+        Cada registro ocupa um quadro de 91 bytes mais a quebra de linha, na
+        ordem header, movimentos e trailer. Enquanto a ordem e a quantidade de
+        registros não mudam, uma alteração corresponde a uma posição fixa no arquivo.
+        """
+        estado = os.stat(caminho)
+        self.disposicao = {
+            'caminho': os.path.abspath(caminho),
+            'terminador': terminador,
+            'tamanho_quadro': TAMANHO_REGISTRO + len(terminador),
+            'total': len(self.movimentos),
+            'assinatura': (estado.st_size, estado.st_mtime_ns),
+        }
+        self.alterados.clear()
+    
+    def marcar_alterado(self, indice: int):
+        """Marca o registro como alterado para o salvamento incremental e o anota no diário"""
+        self.alterados.add(indice)
+        if self.diario:
+            self.diario.registrar_linha(indice, str(self.movimentos[indice]))
+    
+    def iniciar_diario(self, sincronizar: bool = False):
+        """Passa a anotar as alterações em um diário ao lado do arquivo, para recuperação após queda"""
+        from diario_operacoes import DiarioOperacoes, caminho_diario
+        
+        self.encerrar_diario(descartar=False)
+        self.diario = DiarioOperacoes(caminho_diario(self.caminho_arquivo), sincronizar)
+        self.diario.iniciar(self.caminho_arquivo)
+    
+    def operacoes_pendentes(self):
+        """Operações de uma sessão anterior não salva, ou None se não há diário válido para o arquivo"""
+        from diario_operacoes import DiarioOperacoes, caminho_diario
         
-        # Atualizar valor total
-        valor_total = sum(mov.get_valor_decimal() for mov in self.movimentos)
-        self.trailer.set_valor_total_decimal(valor_total)
+        if not self.caminho_arquivo:
+            return None
+        return DiarioOperacoes(caminho_diario(self.caminho_arquivo)).operacoes(self.caminho_arquivo)
     
-    def salvar_arquivo(self, caminho_arquivo: str = None):
-        """Salva o arquivo de movimentação"""
+    def recuperar_diario(self, sincronizar: bool = False) -> int:
+        """Reaplica as operações do diário de uma sessão anterior e continua anotando nele
+        
+        Retorna a quantidade de operações reaplicadas; sem diário válido, inicia um
+        diário novo e retorna 0. Marcas de desfazer/refazer sem alteração
+        correspondente no histórico (de diários gravados antes de o salvamento
+        esvaziar o histórico) são ignoradas e registradas no log, em vez de
+        interromper a recuperação.
+        """
+        from diario_operacoes import (DiarioOperacoes, caminho_diario, OP_LINHA, OP_INSERIR, OP_EXCLUIR,
+                                      OP_MANTER, OP_DESFAZER)
+        
+        operacoes = self.operacoes_pendentes()
+        if not operacoes:
+            self.iniciar_diario(sincronizar)
+            return 0
+        
+        self.encerrar_diario(descartar=False)
+        ignoradas = 0
+        for operacao, *argumentos in operacoes:
+            if operacao == OP_LINHA:
+                self.substituir_movimento(argumentos[0], RegistroMovimento(argumentos[1]))
+            elif operacao == OP_INSERIR:
+                self.inserir_movimento(argumentos[0], RegistroMovimento(argumentos[1]))
+            elif operacao == OP_EXCLUIR:
+                self.excluir_movimento(argumentos[0])
+            elif operacao == OP_MANTER:
+                self.manter_mascara(argumentos[0])
+            elif operacao == OP_DESFAZER:
+                if self.pode_desfazer():
+                    self.desfazer()
+                else:
+                    ignoradas += 1
+            elif self.pode_refazer():
+                self.refazer()
+            else:
+                ignoradas += 1
+        
+        self.diario = DiarioOperacoes(caminho_diario(self.caminho_arquivo), sincronizar)
+        self.diario.continuar()
+        if ignoradas:
+            log_operacao("RECUPERAR_SESSAO", f"{ignoradas} marca(s) de desfazer/refazer sem alteração correspondente ignorada(s)")
+        log_operacao("RECUPERAR_SESSAO", f"{len(operacoes) - ignoradas} operação(ões) reaplicada(s) a partir do diário")
+        return len(operacoes) - ignoradas
+    
+    def encerrar_diario(self, descartar: bool = True):
+        """Para de anotar no diário; com descartar=True o diário é apagado"""
+        if self.diario:
+            if descartar:
+                self.diario.descartar()
+            else:
+                self.diario.fechar()
+            self.diario = None
+    
+    def pode_salvar_incremental(self, caminho: str) -> bool:
+        """Indica se o arquivo em disco ainda tem a disposição conhecida e pode ser remendado"""
+        disposicao = self.disposicao
+        if disposicao is None or disposicao['total'] != len(self.movimentos):
+            return False
+        if os.path.abspath(caminho) != disposicao['caminho'] or not os.path.exists(caminho):
+            return False
+        estado = os.stat(caminho)
+        return (estado.st_size, estado.st_mtime_ns) == disposicao['assinatura']
+    
+    def salvar_incremental(self, duravel: bool = True):
+        """Regrava no próprio arquivo apenas os quadros dos registros alterados e o trailer
+        
+        O custo de E/S é proporcional à quantidade de registros alterados, não ao
+        tamanho do arquivo. Não é atômico: uma queda no meio da gravação deixa
+        quadros e trailer inconsistentes, e a data de modificação do arquivo muda,
+        o que invalida o diário da sessão. Por isso só é usado quando pedido
+        (salvar_arquivo(incremental=True)); o salvamento do menu é o atômico.
+        """
+        disposicao = self.disposicao
+        tamanho_quadro = disposicao['tamanho_quadro']
+        terminador = disposicao['terminador']
+        quadros = [(indice + 1, self.movimentos[indice]) for indice in sorted(self.alterados)]
+        quadros.append((len(self.movimentos) + 1, self.trailer))
+        
+        with open(disposicao['caminho'], 'r+b') as f:
+            for quadro, registro in quadros:
+                dados = str(registro).encode('utf-8') + terminador
+                if len(dados) != tamanho_quadro:
+                    raise ValueError(f"Registro na linha {quadro + 1} deveria ter 91 caracteres")
+                if hasattr(os, 'pwrite'):
+                    os.pwrite(f.fileno(), dados, quadro * tamanho_quadro)
+                else:
+                    f.seek(quadro * tamanho_quadro)
+                    f.write(dados)
+            f.flush()
+            if duravel:
+                os.fsync(f.fileno())
+        
+        estado = os.stat(disposicao['caminho'])
+        disposicao['assinatura'] = (estado.st_size, estado.st_mtime_ns)
+        log_operacao("SALVAR_ARQUIVO", f"{len(quadros) - 1} registro(s) e trailer regravados em {disposicao['caminho']}")
+        self.alterados.clear()
+    
+    def _reiniciar_diario(self, caminho: str) -> bool:
+        """Depois de salvar sobre o arquivo original, o diário recomeça a partir da nova versão
+        
+        O histórico de desfazer/refazer é esvaziado junto: as alterações dele já
+        estão no arquivo salvo, e uma marca de desfazer no diário novo não teria
+        a alteração correspondente para reaplicar na recuperação. Retorna True se
+        havia histórico e ele foi descartado.
+        """
+        if self.diario and self.caminho_arquivo and os.path.abspath(caminho) == os.path.abspath(self.caminho_arquivo):
+            self.diario.iniciar(caminho)
+            if self.pode_desfazer() or self.pode_refazer():
+                self.historico.limpar()
+                log_operacao("SALVAR_ARQUIVO", "Histórico de desfazer/refazer descartado ao salvar")
+                return True
+        return False
+    
+    def serializar(self):
+        """Produz o conteúdo do arquivo (header, movimentos e trailer) em blocos de bytes
+        
+        Os armazenamentos mapeado e colunar geram os próprios blocos; na lista, as
+        linhas já guardadas nos registros são juntadas em blocos de
+        REGISTROS_POR_BLOCO, sem uma escrita por registro.
+        """
+        from leitor_movimentacao import REGISTROS_POR_BLOCO
+        
+        yield (str(self.header) + '\n').encode('utf-8')
+        serializar = getattr(self.movimentos, 'serializar', None)
+        if serializar is not None:
+            yield from serializar()
+        else:
+            for inicio in range(0, len(self.movimentos), REGISTROS_POR_BLOCO):
+                linhas = map(str, self.movimentos[inicio:inicio + REGISTROS_POR_BLOCO])
+                yield ('\n'.join(linhas) + '\n').encode('utf-8')
+        yield (str(self.trailer) + '\n').encode('utf-8')
+    
+    def salvar_arquivo(self, caminho_arquivo: str = None, duravel: bool = True, incremental: bool = False):
+        """Salva o arquivo de movimentação de forma atômica
+        
+        O conteúdo é gravado em um arquivo temporário no mesmo diretório, que só
+        substitui o destino (por os.replace) depois de completo: uma falha no meio
+        do salvamento deixa o arquivo anterior intacto. Com duravel=True o
+        temporário é sincronizado com o disco (fsync) antes da troca e o diretório
+        depois dela, de modo que a troca sobrevive a uma queda do sistema.
+        
+        Com incremental=True, se o arquivo em disco ainda tem a disposição com que
+        foi carregado (nenhuma inclusão ou exclusão desde então), só os registros
+        alterados e o trailer são regravados no lugar, sem a garantia de atomicidade
+        (ver salvar_incremental); senão o arquivo é reescrito.
+        
+        Retorna True se o histórico de desfazer/refazer foi descartado junto com
+        o diário (salvamento sobre o original com diário ativo).
+        """
+        import tempfile
+        
         caminho = caminho_arquivo if caminho_arquivo else self.caminho_arquivo
+        if incremental and self.pode_salvar_incremental(caminho):
+            self.salvar_incremental(duravel)
+            return self._reiniciar_diario(caminho)
         log_operacao("SALVAR_ARQUIVO", f"Iniciando salvamento do arquivo em {caminho}")
         
-        with open(caminho, 'w', encoding='utf-8') as f:
-            f.write(str(self.header) + '\n')
-            for movimento in self.movimentos:
-                f.write(str(movimento) + '\n')
-            f.write(str(self.trailer) + '\n')
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        descritor, temporario = tempfile.mkstemp(prefix=os.path.basename(caminho) + '.', suffix='.tmp', dir=diretorio)
+        try:
+            with os.fdopen(descritor, 'wb') as f:
+                for bloco in self.serializar():
+                    f.write(bloco)
+                f.flush()
+                if duravel:
+                    os.fsync(f.fileno())
+            # mkstemp cria o arquivo só para o dono: manter as permissões do original
+            # ou, para um arquivo novo, as permissões padrão (respeitando a umask)
+            if os.path.exists(caminho):
+                os.chmod(temporario, os.stat(caminho).st_mode & 0o7777)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temporario, 0o666 & ~umask)
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+            raise
+        
+        if duravel and os.name == 'posix':
+            descritor_diretorio = os.open(diretorio, os.O_RDONLY)
+            try:
+                os.fsync(descritor_diretorio)
+            finally:
+                os.close(descritor_diretorio)
+        self.registrar_disposicao(caminho, b'\n')
+        historico_descartado = self._reiniciar_diario(caminho)
         
         log_operacao("SALVAR_ARQUIVO", f"Arquivo salvo com sucesso em {caminho}")
+        return historico_descartado
     
     def exibir_conteudo(self):
         """Exibe o conteúdo do arquivo como planilha"""
@@ -262,9 +690,11 @@ def salvar_arquivo_como(arquivo: ArquivoMovimentacao):
     novo_nome = input("Digite o novo nome do arquivo: ")
     if novo_nome:
         try:
-            arquivo.salvar_arquivo(novo_nome)
+            historico_descartado = arquivo.salvar_arquivo(novo_nome)
             log_operacao("SALVAR_COMO", f"Arquivo salvo como '{novo_nome}' com sucesso")
             print(f"\nArquivo salvo como '{novo_nome}' com sucesso.")
+            if historico_descartado:
+                print(AVISO_HISTORICO_DESCARTADO)
             input("Pressione Enter para continuar...")
         except Exception as e:
             log_operacao("ERRO_SALVAR_COMO", f"Erro ao salvar arquivo como '{novo_nome}': {e}")
@@ -274,9 +704,11 @@ def salvar_arquivo_como(arquivo: ArquivoMovimentacao):
 def salvar_arquivo(arquivo: ArquivoMovimentacao):
     """Salva o arquivo usando o caminho já definido"""
     try:
-        arquivo.salvar_arquivo()
+        historico_descartado = arquivo.salvar_arquivo()
         log_operacao("SALVAR_ARQUIVO", f"Arquivo salvo com sucesso em '{arquivo.caminho_arquivo}'")
         print("\nArquivo salvo com sucesso.")
+        if historico_descartado:
+            print(AVISO_HISTORICO_DESCARTADO)
         input("Pressione Enter para continuar...")
     except Exception as e:
         log_operacao("ERRO_SALVAR", f"Erro ao salvar arquivo: {e}")
@@ -303,61 +735,65 @@ def editar_movimento(arquivo: ArquivoMovimentacao, indice: int):
         opcao = input("\nSelecione o campo para editar (1-9) ou 0 para cancelar: ")
         
         campo_editado = None
-        if opcao == '1':
-            novo_valor = input(f"Novo Código Adquirente ({mov.codigo_adquirente}): ")
-            if novo_valor:
-                mov.codigo_adquirente = novo_valor.ljust(2)[:2]
-                campo_editado = "Código Adquirente"
-        elif opcao == '2':
-            novo_valor = input(f"Nova Data Movimento ({mov.data_movimento}): ")
-            if novo_valor:
-                mov.data_movimento = novo_valor.ljust(8)[:8]
-                campo_editado = "Data Movimento"
-        elif opcao == '3':
-            novo_valor = input(f"Novo Número Cartão ({mov.numero_cartao.strip()}): ")
-            if novo_valor:
-                mov.numero_cartao = novo_valor.ljust(20)[:20]
-                campo_editado = "Número Cartão"
-        elif opcao == '4':
-            novo_valor = input(f"Novas Parcelas ({mov.parcelas}): ")
-            if novo_valor:
-                mov.parcelas = novo_valor.zfill(2)[:2]
-                campo_editado = "Parcelas"
-        elif opcao == '5':
-            novo_valor = input(f"Novo Valor Venda ({mov.get_valor_decimal():.2f}): ")
-            if novo_valor:
-                try:
-                    valor_float = float(novo_valor)
-                    mov.set_valor_decimal(valor_float)
-                    campo_editado = "Valor Venda"
-                except ValueError:
-                    print("Valor inválido.")
-                    log_operacao("ERRO_EDICAO", f"Valor inválido informado para Valor Venda: {novo_valor}")
-        elif opcao == '6':
-            novo_valor = input(f"Nova Data Venda ({mov.data_venda}): ")
-            if novo_valor:
-                mov.data_venda = novo_valor.ljust(8)[:8]
-                campo_editado = "Data Venda"
-        elif opcao == '7':
-            novo_valor = input(f"Novo CVNSU ({mov.cvnsu}): ")
-            if novo_valor:
-                mov.cvnsu = novo_valor.ljust(15)[:15]
-                campo_editado = "CVNSU"
-        elif opcao == '8':
-            novo_valor = input(f"Novo CPF/CNPJ ({mov.cpf_cnpj.strip()}): ")
-            if novo_valor:
-                mov.cpf_cnpj = novo_valor.ljust(14)[:14]
-                campo_editado = "CPF/CNPJ"
-        elif opcao == '9':
-            novo_valor = input(f"Novo Número Pedido ({mov.numero_pedido.strip()}): ")
-            if novo_valor:
-                mov.numero_pedido = novo_valor.ljust(10)[:10]
-                campo_editado = "Número Pedido"
-        
-        # Recalcular trailer após edição
-        arquivo.recalcular_trailer()
+        try:
+            if opcao == '1':
+                novo_valor = input(f"Novo Código Adquirente ({mov.codigo_adquirente}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'codigo_adquirente', novo_valor.ljust(2)[:2])
+                    campo_editado = "Código Adquirente"
+            elif opcao == '2':
+                novo_valor = input(f"Nova Data Movimento ({mov.data_movimento}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'data_movimento', novo_valor.ljust(8)[:8])
+                    campo_editado = "Data Movimento"
+            elif opcao == '3':
+                novo_valor = input(f"Novo Número Cartão ({mov.numero_cartao.strip()}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'numero_cartao', novo_valor.ljust(20)[:20])
+                    campo_editado = "Número Cartão"
+            elif opcao == '4':
+                novo_valor = input(f"Novas Parcelas ({mov.parcelas}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'parcelas', novo_valor.zfill(2)[:2])
+                    campo_editado = "Parcelas"
+            elif opcao == '5':
+                novo_valor = input(f"Novo Valor Venda ({mov.get_valor_decimal():.2f}): ")
+                if novo_valor:
+                    try:
+                        arquivo.definir_valor_venda(indice, para_centavos(novo_valor))
+                        campo_editado = "Valor Venda"
+                    except ValueError:
+                        print("Valor inválido.")
+                        log_operacao("ERRO_EDICAO", f"Valor inválido informado para Valor Venda: {novo_valor}")
+            elif opcao == '6':
+                novo_valor = input(f"Nova Data Venda ({mov.data_venda}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'data_venda', novo_valor.ljust(8)[:8])
+                    campo_editado = "Data Venda"
+            elif opcao == '7':
+                novo_valor = input(f"Novo CVNSU ({mov.cvnsu}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'cvnsu', novo_valor.ljust(9)[:9])
+                    campo_editado = "CVNSU"
+            elif opcao == '8':
+                novo_valor = input(f"Novo CPF/CNPJ ({mov.cpf_cnpj.strip()}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'cpf_cnpj', novo_valor.ljust(15)[:15])
+                    campo_editado = "CPF/CNPJ"
+            elif opcao == '9':
+                novo_valor = input(f"Novo Número Pedido ({mov.numero_pedido.strip()}): ")
+                if novo_valor:
+                    arquivo.alterar_campo(indice, 'numero_pedido', novo_valor.ljust(7)[:7])
+                    campo_editado = "Número Pedido"
+        except ValueError as e:
+            # Texto que não pode ser gravado no arquivo é recusado antes de alterar o registro
+            print(f"Valor inválido: {e}")
+            log_operacao("ERRO_EDICAO", f"Registro {indice + 1}: {e}")
+            return
+        
+        # O trailer, o histórico e o diário já foram atualizados pela alteração
         if campo_editado:
-            log_operacao("EDITAR_REGISTRO", f"Registro {indice + 1} - Campo '{campo_editado}' modificado. Trailer recalculado.")
+            log_operacao("EDITAR_REGISTRO", f"Registro {indice + 1} - Campo '{campo_editado}' modificado. Trailer atualizado.")
         print("\nRegistro atualizado e trailer recalculado.")
     else:
         print("Índice inválido.")
@@ -366,8 +802,7 @@ def deletar_movimento(arquivo: ArquivoMovimentacao, indice: int):
     """Deleta um registro de movimento"""
     if 0 <= indice < len(arquivo.movimentos):
         log_operacao("DELETAR_REGISTRO", f"Deletando registro {indice + 1}")
-        del arquivo.movimentos[indice]
-        arquivo.recalcular_trailer()
+        arquivo.excluir_movimento(indice)
         log_operacao("DELETAR_REGISTRO", f"Registro {indice + 1} deletado e trailer recalculado")
         print("\nRegistro deletado e trailer recalculado.")
     else:
@@ -376,18 +811,8 @@ def deletar_movimento(arquivo: ArquivoMovimentacao, indice: int):
 
 def excluir_por_adquirente(arquivo: ArquivoMovimentacao, codigo_adquirente: str):
     """Exclui registros por código de adquirente"""
-    total_registros_original = len(arquivo.movimentos)
-    registros_excluidos = 0
-    
-    # Percorrer de trás para frente para evitar problemas com índices
-    for i in range(len(arquivo.movimentos) - 1, -1, -1):
-        if arquivo.movimentos[i].codigo_adquirente == codigo_adquirente:
-            log_operacao("EXCLUIR_POR_ADQUIRENTE", f"Excluindo registro {i} do adquirente {codigo_adquirente}")
-            del arquivo.movimentos[i]
-            registros_excluidos += 1
-    
-    # Recalcular trailer
-    arquivo.recalcular_trailer()
+    # Exclusão em uma passada, com o trailer atualizado pelos registros removidos
+    registros_excluidos = arquivo.excluir_adquirente(codigo_adquirente)
     
     log_operacao("EXCLUIR_POR_ADQUIRENTE", f"{registros_excluidos} registro(s) excluído(s) para o adquirente {codigo_adquirente} e trailer recalculado")
     print(f"\n{registros_excluidos} registro(s) excluído(s) para o adquirente {codigo_adquirente} e trailer recalculado.")
@@ -435,16 +860,8 @@ def escolher_registros(arquivo: ArquivoMovimentacao):
             print("\nOperação cancelada.")
             return
         
-        # Remover registros que NÃO estão na lista de índices a manter
-        registros_excluidos = 0
-        for i in range(len(arquivo.movimentos) - 1, -1, -1):
-            if i not in indices_manter:
-                log_operacao("ESCOLHER_REGISTROS", f"Excluindo registro {i} (não selecionado)")
-                del arquivo.movimentos[i]
-                registros_excluidos += 1
-        
-        # Recalcular trailer
-        arquivo.recalcular_trailer()
+        # Remover registros que NÃO estão na lista de índices a manter (trailer atualizado junto)
+        registros_excluidos = arquivo.manter_indices(indices_manter)
         
         tempo_total = time.time() - inicio
         log_operacao("ESCOLHER_REGISTROS", f"{len(indices_manter)} registro(s) mantido(s), {registros_excluidos} excluído(s), tempo: {tempo_total:.2f}s")
@@ -456,170 +873,202 @@ def escolher_registros(arquivo: ArquivoMovimentacao):
         print(f"\nErro ao processar índices: {e}")
         log_operacao("ESCOLHER_REGISTROS", f"Erro ao processar índices: {e}")
 
-def selecionar_por_valor(arquivo: ArquivoMovimentacao, valor_desejado: float):
-    """Seleciona registros cuja soma dos valores seja EXATAMENTE igual ao valor desejado"""
+def selecionar_por_valor(arquivo: ArquivoMovimentacao, valor_desejado,
+                         criterio: str = None, adquirente_preferido: str = None,
+                         tempo_limite: float = None, backend: str = 'processo'):
+    """Seleciona registros cuja soma dos valores seja EXATAMENTE igual ao valor desejado
+
+    O valor desejado, em reais, pode ser número, Decimal ou texto ('19,99'); é
+    convertido para centavos e toda a busca é feita com inteiros.
+
+    Sem critério, a busca roda em segundo plano com orçamento de tempo e pode ser
+    cancelada com Enter; sem combinação exata, é oferecida a melhor aproximação.
+    O backend 'processo' usa um processo filho e 'paralelo' divide a busca entre
+    dois processos. Com um critério de conciliacao.CRITERIOS, mantém a melhor
+    combinação segundo ele.
+    """
     import time
-    from itertools import combinations
+    from conciliacao import melhores_subconjuntos, custos_por_criterio
+    from busca_segundo_plano import BuscaEmSegundoPlano, enter_pressionado, TEMPO_LIMITE_BUSCA
     
     inicio = time.time()
-    log_operacao("SELECAO_POR_VALOR", f"Iniciando seleção por valor exato: {valor_desejado:.2f}")
-    print("\nProcessando seleção por valor exato. Isso pode levar alguns segundos...")
-    
-    # Converter registros para lista de (índice, valor)
-    registros_com_valores = [(i, mov.get_valor_decimal()) for i, mov in enumerate(arquivo.movimentos)]
-    
-    # Definir uma tolerância extremamente baixa para garantir valores exatos
-    TOLERANCIA = 0.001  # Tolerância de 0.001 para evitar problemas de precisão com números de ponto flutuante
-    
-    # Implementar algoritmo de busca binária para encontrar combinação exata
-    def encontrar_combinacao_exata(registros, valor_alvo, tolerancia=TOLERANCIA):
-        # Ordenar registros por valor (decrescente) para otimizar a busca
-        registros_ordenados = sorted(registros, key=lambda x: x[1], reverse=True)
-        total_registros = len(registros_ordenados)
-        
-        # Usar programação dinâmica para encontrar combinações exatas
-        # Abordagem baseada no problema da mochila (knapsack)
-        def buscar_combinacao_dp(idx_atual, valor_restante, combinacao_atual, memo={}):
-            # Chave para memorização
-            chave = (idx_atual, round(valor_restante, 4))
-            
-            # Se já calculamos esta combinação antes, retornar resultado memorizado
-            if chave in memo:
-                return memo[chave]
-            
-            # Se encontramos uma combinação exata (usando tolerância mínima)
-            if abs(valor_restante) < tolerancia:
-                return combinacao_atual
-            
-            # Se chegamos ao final dos registros ou valor restante é negativo
-            if idx_atual >= total_registros or valor_restante < -tolerancia:
-                return None
-            
-            # Tentar incluir o registro atual
-            idx, valor = registros_ordenados[idx_atual]
-            combinacao_com = buscar_combinacao_dp(
-                idx_atual + 1, 
-                valor_restante - valor, 
-                combinacao_atual + [(idx, valor)],
-                memo
-            )
-            
-            # Se encontramos uma combinação válida incluindo o registro atual
-            if combinacao_com:
-                memo[chave] = combinacao_com
-                return combinacao_com
-            
-            # Tentar sem incluir o registro atual
-            combinacao_sem = buscar_combinacao_dp(
-                idx_atual + 1, 
-                valor_restante, 
-                combinacao_atual,
-                memo
-            )
-            
-            memo[chave] = combinacao_sem
-            return combinacao_sem
-        
-        # Iniciar busca com programação dinâmica
-        return buscar_combinacao_dp(0, valor_alvo, [])
-    
-    # Tentar encontrar uma combinação exata
-    print("Buscando combinação exata de registros...")
-    combinacao_exata = encontrar_combinacao_exata(registros_com_valores, valor_desejado)
-    
-    # Se não encontramos uma combinação exata com programação dinâmica,
-    # tentar com força bruta para combinações pequenas
-    if not combinacao_exata and len(registros_com_valores) <= 30:
-        print("Tentando busca exaustiva para combinações menores...")
-        for r in range(1, min(len(registros_com_valores) + 1, 11)):  # Limitar para evitar explosão combinatória
-            for combinacao in combinations(registros_com_valores, r):
-                soma = sum(valor for _, valor in combinacao)
-                if abs(soma - valor_desejado) < TOLERANCIA:  # Usando tolerância mínima para garantir exatidão
-                    combinacao_exata = combinacao
-                    break
-            if combinacao_exata:
-                break
+    # Trabalhar em centavos inteiros para que a comparação seja exata
+    alvo_centavos = para_centavos(valor_desejado)
+    log_operacao("SELECAO_POR_VALOR", f"Iniciando seleção por valor exato: {formatar_centavos(alvo_centavos)}")
+    print("\nProcessando seleção por valor exato...")
+    valores_centavos = [int(mov.valor_venda) for mov in arquivo.movimentos]
     
-    # Se ainda não encontramos uma combinação exata, tentar com algoritmo guloso otimizado
-    if not combinacao_exata and len(registros_com_valores) > 30:
-        print("Tentando algoritmo guloso otimizado...")
+    if criterio:
+        print("Buscando a melhor combinação exata de registros...")
+        try:
+            custos = custos_por_criterio(arquivo.movimentos, criterio, adquirente_preferido)
+            melhores = melhores_subconjuntos(valores_centavos, alvo_centavos, 1, custos)
+        except ValueError as e:
+            log_operacao("SELECAO_POR_VALOR", f"Busca interrompida: {e}")
+            print(f"\n{e}.")
+            print("Por favor, filtre os registros antes ou use a opção de edição manual.")
+            return
+        resultado = {'indices': melhores[0] if melhores else None, 'soma': alvo_centavos,
+                     'exato': bool(melhores), 'interrompida': False, 'completa': True}
+    else:
+        print("Buscando combinação exata de registros (Enter interrompe e usa a melhor aproximação)...")
         
-        # Ordenar registros por valor
-        registros_ordenados = sorted(registros_com_valores, key=lambda x: x[1])
+        def mostrar_progresso(explorados, diferenca):
+            print(f"\r  Explorados: {explorados} | Melhor diferença: R$ {formatar_centavos(diferenca)}   ",
+                  end='', flush=True)
         
-        # Usar algoritmo guloso com backtracking limitado
-        def busca_gulosa_com_backtracking(registros, valor_alvo):
-            melhor_combinacao = None
-            menor_diferenca = float('inf')
-            
-            # Função recursiva para busca com backtracking
-            def backtrack(idx, combinacao_atual, soma_atual):
-                nonlocal melhor_combinacao, menor_diferenca
-                
-                # Verificar se encontramos uma combinação exata
-                diferenca = abs(soma_atual - valor_alvo)
-                if diferenca < menor_diferenca:
-                    menor_diferenca = diferenca
-                    melhor_combinacao = combinacao_atual.copy()
-                
-                # Se encontramos uma combinação exata, podemos parar
-                if diferenca < TOLERANCIA:
-                    return True
-                
-                # Se chegamos ao final dos registros
-                if idx >= len(registros):
-                    return False
-                
-                # Tentar incluir o registro atual
-                if soma_atual + registros[idx][1] <= valor_alvo * (1 + TOLERANCIA/10):  # Tolerância ainda mais restrita
-                    combinacao_atual.append(registros[idx])
-                    if backtrack(idx + 1, combinacao_atual, soma_atual + registros[idx][1]):
-                        return True
-                    combinacao_atual.pop()
-                
-                # Tentar sem incluir o registro atual
-                return backtrack(idx + 1, combinacao_atual, soma_atual)
-            
-            # Iniciar backtracking
-            backtrack(0, [], 0.0)
-            
-            # Só retornar se for uma combinação exata
-            if menor_diferenca < TOLERANCIA:
-                return melhor_combinacao
-            return None
-        
-        combinacao_exata = busca_gulosa_com_backtracking(registros_ordenados, valor_desejado)
+        if backend == 'paralelo':
+            from busca_paralela import buscar_em_paralelo
+            resultado = buscar_em_paralelo(valores_centavos, alvo_centavos, tempo_limite=tempo_limite or TEMPO_LIMITE_BUSCA,
+                                           ao_progresso=mostrar_progresso, deve_cancelar=enter_pressionado)
+        else:
+            busca = BuscaEmSegundoPlano(valores_centavos, alvo_centavos, tempo_limite or TEMPO_LIMITE_BUSCA)
+            resultado = busca.executar(ao_progresso=mostrar_progresso, deve_cancelar=enter_pressionado)
+        print()
+        if resultado['indices'] is None:
+            log_operacao("SELECAO_POR_VALOR", f"Busca interrompida: {resultado.get('erro')}")
+            print(f"\n{resultado.get('erro')}.")
+            return
     
     # Se não encontramos uma combinação exata
-    if not combinacao_exata:
-        log_operacao("SELECAO_POR_VALOR", "Nenhuma combinação exata encontrada")
-        print("\nNenhuma combinação de registros encontrada que some EXATAMENTE o valor desejado.")
-        print("Por favor, tente outro valor ou use a opção de edição manual.")
-        return
+    if not resultado['exato']:
+        if resultado['interrompida']:
+            log_operacao("SELECAO_POR_VALOR", "Busca interrompida sem combinação exata")
+            print("\nBusca interrompida antes de encontrar uma combinação exata.")
+        elif not resultado['completa']:
+            # Sem método exaustivo que caiba no limite de memória: não se sabe se a combinação exata existe
+            log_operacao("SELECAO_POR_VALOR", "Busca exata não realizada (limite de memória), apenas aproximação")
+            print("\nBusca exata não realizada (excede o limite de memória): apenas aproximação.")
+        else:
+            log_operacao("SELECAO_POR_VALOR", "Nenhuma combinação exata encontrada")
+            print("\nNenhuma combinação de registros encontrada que some EXATAMENTE o valor desejado.")
+        if not resultado['indices']:
+            print("Por favor, tente outro valor ou use a opção de edição manual.")
+            return
+        
+        diferenca = formatar_centavos(alvo_centavos - resultado['soma'])
+        print(f"Melhor aproximação: {len(resultado['indices'])} registro(s), "
+              f"soma R$ {formatar_centavos(resultado['soma'])} (diferença de R$ {diferenca})")
+        if input("Manter a combinação aproximada? (S/N): ").upper() != 'S':
+            print("\nOperação cancelada.")
+            return
+        log_operacao("SELECAO_POR_VALOR", f"Mantendo aproximação com diferença de {diferenca}")
     
     # Obter índices dos registros selecionados
-    indices_selecionados = {indice for indice, _ in combinacao_exata}
-    soma_selecionada = sum(valor for _, valor in combinacao_exata)
+    indices_selecionados = set(resultado['indices'])
+    soma_selecionada = formatar_centavos(sum(valores_centavos[i] for i in indices_selecionados))
     
     # Remover registros que NÃO estão na combinação selecionada
-    registros_excluidos = 0
-    for i in range(len(arquivo.movimentos) - 1, -1, -1):
-        if i not in indices_selecionados:
-            log_operacao("SELECAO_POR_VALOR", f"Excluindo registro {i} (não selecionado)")
-            del arquivo.movimentos[i]
-            registros_excluidos += 1
-    
-    # Recalcular trailer
-    arquivo.recalcular_trailer()
+    registros_excluidos = arquivo.manter_indices(indices_selecionados)
     
     tempo_total = time.time() - inicio
-    log_operacao("SELECAO_POR_VALOR", f"{len(indices_selecionados)} registro(s) mantido(s), {registros_excluidos} excluído(s), soma: {soma_selecionada:.2f}, tempo: {tempo_total:.2f}s")
+    log_operacao("SELECAO_POR_VALOR", f"{len(indices_selecionados)} registro(s) mantido(s), {registros_excluidos} excluído(s), soma: {soma_selecionada}, tempo: {tempo_total:.2f}s")
     print(f"\n{len(indices_selecionados)} registro(s) mantido(s), {registros_excluidos} excluído(s).")
-    print(f"Soma dos registros selecionados: R$ {soma_selecionada:.2f}")
-    print(f"Valor desejado: R$ {valor_desejado:.2f}")
-    print(f"Diferença: R$ {abs(soma_selecionada - valor_desejado):.5f}")  # Mostrar mais casas decimais para verificar a precisão
+    print(f"Soma dos registros selecionados: R$ {soma_selecionada}")
+    print(f"Valor desejado: R$ {formatar_centavos(alvo_centavos)}")
     print(f"Tempo de processamento: {tempo_total:.2f} segundos")
 
+def listar_combinacoes_por_valor(arquivo: ArquivoMovimentacao, valor_desejado, quantidade: int = 5,
+                                 criterio: str = 'menos_registros', adquirente_preferido: str = None):
+    """Lista até `quantidade` combinações que somam exatamente o valor, exibindo cada uma ao ser encontrada
+
+    As combinações saem de um gerador, então a primeira aparece assim que é
+    encontrada; ao final são reordenadas pelo critério. Retorna a lista de
+    combinações (listas de índices), da melhor para a pior.
+    """
+    from conciliacao import enumerar_subconjuntos, custos_por_criterio
+    
+    alvo_centavos = para_centavos(valor_desejado)
+    log_operacao("COMBINACOES_POR_VALOR", f"Listando combinações para {formatar_centavos(alvo_centavos)} ({criterio})")
+    valores_centavos = [int(mov.valor_venda) for mov in arquivo.movimentos]
+    custos = custos_por_criterio(arquivo.movimentos, criterio, adquirente_preferido)
+    
+    combinacoes = []
+    try:
+        for indices in enumerar_subconjuntos(valores_centavos, alvo_centavos, custos):
+            combinacoes.append(indices)
+            print(f"Combinação {len(combinacoes)}: {len(indices)} registro(s) - índices {indices}")
+            if len(combinacoes) >= quantidade:
+                break
+    except ValueError as e:
+        log_operacao("COMBINACOES_POR_VALOR", f"Busca interrompida: {e}")
+        print(f"\n{e}.")
+    
+    combinacoes.sort(key=lambda indices: (sum(custos[i] for i in indices), indices))
+    log_operacao("COMBINACOES_POR_VALOR", f"{len(combinacoes)} combinação(ões) encontrada(s)")
+    return combinacoes
+
+def escolher_combinacao_por_valor(arquivo: ArquivoMovimentacao):
+    """Pergunta valor e critério, lista as melhores combinações e mantém a escolhida"""
+    from conciliacao import CRITERIOS
+    
+    valor = input("\nDigite o valor desejado (ex: 2564.00): ")
+    try:
+        centavos = para_centavos(valor)
+    except ValueError:
+        print("Valor inválido. Deve ser um número decimal.")
+        return
+    if centavos <= 0:
+        print("Valor inválido. Deve ser maior que zero.")
+        return
+    
+    criterios = list(CRITERIOS)
+    for numero, criterio in enumerate(criterios, start=1):
+        print(f"{numero}. {CRITERIOS[criterio]}")
+    opcao = input("Critério de ranqueamento [1]: ").strip() or "1"
+    if not opcao.isdigit() or not 1 <= int(opcao) <= len(criterios):
+        print("Critério inválido.")
+        return
+    criterio = criterios[int(opcao) - 1]
+    adquirente = input("Código do adquirente preferido: ").strip() if criterio == 'adquirente_preferido' else None
+    
+    try:
+        combinacoes = listar_combinacoes_por_valor(arquivo, valor, criterio=criterio, adquirente_preferido=adquirente)
+    except ValueError as e:
+        print(f"\n{e}.")
+        return
+    if not combinacoes:
+        print("\nNenhuma combinação de registros encontrada que some EXATAMENTE o valor desejado.")
+        return
+    
+    print("\n===== Combinações ordenadas =====")
+    for numero, indices in enumerate(combinacoes, start=1):
+        soma = sum(int(arquivo.movimentos[i].valor_venda) for i in indices)
+        print(f"{numero}. {len(indices)} registro(s) - R$ {formatar_centavos(soma)} - índices {indices}")
+    
+    escolha = input("\nNúmero da combinação a manter (Enter cancela): ").strip()
+    if not escolha.isdigit() or not 1 <= int(escolha) <= len(combinacoes):
+        print("\nOperação cancelada.")
+        return
+    indices = combinacoes[int(escolha) - 1]
+    registros_excluidos = arquivo.manter_indices(indices)
+    print(f"\n{len(indices)} registro(s) mantido(s), {registros_excluidos} excluído(s).")
+
+def recuperar_sessao(arquivo: ArquivoMovimentacao):
+    """Oferece a recuperação de alterações não salvas de uma sessão interrompida e inicia o diário"""
+    operacoes = arquivo.operacoes_pendentes()
+    if operacoes:
+        print(f"\nForam encontradas {len(operacoes)} alteração(ões) não salva(s) de uma sessão interrompida.")
+        if input("Recuperar essas alterações? (S/N): ").upper() == 'S':
+            recuperadas = arquivo.recuperar_diario()
+            print(f"{recuperadas} alteração(ões) recuperada(s). Salve o arquivo para mantê-las.")
+            if recuperadas < len(operacoes):
+                print(f"{len(operacoes) - recuperadas} marca(s) de desfazer/refazer sem a alteração correspondente "
+                      "foram ignoradas.")
+            input("Pressione Enter para continuar...")
+            return
+    arquivo.iniciar_diario()
+
+def exibir_relatorio_validacao(caminho_arquivo: str, limite_erros: int = 20):
+    """Mostra todas as violações de layout do arquivo (até o limite), com o número da linha"""
+    from validador_movimentacao import validar_arquivo
+    
+    relatorio = validar_arquivo(caminho_arquivo, limite_erros)
+    log_operacao("VALIDAR_ARQUIVO", f"{relatorio.total_erros} violação(ões) de layout em {caminho_arquivo}")
+    if not relatorio.valido:
+        print(f"\nRelatório de validação ({relatorio.total_erros} violação(ões)):")
+        print(relatorio)
+
 def selecionar_arquivo() -> str:
     """Permite ao usuário selecionar um arquivo usando interface TUI"""
     from seletor_arquivo_tui import selecionar_arquivo_tui
@@ -628,6 +1077,10 @@ def selecionar_arquivo() -> str:
 
 def menu_principal():
     """Menu principal da aplicação usando interface TUI"""
+    # Componentes TUI (prompt_toolkit) só são importados pela interface interativa
+    from planilha_registros import PlanilhaRegistros
+    from menu_principal_tui import MenuPrincipalTUI
+    
     arquivo_atual = None
     
     while True:
@@ -643,10 +1096,15 @@ def menu_principal():
             nome_arquivo = selecionar_arquivo()
             if nome_arquivo:
                 try:
+                    if arquivo_atual:
+                        arquivo_atual.encerrar_diario()
                     arquivo_atual = ArquivoMovimentacao(nome_arquivo)
                     log_operacao("CARREGAR_ARQUIVO", f"Arquivo {nome_arquivo} carregado com sucesso")
+                    recuperar_sessao(arquivo_atual)
                 except Exception as e:
                     print(f"\nErro ao carregar arquivo: {e}")
+                    if isinstance(e, ValueError):
+                        exibir_relatorio_validacao(nome_arquivo)
                     input("Pressione Enter para continuar...")
         
         elif opcao == "visualizar_conteudo" and arquivo_atual:
@@ -669,9 +1127,8 @@ def menu_principal():
                     print("=== Seleção por Valor ===")
                     try:
                         valor_str = input("\nDigite o valor desejado (ex: 2564.00): ")
-                        valor = float(valor_str)
-                        if valor > 0:
-                            selecionar_por_valor(arquivo_atual, valor)
+                        if para_centavos(valor_str) > 0:
+                            selecionar_por_valor(arquivo_atual, valor_str)
                         else:
                             print("Valor inválido. Deve ser maior que zero.")
                             input("Pressione Enter para continuar...")
@@ -742,9 +1199,8 @@ def menu_principal():
             print("=== Seleção por Valor ===")
             try:
                 valor_str = input("\nDigite o valor desejado (ex: 2564.00): ")
-                valor = float(valor_str)
-                if valor > 0:
-                    selecionar_por_valor(arquivo_atual, valor)
+                if para_centavos(valor_str) > 0:
+                    selecionar_por_valor(arquivo_atual, valor_str)
                 else:
                     print("Valor inválido. Deve ser maior que zero.")
                     input("Pressione Enter para continuar...")
@@ -752,6 +1208,12 @@ def menu_principal():
                 print("Valor inválido. Deve ser um número decimal.")
                 input("Pressione Enter para continuar...")
         
+        elif opcao == "combinacoes_por_valor" and arquivo_atual:
+            os.system('clear' if os.name == 'posix' else 'cls')
+            print("=== Combinações por Valor ===")
+            escolher_combinacao_por_valor(arquivo_atual)
+            input("Pressione Enter para continuar...")
+        
         elif opcao == "escolher_registros" and arquivo_atual:
             escolher_registros(arquivo_atual)
         
@@ -760,10 +1222,23 @@ def menu_principal():
             planilha = PlanilhaRegistros(arquivo_atual)
             planilha.executar()
         
+        elif opcao in ("desfazer", "refazer") and arquivo_atual:
+            if opcao == "desfazer" and arquivo_atual.pode_desfazer():
+                arquivo_atual.desfazer()
+                print(f"\nÚltima alteração desfeita ({len(arquivo_atual.movimentos)} registros).")
+            elif opcao == "refazer" and arquivo_atual.pode_refazer():
+                arquivo_atual.refazer()
+                print(f"\nAlteração refeita ({len(arquivo_atual.movimentos)} registros).")
+            else:
+                print(f"\nNão há alterações para {opcao}.")
+            input("Pressione Enter para continuar...")
+        
         elif opcao == "salvar" and arquivo_atual:
             try:
-                arquivo_atual.salvar_arquivo()
+                historico_descartado = arquivo_atual.salvar_arquivo()
                 print("\nArquivo salvo com sucesso.")
+                if historico_descartado:
+                    print(AVISO_HISTORICO_DESCARTADO)
                 input("Pressione Enter para continuar...")
             except Exception as e:
                 print(f"\nErro ao salvar arquivo: {e}")
@@ -775,23 +1250,29 @@ def menu_principal():
             novo_nome = input("\nDigite o novo nome do arquivo: ")
             if novo_nome:
                 try:
-                    arquivo_atual.salvar_arquivo(novo_nome)
+                    historico_descartado = arquivo_atual.salvar_arquivo(novo_nome)
                     print(f"\nArquivo salvo como '{novo_nome}' com sucesso.")
+                    if historico_descartado:
+                        print(AVISO_HISTORICO_DESCARTADO)
                     input("Pressione Enter para continuar...")
                 except Exception as e:
                     print(f"\nErro ao salvar arquivo: {e}")
                     input("Pressione Enter para continuar...")
         
         elif opcao == "fechar_arquivo" and arquivo_atual:
+            arquivo_atual.encerrar_diario()
             arquivo_atual = None
             print("\nArquivo fechado.")
             input("Pressione Enter para continuar...")
         
         elif opcao == "sair":
+            if arquivo_atual:
+                arquivo_atual.encerrar_diario()
             print("\nSaindo da aplicação.")
             break
 
 if __name__ == "__main__":
-    # Mudar para o diretório do script
-    os.chdir(os.path.dirname(os.path.abspath(__file__)) if os.path.abspath(__file__) != '/home/peder/Projetos/EditCobol' else '/home/peder/Projetos/EditCobol')
+    configurar_log()
+    # Mudar para o diretório do script, onde ficam os arquivos de exemplo
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
     menu_principal()
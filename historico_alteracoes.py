@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pilhas de desfazer/refazer das alterações de um arquivo de movimentação
+
+Cada alteração é guardada como uma diferença compacta, não como cópia da lista
+de movimentos:
+
+- ('linha', índice, linha anterior, linha nova) para a edição de um registro;
+- ('inserir', índice, linha) e ('excluir', índice, linha) para um registro;
+- ('manter', máscara compactada, quantidade, removidos, centavos removidos)
+  para a exclusão em massa, onde removidos são só os registros excluídos
+  (no formato do armazenamento) e a máscara tem um bit por registro.
+
+A memória usada é proporcional ao tamanho das alterações.
+"""
+
+# Quantidade máxima de alterações guardadas para desfazer
+LIMITE_HISTORICO = 100
+
+
+class HistoricoAlteracoes:
+    """Pilhas de alterações para desfazer e refazer"""
+
+    def __init__(self, limite: int = LIMITE_HISTORICO):
+        self.limite = limite
+        self._desfazer = []
+        self._refazer = []
+
+    def registrar(self, alteracao: tuple):
+        """Guarda uma nova alteração; o que havia para refazer é descartado"""
+        self._desfazer.append(alteracao)
+        if len(self._desfazer) > self.limite:
+            del self._desfazer[0]
+        self._refazer.clear()
+
+    def pode_desfazer(self) -> bool:
+        return bool(self._desfazer)
+
+    def pode_refazer(self) -> bool:
+        return bool(self._refazer)
+
+    def retirar_para_desfazer(self) -> tuple:
+        """Retira a última alteração, que passa para a pilha de refazer"""
+        if not self._desfazer:
+            raise ValueError("Não há alterações para desfazer")
+        alteracao = self._desfazer.pop()
+        self._refazer.append(alteracao)
+        return alteracao
+
+    def retirar_para_refazer(self) -> tuple:
+        """Retira a última alteração desfeita, que volta para a pilha de desfazer"""
+        if not self._refazer:
+            raise ValueError("Não há alterações para refazer")
+        alteracao = self._refazer.pop()
+        self._desfazer.append(alteracao)
+        return alteracao
+
+    def limpar(self):
+        self._desfazer.clear()
+        self._refazer.clear()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índices secundários dos registros de movimento
+
+- Igualdade (adquirente, data do movimento): valor do campo -> posições dos
+  registros, em ordem crescente. Um filtro de igualdade vira uma consulta a
+  dicionário.
+- Trecho (cartão, CVNSU): o campo é dividido em blocos de 3 caracteres em
+  posições fixas e cada bloco tem seu mapa texto -> posições. Um trecho com
+  3 ou mais caracteres cobre ao menos um bloco inteiro (ou quase) em cada
+  posição possível; só os registros desse bloco são conferidos, em vez de
+  todos. Trechos com 1 ou 2 caracteres casam com boa parte do arquivo e são
+  procurados com uma passada pelos valores.
+
+Cada índice é construído na primeira consulta ao campo e acompanha as
+alterações feitas pelos métodos do ArquivoMovimentacao (ver _notificar). Edições de um
+registro atualizam os índices no lugar; inclusões, exclusões e exclusões em
+massa deslocam os índices de igualdade e descartam os de trecho, que são
+refeitos na próxima busca. Uma inclusão ou exclusão isolada não percorre todas
+as listas: o deslocamento entra numa fila e cada lista aplica a fila (só nas
+posições a partir do registro, achadas por bisect) quando é usada de novo; com
+a fila cheia, todas as listas são postas em dia de uma vez. Qualquer outra
+mudança (versão do arquivo fora de sequência, outros registros carregados)
+descarta tudo.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import accumulate, compress, repeat
+from operator import attrgetter, getitem
+
+from tabela_movimentos import COLUNAS
+
+# Posição (início, fim) de cada campo na linha do registro M
+POSICOES = {campo: (inicio, fim) for campo, inicio, fim, _ in COLUNAS}
+TAMANHO_BLOCO = 3
+# Deslocamentos pendentes acumulados antes de pôr todas as listas em dia
+LIMITE_DESLOCAMENTOS = 64
+
+
+def valores_campo(movimentos, campo: str) -> list:
+    """Valores (texto) de um campo em todos os registros, lidos direto das colunas quando possível"""
+    colunas = getattr(movimentos, 'colunas', None)
+    if colunas is None:
+        return list(map(attrgetter(campo), movimentos))
+    coluna = colunas[campo]
+    largura = movimentos.larguras[campo]
+    if isinstance(coluna, array):
+        return list(map(f"%0{largura}d".__mod__, coluna))
+    texto = coluna.decode('latin-1')
+    return list(map(getitem, repeat(texto), map(slice, range(0, len(texto), largura),
+                                                  range(largura, len(texto) + 1, largura))))
+
+
+def agrupar(valores: list) -> dict:
+    """Mapa valor -> array('q') com as posições em que o valor aparece, em ordem crescente"""
+    grupos = defaultdict(list)
+    for indice, valor in enumerate(valores):
+        grupos[valor].append(indice)
+    return {valor: array('q', lista) for valor, lista in grupos.items()}
+
+
+def _blocos(largura: int) -> list:
+    """Posições (início, fim) dos blocos em que um campo é dividido"""
+    return [(inicio, min(inicio + TAMANHO_BLOCO, largura)) for inicio in range(0, largura, TAMANHO_BLOCO)]
+
+
+class IndicesSecundarios:
+    """Índices de igualdade e de trecho sobre os registros de um ArquivoMovimentacao"""
+
+    def __init__(self, arquivo_movimentacao):
+        self.arquivo = arquivo_movimentacao
+        self._versao = None
+        self._movimentos = None
+        self._igualdade = {}
+        self._trechos = {}
+        # Fila de deslocamentos (posição, variação) ainda não aplicados a todas as listas de igualdade
+        # e, por campo, quantos deles cada lista já recebeu
+        self._deslocamentos = []
+        self._aplicados = {}
+
+    def descartar(self):
+        self._igualdade.clear()
+        self._trechos.clear()
+        self._deslocamentos.clear()
+        self._aplicados.clear()
+
+    def _sincronizar(self):
+        """Descarta os índices se os registros mudaram sem passar pelos métodos acompanhados"""
+        if self._versao != self.arquivo.versao or self._movimentos is not self.arquivo.movimentos:
+            self.descartar()
+            self._versao = self.arquivo.versao
+            self._movimentos = self.arquivo.movimentos
+
+    def iguais(self, campo: str, valor: str) -> array:
+        """Posições dos registros cujo campo é igual ao valor (array('q') crescente, em uma cópia)"""
+        self._sincronizar()
+        if campo not in self._igualdade:
+            self._igualdade[campo] = agrupar(valores_campo(self.arquivo.movimentos, campo))
+            # As listas novas já estão em dia com a fila atual
+            pendentes = len(self._deslocamentos)
+            self._aplicados[campo] = defaultdict(lambda: pendentes)
+        # Cópia: as listas do índice são alteradas no lugar quando os registros mudam
+        return array('q', self._lista(campo, valor))
+
+    def _lista(self, campo: str, valor: str, criar: bool = False) -> array:
+        """Lista de posições do valor no índice de igualdade, com os deslocamentos pendentes aplicados"""
+        grupos = self._igualdade[campo]
+        aplicados = self._aplicados[campo]
+        lista = grupos.get(valor)
+        if lista is None:
+            if not criar:
+                return ()
+            # Lista nova: as posições que receber já são as atuais
+            lista = grupos[valor] = array('q')
+            aplicados[valor] = len(self._deslocamentos)
+            return lista
+        for posicao, variacao in self._deslocamentos[aplicados[valor]:]:
+            self._deslocar(lista, bisect_left(lista, posicao), variacao)
+        aplicados[valor] = len(self._deslocamentos)
+        return lista
+
+    def _aplicar_deslocamentos(self):
+        """Põe todas as listas de igualdade em dia e esvazia a fila"""
+        for campo, grupos in self._igualdade.items():
+            for valor in grupos:
+                self._lista(campo, valor)
+            self._aplicados[campo] = defaultdict(int)
+        self._deslocamentos.clear()
+
+    def contendo(self, campo: str, trecho: str) -> array:
+        """Posições dos registros cujo campo contém o trecho (array('q') crescente)"""
+        self._sincronizar()
+        movimentos = self.arquivo.movimentos
+        inicio, fim = POSICOES[campo]
+        largura = fim - inicio
+        if len(trecho) > largura:
+            return array('q')
+        if len(trecho) < TAMANHO_BLOCO:
+            valores = valores_campo(movimentos, campo)
+            return array('q', compress(range(len(valores)), map(str.__contains__, valores, repeat(trecho))))
+
+        blocos = self._trechos.get(campo)
+        if blocos is None:
+            valores = valores_campo(movimentos, campo)
+            blocos = self._trechos[campo] = [agrupar(list(map(getitem, valores, repeat(slice(a, b)))))
+                                             for a, b in _blocos(largura)]
+
+        candidatos = set()
+        for posicao in range(largura - len(trecho) + 1):
+            candidatos.update(self._candidatos(blocos, largura, trecho, posicao))
+        valor_de = self._leitor(movimentos, campo)
+        return array('q', sorted(i for i in candidatos if trecho in valor_de(i)))
+
+    @staticmethod
+    def _candidatos(blocos: list, largura: int, trecho: str, posicao: int):
+        """Registros que podem conter o trecho começando na posição: os do bloco mais restritivo"""
+        fim_trecho = posicao + len(trecho)
+        melhor = None
+        for (a, b), grupos in zip(_blocos(largura), blocos):
+            if a >= posicao and b <= fim_trecho:
+                lista = grupos.get(trecho[a - posicao:b - posicao], ())
+                if melhor is None or len(lista) < len(melhor):
+                    melhor = lista
+        if melhor is not None:
+            return melhor
+        # Nenhum bloco inteiro dentro do trecho (trecho de 3 ou 4 caracteres): usar o de maior sobreposição
+        a, b = max(_blocos(largura), key=lambda bloco: min(bloco[1], fim_trecho) - max(bloco[0], posicao))
+        grupos = blocos[a // TAMANHO_BLOCO]
+        de, ate = max(a, posicao), min(b, fim_trecho)
+        parte = trecho[de - posicao:ate - posicao]
+        return [i for chave, lista in grupos.items() if chave[de - a:ate - a] == parte for i in lista]
+
+    @staticmethod
+    def _leitor(movimentos, campo: str):
+        """Função que lê o campo de um registro pela posição"""
+        valor_campo = getattr(movimentos, 'valor_campo', None)
+        if valor_campo is not None:
+            return lambda indice: valor_campo(campo, indice)
+        ler = attrgetter(campo)
+        return lambda indice: ler(movimentos[indice])
+
+    # Acompanhamento das alterações: chamados pelo arquivo logo depois de cada alteração
+
+    def _acompanhar(self) -> bool:
+        """Indica se os índices estavam em dia antes da alteração que o arquivo acabou de fazer"""
+        em_dia = self._versao == self.arquivo.versao - 1 and self._movimentos is self.arquivo.movimentos
+        self._versao = self.arquivo.versao
+        self._movimentos = self.arquivo.movimentos
+        if not em_dia:
+            self.descartar()
+        return em_dia and bool(self._igualdade or self._trechos)
+
+    def linha_alterada(self, indice: int, anterior: str, nova: str):
+        """Move o registro entre as listas dos valores antigo e novo, campo a campo"""
+        if not self._acompanhar():
+            return
+        for campo in self._igualdade:
+            inicio, fim = POSICOES[campo]
+            if anterior[inicio:fim] != nova[inicio:fim]:
+                self._retirar(campo, anterior[inicio:fim], indice)
+                insort(self._lista(campo, nova[inicio:fim], criar=True), indice)
+        for campo, blocos in self._trechos.items():
+            inicio, fim = POSICOES[campo]
+            for (a, b), grupos in zip(_blocos(fim - inicio), blocos):
+                self._mover(grupos, indice, anterior[inicio + a:inicio + b], nova[inicio + a:inicio + b])
+
+    @staticmethod
+    def _mover(grupos: dict, indice: int, valor_anterior: str, valor_novo: str):
+        if valor_anterior == valor_novo:
+            return
+        lista = grupos[valor_anterior]
+        del lista[bisect_left(lista, indice)]
+        if not lista:
+            del grupos[valor_anterior]
+        insort(grupos.setdefault(valor_novo, array('q')), indice)
+
+    def inserido(self, indice: int, linha: str):
+        """Enfileira o deslocamento das posições a partir do registro incluído e o acrescenta"""
+        if not self._acompanhar():
+            return
+        self._trechos.clear()
+        self._enfileirar(indice, 1)
+        for campo in self._igualdade:
+            inicio, fim = POSICOES[campo]
+            insort(self._lista(campo, linha[inicio:fim], criar=True), indice)
+
+    def excluido(self, indice: int, linha: str):
+        """Retira o registro excluído e enfileira o deslocamento das posições seguintes"""
+        if not self._acompanhar():
+            return
+        self._trechos.clear()
+        for campo in self._igualdade:
+            inicio, fim = POSICOES[campo]
+            self._retirar(campo, linha[inicio:fim], indice)
+        # O registro já saiu da lista dele: o deslocamento vale igual para todas
+        self._enfileirar(indice, -1)
+
+    def _retirar(self, campo: str, valor: str, indice: int):
+        lista = self._lista(campo, valor)
+        del lista[bisect_left(lista, indice)]
+        if not lista:
+            del self._igualdade[campo][valor]
+            del self._aplicados[campo][valor]
+
+    def _enfileirar(self, indice: int, variacao: int):
+        if len(self._deslocamentos) >= LIMITE_DESLOCAMENTOS:
+            self._aplicar_deslocamentos()
+        self._deslocamentos.append((indice, variacao))
+
+    @staticmethod
+    def _deslocar(lista: array, a_partir: int, variacao: int):
+        if a_partir < len(lista):
+            lista[a_partir:] = array('q', map(variacao.__add__, lista[a_partir:]))
+
+    def mascara_mantida(self, mascara: bytes):
+        """Renumera os índices de igualdade depois de manter só os registros marcados na máscara"""
+        if not self._acompanhar() or mascara.count(0) == 0:
+            return
+        self._trechos.clear()
+        self._aplicar_deslocamentos()
+        # Nova posição de cada registro mantido: quantos registros mantidos há até ele, menos um
+        novas = list(accumulate(mascara))
+        for grupos in self._igualdade.values():
+            for valor in list(grupos):
+                lista = grupos[valor]
+                mantidos = compress(lista, map(mascara.__getitem__, lista))
+                lista = array('q', map((-1).__add__, map(novas.__getitem__, mantidos)))
+                if lista:
+                    grupos[valor] = lista
+                else:
+                    del grupos[valor]
+
+    def mascara_restaurada(self, mascara: bytes):
+        """Os registros removidos voltaram (desfazer): os índices são refeitos na próxima consulta"""
+        if self._acompanhar():
+            self.descartar()
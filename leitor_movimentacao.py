@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitura em fluxo (streaming) de arquivos de movimentação financeira
+
+O arquivo é lido em quadros de tamanho fixo (91 caracteres + quebra de linha),
+em blocos de vários registros por vez, sem nunca manter o arquivo inteiro em
+memória. A estrutura H/M/T, a contagem de registros e a soma dos valores são
+validadas em uma única passada.
+"""
+
+TAMANHO_REGISTRO = 91
+REGISTROS_POR_BLOCO = 8192
+
+# Codificação do arquivo: cada um dos 91 caracteres de um registro ocupa um byte
+CODIFICACAO = 'ascii'
+
+# Posição do campo valor da venda no registro M (posições 34-50)
+INICIO_VALOR_VENDA = 33
+FIM_VALOR_VENDA = 50
+
+# Layout dos registros: (campo, início, fim)
+CAMPOS_HEADER = (
+    ('tipo', 0, 1),
+    ('data_processamento', 1, 9),
+    ('codigo_unidade', 9, 11),
+    ('data_processamento2', 11, 19),
+    ('espacos', 19, 27),
+    ('zeros', 27, 91),
+)
+
+CAMPOS_MOVIMENTO = (
+    ('tipo', 0, 1),
+    ('codigo_adquirente', 1, 3),
+    ('data_movimento', 3, 11),
+    ('numero_cartao', 11, 31),
+    ('parcelas', 31, 33),
+    ('valor_venda', 33, 50),
+    ('data_venda', 50, 58),
+    ('cvnsu', 58, 67),
+    ('zeros_fixos', 67, 69),
+    ('cpf_cnpj', 69, 84),
+    ('numero_pedido', 84, 91),
+)
+
+CAMPOS_TRAILER = (
+    ('tipo', 0, 1),
+    ('total_registros', 1, 6),
+    ('espaco', 6, 7),
+    ('valor_total', 7, 16),
+    ('noves', 16, 91),
+)
+
+
+class LeitorMovimentacao:
+    """Percorre o arquivo produzindo (tipo, linha) para cada registro, validando em uma passada"""
+
+    def __init__(self, caminho_arquivo: str, registros_por_bloco: int = REGISTROS_POR_BLOCO):
+        """Inicializa o leitor para o arquivo informado"""
+        self.caminho_arquivo = caminho_arquivo
+        self.registros_por_bloco = registros_por_bloco
+        self.terminador = None
+        self.total_registros = 0
+        self.soma_centavos = 0
+
+    @property
+    def tamanho_quadro(self) -> int:
+        """Tamanho em bytes de cada registro no disco, incluindo a quebra de linha"""
+        return TAMANHO_REGISTRO + len(self.terminador or b'\n')
+
+    def _detectar_terminador(self, bloco: bytes, numero_linha: int) -> bytes:
+        """Identifica se o arquivo usa LF ou CRLF a partir do primeiro registro"""
+        if bloco[TAMANHO_REGISTRO:TAMANHO_REGISTRO + 1] == b'\n':
+            return b'\n'
+        if bloco[TAMANHO_REGISTRO:TAMANHO_REGISTRO + 2] == b'\r\n':
+            return b'\r\n'
+        if len(bloco) == TAMANHO_REGISTRO:
+            # Arquivo de uma única linha, sem quebra no final
+            return b'\n'
+        self._erro_tamanho(bloco, 0, numero_linha)
+
+    def _erro_tamanho(self, bloco: bytes, inicio: int, numero_linha: int):
+        """Gera o erro de tamanho de linha a partir da posição do registro inválido"""
+        fim = bloco.find(b'\n', inicio)
+        if fim < 0:
+            fim = len(bloco)
+        tamanho = len(bloco[inicio:fim].rstrip(b'\r'))
+        raise ValueError(f"Linha {numero_linha} tem {tamanho} caracteres, deveria ter 91")
+
+    def _quadros(self):
+        """Produz cada registro (bytes, sem a quebra de linha) junto com o número da linha"""
+        with open(self.caminho_arquivo, 'rb') as f:
+            bloco = f.read(self.registros_por_bloco * (TAMANHO_REGISTRO + 2))
+            if not bloco:
+                return
+            self.terminador = self._detectar_terminador(bloco, 1)
+            tamanho = self.tamanho_quadro
+            tamanho_leitura = self.registros_por_bloco * tamanho
+            numero_linha = 1
+            resto = b''
+
+            while bloco:
+                bloco = resto + bloco
+                proximo = f.read(tamanho_leitura)
+                completos = len(bloco) // tamanho
+                resto = bloco[completos * tamanho:]
+
+                # Último registro do arquivo pode não ter quebra de linha
+                if not proximo and len(resto) == TAMANHO_REGISTRO:
+                    bloco = bloco[:completos * tamanho] + resto + self.terminador
+                    completos += 1
+                    resto = b''
+
+                # Verificar todas as quebras de linha do bloco de uma vez
+                fim_quadros = bloco[TAMANHO_REGISTRO:completos * tamanho:tamanho]
+                if fim_quadros.count(self.terminador[:1]) != completos or (
+                        len(self.terminador) == 2
+                        and bloco[TAMANHO_REGISTRO + 1:completos * tamanho:tamanho].count(b'\n') != completos):
+                    for i in range(completos):
+                        inicio = i * tamanho
+                        if bloco[inicio + TAMANHO_REGISTRO:inicio + tamanho] != self.terminador:
+                            self._erro_tamanho(bloco + proximo, inicio, numero_linha + i)
+
+                for inicio in range(0, completos * tamanho, tamanho):
+                    yield numero_linha, bloco[inicio:inicio + TAMANHO_REGISTRO]
+                    numero_linha += 1
+
+                bloco = proximo
+
+            if resto:
+                self._erro_tamanho(resto, 0, numero_linha)
+
+    def __iter__(self):
+        """Produz tuplas (tipo, linha) na ordem do arquivo, validando a estrutura em uma única passada"""
+        self.total_registros = 0
+        self.soma_centavos = 0
+        linha_trailer = None
+        numero_trailer = 0
+
+        for numero_linha, quadro in self._quadros():
+            try:
+                linha = quadro.decode(CODIFICACAO)
+            except UnicodeDecodeError:
+                raise ValueError(f"Linha {numero_linha} contém caracteres inválidos")
+            tipo = linha[0]
+
+            if numero_linha == 1:
+                if tipo != 'H':
+                    raise ValueError("Primeiro registro deve ser do tipo Header (H)")
+                yield tipo, linha
+                continue
+
+            # Um trailer só é válido se for a última linha do arquivo
+            if linha_trailer is not None:
+                raise ValueError(f"Registro na linha {numero_trailer} deveria ser do tipo Movimento (M)")
+
+            if tipo == 'M':
+                self.total_registros += 1
+                self.soma_centavos += int(linha[INICIO_VALOR_VENDA:FIM_VALOR_VENDA])
+                yield tipo, linha
+            elif tipo == 'T':
+                linha_trailer = linha
+                numero_trailer = numero_linha
+            else:
+                raise ValueError(f"Registro na linha {numero_linha} deveria ser do tipo Movimento (M)")
+
+        if self.terminador is None:
+            raise ValueError("Primeiro registro deve ser do tipo Header (H)")
+        if linha_trailer is None:
+            raise ValueError("Último registro deve ser do tipo Trailer (T)")
+
+        total_trailer = int(linha_trailer[1:6])
+        if self.total_registros != total_trailer:
+            raise ValueError(f"Número de registros M ({self.total_registros}) não corresponde ao valor no Trailer ({total_trailer})")
+
+        valor_trailer = int(linha_trailer[7:16])
+        if self.soma_centavos != valor_trailer:
+            raise ValueError(f"Soma dos valores dos registros M ({self.soma_centavos / 100}) não corresponde ao valor no Trailer ({valor_trailer / 100})")
+
+        yield 'T', linha_trailer
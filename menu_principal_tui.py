@@ -27,8 +27,11 @@ class MenuPrincipalTUI:
             ("Deletar registro", self._deletar_registro),
             ("Excluir por adquirente", self._excluir_por_adquirente),
             ("Seleção por valor", self._selecionar_por_valor),
+            ("Combinações por valor", self._combinacoes_por_valor),
             ("Escolher registros", self._escolher_registros),
             ("Visualizar como planilha", self._visualizar_planilha),
+            ("Desfazer", self._desfazer),
+            ("Refazer", self._refazer),
             ("Salvar", self._salvar),
             ("Salvar como...", self._salvar_como),
             ("Fechar arquivo", self._fechar_arquivo),
@@ -156,12 +159,21 @@ class MenuPrincipalTUI:
     def _selecionar_por_valor(self):
         return ("selecionar_por_valor", None)
     
+    def _combinacoes_por_valor(self):
+        return ("combinacoes_por_valor", None)
+    
     def _escolher_registros(self):
         return ("escolher_registros", None)
     
     def _visualizar_planilha(self):
         return ("visualizar_planilha", None)
     
+    def _desfazer(self):
+        return ("desfazer", None)
+    
+    def _refazer(self):
+        return ("refazer", None)
+    
     def _salvar(self):
         return ("salvar", None)
     
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linha de comando não interativa para validar e transformar arquivos de movimentação
+
+Feita para processamento em lote: não faz perguntas, não importa a interface
+TUI (prompt_toolkit/rich) e informa o resultado por código de saída e, com
+--json, por uma linha JSON por arquivo.
+
+Exemplos:
+    python movimentacao_cli.py validar rc160625.008 rc170625.008 --json
+    python movimentacao_cli.py excluir-adquirente 46 rc160625.008 --saida filtrado.008
+    python movimentacao_cli.py selecionar-valor 2564.00 rc160625.008 --no-lugar
+    python movimentacao_cli.py manter-indices 0,3,10-20 rc160625.008 --saida novo.008
+
+Sem --saida ou --no-lugar as transformações só informam o resultado, sem gravar.
+Com vários arquivos, o código de saída é o maior entre os dos arquivos.
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Códigos de saída
+SAIDA_OK = 0
+SAIDA_ARQUIVO_INVALIDO = 1
+SAIDA_USO_INCORRETO = 2
+SAIDA_SEM_COMBINACAO = 3
+SAIDA_ERRO_GRAVACAO = 4
+
+
+def interpretar_indices(texto: str) -> list:
+    """Converte '0,3,10-20' na lista de índices [0, 3, 10, 11, ..., 20]"""
+    indices = []
+    for parte in texto.split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        inicio, separador, fim = parte.partition('-')
+        if not inicio.isdigit() or (separador and not fim.isdigit()):
+            raise ValueError(f"Índice inválido: {parte!r}")
+        if separador:
+            indices.extend(range(int(inicio), int(fim) + 1))
+        else:
+            indices.append(int(inicio))
+    return indices
+
+
+def _centavos(texto: str) -> int:
+    """Tipo de argumento: valor em reais convertido para centavos"""
+    from dinheiro import para_centavos
+
+    try:
+        centavos = para_centavos(texto)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if centavos <= 0:
+        raise argparse.ArgumentTypeError("o valor deve ser maior que zero")
+    return centavos
+
+
+def _codigo_adquirente(texto: str) -> str:
+    """Tipo de argumento: código do adquirente no formato do arquivo (2 dígitos)"""
+    if len(texto) != 2 or not texto.isdigit():
+        raise argparse.ArgumentTypeError(f"código do adquirente deve ter 2 dígitos: {texto!r}")
+    return texto
+
+
+def _indices(texto: str) -> list:
+    """Tipo de argumento: lista de índices"""
+    try:
+        return interpretar_indices(texto)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='movimentacao_cli.py',
+        description="Valida e transforma arquivos de movimentação financeira sem interação."
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument('--json', action='store_true', help="uma linha JSON por arquivo na saída padrão")
+
+    transformacao = argparse.ArgumentParser(add_help=False, parents=[comum])
+    destino = transformacao.add_mutually_exclusive_group()
+    destino.add_argument('--saida', help="grava o resultado neste caminho (apenas com um arquivo)")
+    destino.add_argument('--no-lugar', action='store_true', help="grava o resultado sobre o próprio arquivo")
+    transformacao.add_argument('--armazenamento', choices=('lista', 'mmap', 'colunas'), default='lista',
+                               help="representação dos registros em memória (padrão: lista); 'colunas' é "
+                                    "mais rápida em arquivos grandes, mas recusa campos numéricos com "
+                                    "caracteres que não sejam dígitos, que 'lista' e 'mmap' aceitam")
+    transformacao.add_argument('--rapido', action='store_true',
+                               help="grava sem fsync (mais rápido, sem garantia contra queda do sistema)")
+
+    validar = subparsers.add_parser('validar', parents=[comum], help="confere o layout e os totais")
+    validar.add_argument('arquivos', nargs='+')
+    validar.add_argument('--limite-erros', type=int, default=None,
+                         help="quantidade máxima de violações detalhadas por arquivo")
+
+    excluir = subparsers.add_parser('excluir-adquirente', parents=[transformacao],
+                                    help="exclui os registros de um adquirente")
+    excluir.add_argument('codigo', type=_codigo_adquirente, help="código do adquirente (2 dígitos)")
+    excluir.add_argument('arquivos', nargs='+')
+
+    selecionar = subparsers.add_parser('selecionar-valor', parents=[transformacao],
+                                       help="mantém só os registros cuja soma é exatamente o valor")
+    selecionar.add_argument('valor', type=_centavos, help="valor em reais (ex: 2564.00 ou 2564,00)")
+    selecionar.add_argument('arquivos', nargs='+')
+    selecionar.add_argument('--criterio', default=None,
+                            choices=('menos_registros', 'data_venda_antiga', 'adquirente_preferido'),
+                            help="mantém a melhor combinação segundo o critério")
+    selecionar.add_argument('--adquirente-preferido', default=None)
+
+    manter = subparsers.add_parser('manter-indices', parents=[transformacao],
+                                   help="mantém só os registros dos índices informados (0 é o primeiro)")
+    manter.add_argument('indices', type=_indices, help="índices e intervalos, ex: 0,3,10-20")
+    manter.add_argument('arquivos', nargs='+')
+
+    return parser
+
+
+def validar(caminho: str, argumentos) -> tuple:
+    """Valida um arquivo; retorna (código de saída, resultado)"""
+    from validador_movimentacao import validar_arquivo
+
+    if not os.path.isfile(caminho):
+        return SAIDA_ARQUIVO_INVALIDO, {'arquivo': caminho, 'erro': "Arquivo não encontrado"}
+    relatorio = validar_arquivo(caminho, argumentos.limite_erros)
+    return (SAIDA_OK if relatorio.valido else SAIDA_ARQUIVO_INVALIDO), relatorio.como_dicionario()
+
+
+def transformar(caminho: str, argumentos) -> tuple:
+    """Carrega um arquivo, aplica a transformação pedida e grava se houver destino"""
+    from financeiro_app import ArquivoMovimentacao
+
+    resultado = {'arquivo': caminho, 'operacao': argumentos.comando}
+    if not os.path.isfile(caminho):
+        resultado['erro'] = "Arquivo não encontrado"
+        return SAIDA_ARQUIVO_INVALIDO, resultado
+    try:
+        arquivo = ArquivoMovimentacao(caminho, armazenamento=argumentos.armazenamento)
+    except ValueError as e:
+        resultado['erro'] = str(e)
+        return SAIDA_ARQUIVO_INVALIDO, resultado
+    # Sem interação não há desfazer: o histórico só ocuparia memória
+    arquivo.historico = None
+    total = len(arquivo.movimentos)
+    resultado['registros_antes'] = total
+
+    if argumentos.comando == 'excluir-adquirente':
+        arquivo.excluir_adquirente(argumentos.codigo)
+    elif argumentos.comando == 'manter-indices':
+        invalidos = sorted({i for i in argumentos.indices if i >= total})
+        if invalidos:
+            resultado['erro'] = f"Índices fora do arquivo ({total} registros): {invalidos[:10]}"
+            return SAIDA_USO_INCORRETO, resultado
+        arquivo.manter_indices(argumentos.indices)
+    else:
+        codigo, indices = selecionar_por_valor(arquivo, argumentos, resultado)
+        if codigo != SAIDA_OK:
+            return codigo, resultado
+        arquivo.manter_indices(indices)
+
+    resultado['registros_depois'] = len(arquivo.movimentos)
+    resultado['excluidos'] = total - len(arquivo.movimentos)
+    resultado['total_centavos'] = arquivo.trailer.get_valor_total_centavos()
+
+    destino = caminho if argumentos.no_lugar else argumentos.saida
+    if destino:
+        try:
+            arquivo.salvar_arquivo(destino, duravel=not argumentos.rapido)
+        except OSError as e:
+            resultado['erro'] = f"Erro ao salvar arquivo: {e}"
+            return SAIDA_ERRO_GRAVACAO, resultado
+        resultado['salvo_em'] = destino
+    return SAIDA_OK, resultado
+
+
+def selecionar_por_valor(arquivo, argumentos, resultado: dict) -> tuple:
+    """Procura a combinação exata para o valor; retorna (código de saída, índices)"""
+    from conciliacao import encontrar_subconjunto, melhores_subconjuntos, custos_por_criterio
+
+    colunas = getattr(arquivo.movimentos, 'colunas', None)
+    valores = list(colunas['valor_venda']) if colunas is not None else [int(m.valor_venda) for m in arquivo.movimentos]
+    resultado['valor_centavos'] = argumentos.valor
+    try:
+        if argumentos.criterio:
+            custos = custos_por_criterio(arquivo.movimentos, argumentos.criterio, argumentos.adquirente_preferido)
+            melhores = melhores_subconjuntos(valores, argumentos.valor, 1, custos)
+            indices = melhores[0] if melhores else None
+        else:
+            indices = encontrar_subconjunto(valores, argumentos.valor)
+    except ValueError as e:
+        resultado['erro'] = str(e)
+        return SAIDA_SEM_COMBINACAO, None
+    if indices is None:
+        resultado['erro'] = "Nenhuma combinação de registros soma exatamente o valor"
+        return SAIDA_SEM_COMBINACAO, None
+    return SAIDA_OK, indices
+
+
+def formatar_resultado(codigo: int, resultado: dict) -> str:
+    """Resumo legível do resultado de um arquivo"""
+    from dinheiro import formatar_centavos
+
+    if 'erro' in resultado:
+        return f"{resultado['arquivo']}: ERRO - {resultado['erro']}"
+    if 'valido' in resultado:
+        if resultado['valido']:
+            return f"{resultado['arquivo']}: válido ({resultado['total_movimentos']} registros)"
+        detalhes = [f"  Linha {erro['linha']}: {erro['mensagem']}" for erro in resultado['erros']]
+        omitidos = resultado['total_erros'] - len(resultado['erros'])
+        if omitidos:
+            detalhes.append(f"  ... e mais {omitidos} erro(s)")
+        return '\n'.join([f"{resultado['arquivo']}: {resultado['total_erros']} violação(ões)"] + detalhes)
+    texto = (f"{resultado['arquivo']}: {resultado['excluidos']} excluído(s), {resultado['registros_depois']} "
+             f"mantido(s), total R$ {formatar_centavos(resultado['total_centavos'])}")
+    if 'salvo_em' in resultado:
+        texto += f" - salvo em {resultado['salvo_em']}"
+    return texto
+
+
+def main(argv=None) -> int:
+    parser = criar_parser()
+    argumentos = parser.parse_args(argv)
+    if getattr(argumentos, 'saida', None) and len(argumentos.arquivos) > 1:
+        parser.error("--saida só pode ser usado com um arquivo")
+
+    processar = validar if argumentos.comando == 'validar' else transformar
+    codigo_final = SAIDA_OK
+    for caminho in argumentos.arquivos:
+        codigo, resultado = processar(caminho, argumentos)
+        resultado['codigo_saida'] = codigo
+        if argumentos.json:
+            print(json.dumps(resultado, ensure_ascii=False), flush=True)
+        else:
+            print(formatar_resultado(codigo, resultado), file=sys.stdout if codigo == SAIDA_OK else sys.stderr)
+        codigo_final = max(codigo_final, codigo)
+    return codigo_final
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,18 +6,33 @@ Interface estilo planilha para seleção e navegação de registros
 
 import os
 import sys
+import shutil
+from bisect import bisect_left, bisect_right
+from itertools import chain
 from typing import List, Set
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
 from prompt_toolkit import Application
+from prompt_toolkit.filters import Condition
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.layout import Layout, HSplit, Window
 from prompt_toolkit.layout.controls import FormattedTextControl
 from prompt_toolkit.styles import Style
 from estilos_tui import CORES, ESTILOS, ESTILO_PROMPT_TOOLKIT
 from dialogos_tui import message_dialog, yes_no_dialog
+from visao_filtrada import VisaoFiltrada, registro_passa
+from selecao_registros import SelecaoRegistros
+from dinheiro import para_centavos
+
+# Alturas fixas das áreas de cabeçalho e rodapé; a área de registros fica com o restante da tela
+ALTURA_CABECALHO = 5
+ALTURA_RODAPE = 10
+# Quantidade máxima de registros com as células formatadas guardadas
+LIMITE_CELULAS = 10000
+# Destinos do "ir para" digitado no rodapé: modo -> rótulo
+DESTINOS_IR_PARA = {'registro': "Ir para o registro nº", 'valor': "Ir para o valor R$", 'cvnsu': "Ir para o CVNSU"}
 
 
 class PlanilhaRegistros:
@@ -28,13 +43,33 @@ class PlanilhaRegistros:
         self.arquivo = arquivo_movimentacao
         self.registros = arquivo_movimentacao.movimentos
         self.total_registros = len(self.registros)
-        self.registros_por_pagina = 50
+        self._registros_por_pagina = 50
+        # O tamanho da página acompanha a altura da tela, até que registros_por_pagina seja definido
+        self.pagina_pela_tela = True
         self.pagina_atual = 0
         self.total_paginas = max(1, (self.total_registros + self.registros_por_pagina - 1) // self.registros_por_pagina)
         self.cursor_pos = 0
-        self.registros_selecionados = set()
+        # Seleção pela posição do registro no arquivo (não na visão filtrada), em uma máscara
+        self._selecao = SelecaoRegistros(arquivo_movimentacao)
         self.filtros = {}
+        # Índices dos registros que passam pelos filtros, refeitos só quando filtros ou registros mudam
+        self.visao = VisaoFiltrada(arquivo_movimentacao)
         self.modo_somente_leitura = modo_somente_leitura
+        # Células já formatadas por registro (válidas para a versão atual do arquivo) e linhas já montadas
+        self._celulas = {}
+        self._linhas_montadas = {}
+        self._versao_celulas = None
+        self._movimentos_celulas = None
+        # Alterações de um registro descartam só as células dele (ver linha_alterada)
+        acompanhantes = getattr(arquivo_movimentacao, 'acompanhantes', None)
+        if acompanhantes is not None:
+            acompanhantes.add(self)
+        # Primeira linha da página exibida: a página pode ter mais linhas do que cabem na tela
+        self.primeira_visivel = 0
+        # "Ir para" em digitação no rodapé (modo de DESTINOS_IR_PARA e texto) e aviso do último salto
+        self.modo_ir_para = None
+        self.texto_ir_para = ""
+        self.mensagem = ""
         self.console = Console()
         self.acao_executada = None
         
@@ -42,54 +77,80 @@ class PlanilhaRegistros:
         if self.total_paginas == 0:
             self.total_paginas = 1
     
+    @property
+    def registros_por_pagina(self) -> int:
+        return self._registros_por_pagina
+    
+    @registros_por_pagina.setter
+    def registros_por_pagina(self, quantidade: int):
+        """Fixa o tamanho da página; ela deixa de acompanhar a altura da tela"""
+        self.pagina_pela_tela = False
+        self._definir_tamanho_pagina(quantidade)
+    
+    def _definir_tamanho_pagina(self, quantidade: int):
+        """Muda o tamanho da página mantendo o cursor no mesmo registro"""
+        posicao = self.pagina_atual * self._registros_por_pagina + self.cursor_pos
+        self._registros_por_pagina = max(1, quantidade)
+        self.pagina_atual, self.cursor_pos = divmod(posicao, self._registros_por_pagina)
+        self.primeira_visivel = 0
+        self.atualizar_paginacao()
+    
+    def ajustar_altura_pagina(self):
+        """Faz a página ter exatamente as linhas que cabem na tela (se o tamanho não foi fixado)"""
+        if self.pagina_pela_tela:
+            altura = self.altura_registros()
+            if altura != self._registros_por_pagina:
+                self._definir_tamanho_pagina(altura)
+    
+    @property
+    def registros_selecionados(self) -> SelecaoRegistros:
+        """Posições (em arquivo.movimentos) dos registros selecionados"""
+        return self._selecao
+    
+    @registros_selecionados.setter
+    def registros_selecionados(self, indices):
+        self._selecao.clear()
+        self._selecao.marcar(indices)
+    
     def aplicar_filtros(self, registros):
         """Aplica os filtros configurados aos registros"""
         if not self.filtros:
             return registros
         
-        registros_filtrados = []
-        for registro in registros:
-            manter = True
-            
-            # Filtro por adquirente
-            if 'adquirente' in self.filtros and self.filtros['adquirente']:
-                if registro.codigo_adquirente != self.filtros['adquirente']:
-                    manter = False
-            
-            # Filtro por data
-            if 'data' in self.filtros and self.filtros['data']:
-                if registro.data_movimento != self.filtros['data']:
-                    manter = False
-            
-            # Filtro por cartão
-            if 'cartao' in self.filtros and self.filtros['cartao']:
-                if self.filtros['cartao'] not in registro.numero_cartao:
-                    manter = False
-            
-            # Filtro por CVNSU
-            if 'cvnsu' in self.filtros and self.filtros['cvnsu']:
-                if self.filtros['cvnsu'] not in registro.cvnsu:
-                    manter = False
-            
-            if manter:
-                registros_filtrados.append(registro)
-        
-        return registros_filtrados
+        return [registro for registro in registros if registro_passa(registro, self.filtros)]
     
-    def obter_registros_pagina(self):
-        """Obtém os registros da página atual"""
-        # Aplicar filtros aos registros
-        registros_filtrados = self.aplicar_filtros(self.arquivo.movimentos)
-        
-        # Calcular índices de início e fim para a página atual
+    def indices_visiveis(self):
+        """Índices globais (em arquivo.movimentos) dos registros que passam pelos filtros"""
+        return self.visao.indices(self.filtros)
+    
+    def indices_pagina(self):
+        """Índices globais dos registros da página atual"""
         inicio = self.pagina_atual * self.registros_por_pagina
-        fim = inicio + self.registros_por_pagina
-        
-        # Retornar registros da página atual
-        return registros_filtrados[inicio:fim]
+        return self.indices_visiveis()[inicio:inicio + self.registros_por_pagina]
+    
+    def indice_cursor(self):
+        """Posição em arquivo.movimentos do registro sob o cursor (None se a página estiver vazia)"""
+        indices = self.indices_pagina()
+        return indices[self.cursor_pos] if self.cursor_pos < len(indices) else None
+    
+    def obter_registros_pagina(self):
+        """Obtém os registros da página atual (só a página é lida, a filtragem fica em cache)"""
+        movimentos = self.arquivo.movimentos
+        return [movimentos[indice] for indice in self.indices_pagina()]
+    
+    def atualizar_paginacao(self):
+        """Recalcula o total de registros visíveis e de páginas, mantendo página e cursor no intervalo"""
+        self.total_registros = len(self.indices_visiveis())
+        self.total_paginas = max(1, (self.total_registros + self.registros_por_pagina - 1) // self.registros_por_pagina)
+        if self.pagina_atual >= self.total_paginas:
+            self.pagina_atual = self.total_paginas - 1
+        tamanho_pagina = len(self.indices_pagina())
+        if self.cursor_pos >= tamanho_pagina:
+            self.cursor_pos = max(0, tamanho_pagina - 1)
     
     def gerar_cabecalho(self):
         """Gera o cabeçalho da tabela"""
+        self.ajustar_altura_pagina()
         linhas = []
         
         # Título
@@ -121,43 +182,109 @@ class PlanilhaRegistros:
         
         return resultado
     
+    def altura_registros(self) -> int:
+        """Quantidade de linhas de registros que cabem na tela, descontando cabeçalho e rodapé"""
+        return max(1, shutil.get_terminal_size().lines - ALTURA_CABECALHO - ALTURA_RODAPE)
+    
+    def _sincronizar_celulas(self):
+        """Descarta as células formatadas se os registros mudaram desde a formatação
+        
+        Alterações de um só registro já foram descontadas por linha_alterada; aqui
+        chegam as que mudam as posições (inclusões e exclusões) ou que não foram
+        acompanhadas, e aí todas as células são descartadas.
+        """
+        versao = getattr(self.arquivo, 'versao', None)
+        if (versao != self._versao_celulas or self.arquivo.movimentos is not self._movimentos_celulas
+                or len(self._celulas) > LIMITE_CELULAS):
+            self._celulas.clear()
+            self._linhas_montadas.clear()
+            self._versao_celulas = versao
+            self._movimentos_celulas = self.arquivo.movimentos
+    
+    def celulas_registro(self, indice: int) -> str:
+        """Colunas de dados do registro (adquirente a CVNSU) já formatadas, calculadas uma vez por versão"""
+        texto = self._celulas.get(indice)
+        if texto is None:
+            registro = self.arquivo.movimentos[indice]
+            texto = (f"{registro.codigo_adquirente:^12}"
+                     f"{registro.data_movimento:^10}"
+                     f"{registro.numero_cartao.strip():^22}"
+                     f"R$ {registro.get_valor_decimal():^10.2f}"
+                     f"{registro.cvnsu.strip():^11}")
+            self._celulas[indice] = texto
+        return texto
+    
+    # Acompanhamento das alterações do arquivo (chamados logo depois de cada alteração)
+    
+    def linha_alterada(self, indice: int, anterior: str, nova: str):
+        """Descarta só as células e as linhas montadas do registro alterado"""
+        if (self._versao_celulas == self.arquivo.versao - 1
+                and self._movimentos_celulas is self.arquivo.movimentos):
+            self._versao_celulas = self.arquivo.versao
+            self._celulas.pop(indice, None)
+            self._linhas_montadas = {estado: linha for estado, linha in self._linhas_montadas.items()
+                                     if estado[0] != indice}
+    
+    # Inclusões e exclusões mudam as posições: a versão fica para trás e
+    # _sincronizar_celulas descarta tudo na próxima exibição
+    
+    def inserido(self, indice: int, linha: str):
+        pass
+    
+    def excluido(self, indice: int, linha: str):
+        pass
+    
+    def mascara_mantida(self, mascara: bytes):
+        pass
+    
+    def mascara_restaurada(self, mascara: bytes):
+        pass
+    
+    def _montar_linha(self, indice: int, selecionado: bool, com_cursor: bool) -> list:
+        """Fragmentos (estilo, texto) de uma linha da área de registros; o número é a posição no arquivo"""
+        estilo = ESTILOS['item_selecionado'] if com_cursor else ESTILOS['texto_normal']
+        return [
+            (estilo, f"{indice:^5}"),
+            (estilo, f"{'✓' if selecionado else ' ':^5}"),
+            (estilo, self.celulas_registro(indice)),
+            ('', '\n'),
+        ]
+    
     def gerar_registros(self):
-        """Gera a área de registros da tabela (parte paginada)"""
-        # Obter registros da página atual
-        registros_pagina = self.obter_registros_pagina()
-        
-        # Criar linhas formatadas para prompt_toolkit
-        linhas = []
-        
-        # Registros
-        for i, registro in enumerate(registros_pagina):
-            indice_global = self.pagina_atual * self.registros_por_pagina + i
-            selecionado = "✓" if indice_global in self.registros_selecionados else " "
-            
-            # Definir estilo baseado na posição do cursor
-            estilo = ESTILOS['item_selecionado'] if i == self.cursor_pos else ESTILOS['texto_normal']
-            
-            linha = [
-                (estilo, f"{indice_global:^5}"),
-                (estilo, f"{selecionado:^5}"),
-                (estilo, f"{registro.codigo_adquirente:^12}"),
-                (estilo, f"{registro.data_movimento:^10}"),
-                (estilo, f"{registro.numero_cartao.strip():^22}"),
-                (estilo, f"R$ {registro.get_valor_decimal():^10.2f}"),
-                (estilo, f"{registro.cvnsu.strip():^11}")
-            ]
-            linhas.append(linha)
+        """Gera a área de registros da tabela (parte paginada)
+        
+        Só as linhas da página que cabem na tela são geradas. Cada linha montada
+        é guardada pelo seu estado (registro, seleção, cursor): ao mover o cursor,
+        só as duas linhas que mudaram de estado são montadas de novo.
+        """
+        self.ajustar_altura_pagina()
+        indices = self.indices_pagina()
+        altura = self.altura_registros()
+        
+        # Rolar a parte visível da página para manter o cursor na tela
+        if self.cursor_pos < self.primeira_visivel:
+            self.primeira_visivel = self.cursor_pos
+        elif self.cursor_pos >= self.primeira_visivel + altura:
+            self.primeira_visivel = self.cursor_pos - altura + 1
+        self.primeira_visivel = max(0, min(self.primeira_visivel, len(indices) - altura))
         
         # Se não houver registros, mostrar mensagem
-        if not registros_pagina:
-            linhas.append([(ESTILOS['texto_erro'], "Nenhum registro encontrado")])
+        if not indices:
+            return [(ESTILOS['texto_erro'], "Nenhum registro encontrado"), ('', '\n')]
         
-        # Formatar como uma única lista plana de tuplas (estilo, texto)
+        self._sincronizar_celulas()
+        anteriores = self._linhas_montadas
+        montadas = {}
         resultado = []
-        for linha in linhas:
-            if linha:  # Se a linha não estiver vazia
-                resultado.extend(linha)
-            resultado.append(('', '\n'))  # Adicionar quebra de linha após cada linha
+        selecao = self.registros_selecionados
+        for i in range(self.primeira_visivel, min(len(indices), self.primeira_visivel + altura)):
+            estado = (indices[i], indices[i] in selecao, i == self.cursor_pos)
+            linha = anteriores.get(estado)
+            if linha is None:
+                linha = self._montar_linha(*estado)
+            montadas[estado] = linha
+            resultado.extend(linha)
+        self._linhas_montadas = montadas
         
         return resultado
     
@@ -178,14 +305,21 @@ class PlanilhaRegistros:
             filtros_ativos = ", ".join([f"{k}={v}" for k, v in self.filtros.items()])
             linhas.append([(ESTILOS['texto_aviso'], f"Filtros ativos: {filtros_ativos}")])
         
-        linhas.append([])
+        # Linha do "ir para" em digitação ou do aviso do último salto
+        if self.modo_ir_para:
+            linhas.append([(ESTILOS['texto_destaque'], f"{DESTINOS_IR_PARA[self.modo_ir_para]}: {self.texto_ir_para}_  (Enter: ir | Esc: cancelar)")])
+        elif self.mensagem:
+            linhas.append([(ESTILOS['texto_aviso'], self.mensagem)])
+        else:
+            linhas.append([])
         
         # Ajustar mensagem de ajuda conforme o modo
         if self.modo_somente_leitura:
             linhas.append([(ESTILOS['ajuda'], "Teclas: ↑/↓: Navegar | PgUp/PgDn: Mudar página | Enter: Selecionar | q: Sair")])
+            linhas.append([(ESTILOS['ajuda'], "Home/End: Início/fim | 0-9: Ir para registro nº | v: Ir para valor | c: Ir para CVNSU")])
         else:
             linhas.append([(ESTILOS['ajuda'], "Teclas: ↑/↓: Navegar | PgUp/PgDn: Mudar página | Espaço: Selecionar | Enter: Menu | q: Sair")])
-            linhas.append([])
+            linhas.append([(ESTILOS['ajuda'], "Home/End: Início/fim | 0-9: Ir para registro nº | v: Ir para valor | c: Ir para CVNSU")])
             linhas.append([(ESTILOS['texto_aviso'], "Ações rápidas:")])
             linhas.append([(ESTILOS['ajuda'], "F2: Editar registro atual | F3: Excluir selecionados | F4: Manter selecionados")])
             linhas.append([(ESTILOS['ajuda'], "F5: Selecionar por valor | F6: Excluir por adquirente | F7: Salvar | F8: Salvar como")])
@@ -210,11 +344,9 @@ class PlanilhaRegistros:
     
     def navegar_cursor(self, direcao):
         """Navega o cursor na página atual"""
-        registros_pagina = self.obter_registros_pagina()
-        
         if direcao == "cima" and self.cursor_pos > 0:
             self.cursor_pos -= 1
-        elif direcao == "baixo" and self.cursor_pos < len(registros_pagina) - 1:
+        elif direcao == "baixo" and self.cursor_pos < len(self.indices_pagina()) - 1:
             self.cursor_pos += 1
         elif direcao == "pagina_cima":
             if self.pagina_atual > 0:
@@ -225,22 +357,98 @@ class PlanilhaRegistros:
                 self.pagina_atual += 1
                 self.cursor_pos = 0
     
+    def posicao_na_visao(self, indice: int):
+        """Posição do registro (índice em arquivo.movimentos) na visão filtrada, por busca binária
+        
+        Retorna (posição, exato): se o registro não passa pelos filtros, a posição
+        é a do próximo registro visível.
+        """
+        indices = self.indices_visiveis()
+        if isinstance(indices, range):
+            posicao = min(max(indice, 0), len(indices))
+        else:
+            posicao = bisect_left(indices, indice)
+        return posicao, posicao < len(indices) and indices[posicao] == indice
+    
+    def ir_para_posicao(self, posicao: int):
+        """Leva o cursor à posição informada da visão filtrada (limitada ao primeiro e ao último registro)"""
+        posicao = min(max(posicao, 0), max(0, len(self.indices_visiveis()) - 1))
+        self.pagina_atual, self.cursor_pos = divmod(posicao, self.registros_por_pagina)
+    
+    def ir_para_inicio(self):
+        self.ir_para_posicao(0)
+    
+    def ir_para_fim(self):
+        self.ir_para_posicao(len(self.indices_visiveis()) - 1)
+    
+    def ir_para_registro(self, indice: int) -> bool:
+        """Leva o cursor ao registro nº indice (a posição em arquivo.movimentos, coluna #)
+        
+        Se o registro não passa pelos filtros, o cursor vai para o próximo visível
+        e o retorno é False.
+        """
+        posicao, exato = self.posicao_na_visao(indice)
+        self.ir_para_posicao(posicao)
+        return exato
+    
+    def _ir_para_proximo(self, candidatos) -> bool:
+        """Leva o cursor ao próximo candidato visível depois do registro atual, voltando ao início"""
+        atual = self.indice_cursor()
+        inicio = 0 if atual is None else bisect_right(candidatos, atual)
+        for indice in chain(candidatos[inicio:], candidatos[:inicio]):
+            posicao, exato = self.posicao_na_visao(indice)
+            if exato:
+                self.ir_para_posicao(posicao)
+                return True
+        return False
+    
+    def ir_para_valor(self, valor) -> bool:
+        """Leva o cursor ao próximo registro com exatamente este valor de venda (consulta ao índice)"""
+        centavos = para_centavos(valor)
+        return self._ir_para_proximo(self.arquivo.indices_secundarios.iguais('valor_venda', f"{centavos:017d}"))
+    
+    def ir_para_cvnsu(self, trecho: str) -> bool:
+        """Leva o cursor ao próximo registro cujo CVNSU contém o trecho (consulta ao índice)"""
+        return self._ir_para_proximo(self.arquivo.indices_secundarios.contendo('cvnsu', trecho.strip()))
+    
+    def iniciar_ir_para(self, modo: str, texto: str = ""):
+        """Começa a digitação de um destino no rodapé"""
+        self.modo_ir_para = modo
+        self.texto_ir_para = texto
+        self.mensagem = ""
+    
+    def confirmar_ir_para(self):
+        """Vai para o destino digitado; se não houver, deixa um aviso no rodapé"""
+        modo, texto = self.modo_ir_para, self.texto_ir_para.strip()
+        self.modo_ir_para = None
+        self.texto_ir_para = ""
+        if not texto:
+            return
+        try:
+            if modo == 'registro':
+                encontrado = self.ir_para_registro(int(texto))
+            elif modo == 'valor':
+                encontrado = self.ir_para_valor(texto)
+            else:
+                encontrado = self.ir_para_cvnsu(texto)
+        except ValueError:
+            self.mensagem = f"Valor inválido: {texto}"
+            return
+        self.mensagem = "" if encontrado else f"{DESTINOS_IR_PARA[modo]} {texto}: não encontrado (com os filtros atuais)"
+    
     def alternar_selecao(self):
         """Alterna a seleção do registro atual"""
-        indice_global = self.pagina_atual * self.registros_por_pagina + self.cursor_pos
-        
-        if indice_global in self.registros_selecionados:
-            self.registros_selecionados.discard(indice_global)
-        else:
-            self.registros_selecionados.add(indice_global)
+        indice = self.indice_cursor()
+        if indice is not None:
+            self.registros_selecionados.alternar(indice)
     
     def selecionar_todos_visiveis(self):
         """Seleciona todos os registros visíveis na página atual"""
-        registros_pagina = self.obter_registros_pagina()
-        
-        for i in range(len(registros_pagina)):
-            indice_global = self.pagina_atual * self.registros_por_pagina + i
-            self.registros_selecionados.add(indice_global)
+        self.registros_selecionados.marcar(self.indices_pagina())
+    
+    def selecionar_todos_filtrados(self):
+        """Seleciona todos os registros que passam pelos filtros, em todas as páginas"""
+        self.registros_selecionados.marcar(self.indices_visiveis())
     
     def deselecionar_todos(self):
         """Deseleciona todos os registros"""
@@ -253,93 +461,148 @@ class PlanilhaRegistros:
         elif campo in self.filtros:
             del self.filtros[campo]
         
-        # Recalcular total de páginas após aplicar filtros
-        registros_filtrados = self.aplicar_filtros(self.arquivo.movimentos)
-        self.total_registros = len(registros_filtrados)
-        self.total_paginas = (self.total_registros + self.registros_por_pagina - 1) // self.registros_por_pagina
-        
-        # Ajustar página atual se necessário
-        if self.pagina_atual >= self.total_paginas:
-            self.pagina_atual = max(0, self.total_paginas - 1)
-        
-        # Resetar cursor
+        # Resetar cursor e recalcular total de páginas (a visão é refeita com os novos filtros)
         self.cursor_pos = 0
+        self.atualizar_paginacao()
     
     def obter_registros_selecionados(self):
         """Retorna os registros selecionados"""
-        return [self.arquivo.movimentos[i] for i in self.registros_selecionados if i < len(self.arquivo.movimentos)]
+        return [self.arquivo.movimentos[i] for i in self.registros_selecionados]
     
-    def executar(self):
-        """Executa a interface interativa da planilha usando prompt_toolkit"""
-        # Inicializar resultado
-        self.resultado = None
-        self.acao_executada = None
-        
-        # Criar bindings de teclas
+    def criar_atalhos(self) -> KeyBindings:
+        """Atalhos de teclado da planilha
+        
+        Com um "ir para" em digitação no rodapé só valem os dígitos (e os
+        separadores, para valores), Backspace, Enter e Esc: os comandos de uma
+        letra e as teclas de navegação e de função ficam desligados até o
+        destino ser confirmado ou cancelado.
+        """
         bindings = KeyBindings()
+        digitando = Condition(lambda: self.modo_ir_para is not None)
+        digitando_valor = Condition(lambda: self.modo_ir_para == 'valor')
         
-        @bindings.add('q')
+        @bindings.add('q', filter=~digitando)
         def _(event):
             """Sair da aplicação"""
             event.app.exit()
         
-        @bindings.add('up')
+        @bindings.add('up', filter=~digitando)
         def _(event):
             """Navegar para cima"""
             self.navegar_cursor("cima")
             event.app.invalidate()
         
-        @bindings.add('down')
+        @bindings.add('down', filter=~digitando)
         def _(event):
             """Navegar para baixo"""
             self.navegar_cursor("baixo")
             event.app.invalidate()
         
-        @bindings.add('pageup')
+        @bindings.add('pageup', filter=~digitando)
         def _(event):
             """Navegar para página anterior"""
             self.navegar_cursor("pagina_cima")
             event.app.invalidate()
         
-        @bindings.add('pagedown')
+        @bindings.add('pagedown', filter=~digitando)
         def _(event):
             """Navegar para próxima página"""
             self.navegar_cursor("pagina_baixo")
             event.app.invalidate()
         
-        @bindings.add(' ')
+        @bindings.add('home', filter=~digitando)
+        def _(event):
+            """Ir para o primeiro registro"""
+            self.ir_para_inicio()
+            event.app.invalidate()
+        
+        @bindings.add('end', filter=~digitando)
+        def _(event):
+            """Ir para o último registro"""
+            self.ir_para_fim()
+            event.app.invalidate()
+        
+        # Ir para: um dígito começa (ou continua) o número do registro; v e c, valor e CVNSU
+        for tecla in '0123456789':
+            @bindings.add(tecla)
+            def _(event):
+                """Digitar o destino"""
+                if self.modo_ir_para is None:
+                    self.iniciar_ir_para('registro')
+                self.texto_ir_para += event.data
+                event.app.invalidate()
+        
+        @bindings.add('v', filter=~digitando)
+        def _(event):
+            """Ir para um valor"""
+            self.iniciar_ir_para('valor')
+            event.app.invalidate()
+        
+        @bindings.add('c', filter=~digitando)
+        def _(event):
+            """Ir para um CVNSU"""
+            self.iniciar_ir_para('cvnsu')
+            event.app.invalidate()
+        
+        @bindings.add(',', filter=digitando_valor)
+        @bindings.add('.', filter=digitando_valor)
+        def _(event):
+            """Separadores do valor"""
+            self.texto_ir_para += event.data
+            event.app.invalidate()
+        
+        @bindings.add('backspace', filter=digitando)
+        def _(event):
+            """Apagar o último caractere do destino"""
+            self.texto_ir_para = self.texto_ir_para[:-1]
+            event.app.invalidate()
+        
+        @bindings.add('escape', filter=digitando)
+        def _(event):
+            """Cancelar o ir para"""
+            self.modo_ir_para = None
+            self.texto_ir_para = ""
+            event.app.invalidate()
+        
+        @bindings.add(' ', filter=~digitando)
         def _(event):
             """Alternar seleção"""
             self.alternar_selecao()
             event.app.invalidate()
         
-        @bindings.add('a')
+        @bindings.add('a', filter=~digitando)
         def _(event):
             """Selecionar todos os registros visíveis"""
             self.selecionar_todos_visiveis()
             event.app.invalidate()
         
-        @bindings.add('d')
+        @bindings.add('A', filter=~digitando)
+        def _(event):
+            """Selecionar todos os registros do filtro atual"""
+            self.selecionar_todos_filtrados()
+            event.app.invalidate()
+        
+        @bindings.add('d', filter=~digitando)
         def _(event):
             """Deselecionar todos os registros"""
             self.deselecionar_todos()
             event.app.invalidate()
         
         # Teclas de função para ações diretas
-        @bindings.add('f2')
+        @bindings.add('f2', filter=~digitando)
         def _(event):
             """Editar registro atual"""
             if self.modo_somente_leitura:
                 return
                 
-            # Obter índice global do registro sob o cursor
-            indice_global = self.pagina_atual * self.registros_por_pagina + self.cursor_pos
-            if indice_global < self.total_registros:
-                self.resultado = {"acao": "editar", "indice": indice_global}
+            # Posição no arquivo do registro sob o cursor
+            indice = self.indice_cursor()
+            if indice is not None:
+                self.resultado = {"acao": "editar", "indice": indice}
                 self.acao_executada = "editar"
                 event.app.exit()
         
-        @bindings.add('f3')
+        @bindings.add('f3', filter=~digitando)
         def _(event):
             """Excluir registros selecionados"""
             if self.modo_somente_leitura or not self.registros_selecionados:
@@ -350,7 +613,7 @@ class PlanilhaRegistros:
             self.acao_executada = "excluir"
             event.app.exit()
         
-        @bindings.add('f4')
+        @bindings.add('f4', filter=~digitando)
         def _(event):
             """Manter apenas registros selecionados"""
             if self.modo_somente_leitura or not self.registros_selecionados:
@@ -361,7 +624,7 @@ class PlanilhaRegistros:
             self.acao_executada = "manter"
             event.app.exit()
         
-        @bindings.add('f5')
+        @bindings.add('f5', filter=~digitando)
         def _(event):
             """Selecionar por valor"""
             if self.modo_somente_leitura:
@@ -371,7 +634,7 @@ class PlanilhaRegistros:
             self.acao_executada = "selecionar_por_valor"
             event.app.exit()
         
-        @bindings.add('f6')
+        @bindings.add('f6', filter=~digitando)
         def _(event):
             """Excluir por adquirente"""
             if self.modo_somente_leitura:
@@ -381,7 +644,7 @@ class PlanilhaRegistros:
             self.acao_executada = "excluir_por_adquirente"
             event.app.exit()
         
-        @bindings.add('f7')
+        @bindings.add('f7', filter=~digitando)
         def _(event):
             """Salvar arquivo"""
             if self.modo_somente_leitura:
@@ -391,7 +654,7 @@ class PlanilhaRegistros:
             self.acao_executada = "salvar"
             event.app.exit()
         
-        @bindings.add('f8')
+        @bindings.add('f8', filter=~digitando)
         def _(event):
             """Salvar como"""
             if self.modo_somente_leitura:
@@ -404,13 +667,19 @@ class PlanilhaRegistros:
         @bindings.add('enter')
         def _(event):
             """Exibir menu de operações ou selecionar registro"""
-            # Obter índice global do registro sob o cursor
-            indice_global = self.pagina_atual * self.registros_por_pagina + self.cursor_pos
+            # Confirmar o ir para em digitação
+            if self.modo_ir_para is not None:
+                self.confirmar_ir_para()
+                event.app.invalidate()
+                return
+            
+            # Posição no arquivo do registro sob o cursor
+            indice = self.indice_cursor()
             
             # No modo somente leitura, retornar o registro selecionado
             if self.modo_somente_leitura:
-                if indice_global < self.total_registros:
-                    self.resultado = {"selecionado": indice_global}
+                if indice is not None:
+                    self.resultado = {"selecionado": indice}
                     event.app.exit()
                 return
             
@@ -419,6 +688,19 @@ class PlanilhaRegistros:
                 self.resultado = {"acao": "menu_operacoes"}
             event.app.exit()
         
+        return bindings
+    
+    def executar(self):
+        """Executa a interface interativa da planilha usando prompt_toolkit"""
+        # Inicializar resultado
+        self.resultado = None
+        self.acao_executada = None
+        # Os registros podem ter mudado desde a última exibição (edição, exclusão, desfazer)
+        self.ajustar_altura_pagina()
+        self.atualizar_paginacao()
+        
+        bindings = self.criar_atalhos()
+        
         # Criar controles para cada seção
         cabecalho_control = FormattedTextControl(lambda: self.gerar_cabecalho())
         registros_control = FormattedTextControl(lambda: self.gerar_registros())
@@ -428,7 +710,7 @@ class PlanilhaRegistros:
         cabecalho_window = Window(
             content=cabecalho_control,
             wrap_lines=False,
-            height=5  # Altura fixa para o cabeçalho
+            height=ALTURA_CABECALHO  # Altura fixa para o cabeçalho
         )
         
         registros_window = Window(
@@ -439,7 +721,7 @@ class PlanilhaRegistros:
         rodape_window = Window(
             content=rodape_control,
             wrap_lines=False,
-            height=10  # Altura fixa para o rodapé
+            height=ALTURA_RODAPE  # Altura fixa para o rodapé
         )
         
         # Criar layout com áreas fixas e área paginada
@@ -592,31 +874,14 @@ class PlanilhaRegistros:
         if not confirmado:
             return
         
-        # Converter para lista ordenada decrescente para evitar problemas de índice
-        indices_ordenados = sorted(list(self.registros_selecionados), reverse=True)
-        
-        # Excluir registros
-        for indice in indices_ordenados:
-            if indice < len(self.arquivo.movimentos):
-                del self.arquivo.movimentos[indice]
-        
-        # Recalcular trailer
-        self.arquivo.recalcular_trailer()
+        # Excluir registros em uma passada (o trailer é atualizado junto)
+        self.arquivo.manter_mascara(self.registros_selecionados.mascara_nao_selecionados())
         
         # Limpar seleções
         self.registros_selecionados.clear()
         
-        # Atualizar total de registros e páginas
-        self.total_registros = len(self.arquivo.movimentos)
-        self.total_paginas = max(1, (self.total_registros + self.registros_por_pagina - 1) // self.registros_por_pagina)
-        
-        # Ajustar página atual e cursor se necessário
-        if self.pagina_atual >= self.total_paginas:
-            self.pagina_atual = max(0, self.total_paginas - 1)
-        
-        registros_pagina = self.obter_registros_pagina()
-        if self.cursor_pos >= len(registros_pagina):
-            self.cursor_pos = max(0, len(registros_pagina) - 1)
+        # Atualizar total de registros e páginas, ajustando página atual e cursor se necessário
+        self.atualizar_paginacao()
     
     def manter_apenas_selecionados(self):
         """Mantém apenas os registros selecionados, excluindo todos os demais"""
@@ -636,25 +901,16 @@ class PlanilhaRegistros:
         if not confirmado:
             return
         
-        # Obter registros selecionados
-        registros_para_manter = self.obter_registros_selecionados()
-        
-        # Substituir lista de movimentos
-        self.arquivo.movimentos = registros_para_manter
-        
-        # Recalcular trailer
-        self.arquivo.recalcular_trailer()
+        # Manter os selecionados em uma passada (o trailer é atualizado junto)
+        self.arquivo.manter_mascara(self.registros_selecionados.mascara())
         
         # Limpar seleções
         self.registros_selecionados.clear()
         
         # Atualizar total de registros e páginas
-        self.total_registros = len(self.arquivo.movimentos)
-        self.total_paginas = max(1, (self.total_registros + self.registros_por_pagina - 1) // self.registros_por_pagina)
-        
-        # Ajustar página atual e cursor
         self.pagina_atual = 0
         self.cursor_pos = 0
+        self.atualizar_paginacao()
 
 
 def exibir_planilha_registros(arquivo_movimentacao, modo_somente_leitura=False):
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registros de largura fixa do arquivo de movimentação financeira (Header, Movimento e Trailer)
+"""
+
+from leitor_movimentacao import CAMPOS_HEADER, CAMPOS_MOVIMENTO, CAMPOS_TRAILER, CODIFICACAO
+from dinheiro import para_centavos
+
+
+def validar_texto(texto: str, descricao: str):
+    """Recusa, antes de qualquer alteração, texto que não pode ser gravado no arquivo"""
+    if texto.isascii():
+        # Verificação em O(1): texto ASCII cabe em qualquer codificação de um byte por caractere
+        return
+    try:
+        texto.encode(CODIFICACAO)
+    except UnicodeEncodeError as e:
+        raise ValueError(f"{descricao} contém caractere não permitido no arquivo: '{texto[e.start]}'") from None
+
+
+def formatar_numero(valor: int, largura: int, descricao: str) -> str:
+    """Inteiro com zeros à esquerda para um campo numérico, recusado se negativo ou maior que o campo
+    
+    Sem a verificação, f"{valor:0{largura}d}" poria o sinal de um negativo dentro do campo.
+    """
+    if valor < 0:
+        raise ValueError(f"{descricao} não pode ser negativo: {valor}")
+    texto = f"{valor:0{largura}d}"
+    if len(texto) > largura:
+        raise ValueError(f"{descricao} não cabe em {largura} dígitos: {valor}")
+    return texto
+
+
+def _campo_registro(nome: str, inicio: int, fim: int):
+    """Cria a propriedade que lê (ou substitui) um campo diretamente na linha do registro"""
+    tamanho = fim - inicio
+    
+    def obter(self):
+        return self._linha[inicio:fim]
+    
+    def definir(self, valor):
+        if len(valor) != tamanho:
+            raise ValueError(f"Campo {nome} deve ter exatamente {tamanho} caracteres")
+        validar_texto(valor, f"Campo {nome}")
+        linha = self._linha
+        self._linha = linha[:inicio] + valor + linha[fim:]
+    
+    return property(obter, definir)
+
+
+class RegistroLinha:
+    """Base dos registros de largura fixa: guarda apenas a linha de 91 caracteres
+    
+    Os campos são propriedades que fatiam a linha quando lidos e a reconstroem
+    quando alterados, sem dicionário por instância.
+    """
+    
+    __slots__ = ('_linha',)
+    
+    def __init_subclass__(cls, campos=(), **kwargs):
+        super().__init_subclass__(**kwargs)
+        for nome, inicio, fim in campos:
+            setattr(cls, nome, _campo_registro(nome, inicio, fim))
+    
+    def __str__(self):
+        return self._linha
+
+
+class RegistroHeader(RegistroLinha, campos=CAMPOS_HEADER):
+    __slots__ = ()
+    
+    def __init__(self, linha: str):
+        if len(linha) != 91:
+            raise ValueError("Registro Header deve ter exatamente 91 caracteres")
+        validar_texto(linha, "Registro Header")
+        
+        self._linha = linha
+
+
+class RegistroMovimento(RegistroLinha, campos=CAMPOS_MOVIMENTO):
+    __slots__ = ()
+    
+    def __init__(self, linha: str):
+        if len(linha) != 91:
+            raise ValueError("Registro de Movimento deve ter exatamente 91 caracteres")
+        validar_texto(linha, "Registro de Movimento")
+        
+        self._linha = linha
+    
+    @classmethod
+    def criar_registro(cls, tipo='M', codigo_adquirente='00', data_movimento='00000000', 
+                      numero_cartao=' ' * 20, parcelas='00', valor_venda='0' * 17, 
+                      data_venda='00000000', cvnsu='0' * 9, zeros_fixos='00', 
+                      cpf_cnpj='0' * 15, numero_pedido='0' * 7):
+        """Cria um RegistroMovimento com parâmetros individuais"""
+        # Formatar os campos para garantir o tamanho correto
+        tipo = tipo.ljust(1)[:1]
+        codigo_adquirente = codigo_adquirente.ljust(2)[:2]
+        data_movimento = data_movimento.ljust(8)[:8]
+        numero_cartao = numero_cartao.ljust(20)[:20]
+        parcelas = parcelas.ljust(2)[:2]
+        valor_venda = valor_venda.rjust(17, '0')[:17]
+        data_venda = data_venda.ljust(8)[:8]
+        cvnsu = cvnsu.ljust(9)[:9]
+        zeros_fixos = zeros_fixos.ljust(2)[:2]
+        cpf_cnpj = cpf_cnpj.ljust(15)[:15]
+        numero_pedido = numero_pedido.ljust(7)[:7]
+        
+        # Construir a linha formatada
+        linha = (f"{tipo}{codigo_adquirente}{data_movimento}{numero_cartao}"
+                f"{parcelas}{valor_venda}{data_venda}{cvnsu}"
+                f"{zeros_fixos}{cpf_cnpj}{numero_pedido}")
+        
+        # Criar e retornar a instância
+        instancia = cls(linha)
+        return instancia
+    
+    def get_valor_decimal(self) -> float:
+        """Retorna o valor da venda como decimal"""
+        valor = int(self.valor_venda)
+        return valor / 100
+    
+    def set_valor_decimal(self, valor: float):
+        """Define o valor da venda a partir de um decimal (arredondado ao centavo)"""
+        self.set_valor_centavos(para_centavos(valor))
+    
+    def get_valor_centavos(self) -> int:
+        """Retorna o valor da venda em centavos"""
+        return int(self.valor_venda)
+    
+    def set_valor_centavos(self, valor_centavos: int):
+        """Define o valor da venda em centavos"""
+        self.valor_venda = formatar_numero(valor_centavos, 17, "Valor de venda")
+
+
+class RegistroTrailer(RegistroLinha, campos=CAMPOS_TRAILER):
+    __slots__ = ()
+    
+    def __init__(self, linha: str):
+        if len(linha) != 91:
+            raise ValueError("Registro Trailer deve ter exatamente 91 caracteres")
+        validar_texto(linha, "Registro Trailer")
+        
+        self._linha = linha
+    
+    def get_total_registros(self) -> int:
+        return int(self.total_registros)
+    
+    def set_total_registros(self, total: int):
+        self.total_registros = formatar_numero(total, 5, "Total de registros do trailer")
+    
+    def get_valor_total_decimal(self) -> float:
+        valor = int(self.valor_total)
+        return valor / 100
+    
+    def get_valor_total_centavos(self) -> int:
+        return int(self.valor_total)
+    
+    def set_valor_total_centavos(self, valor_centavos: int):
+        self.valor_total = formatar_numero(valor_centavos, 9, "Valor total do trailer")
+    
+    def set_valor_total_decimal(self, valor: float):
+        self.set_valor_total_centavos(para_centavos(valor))
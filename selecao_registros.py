@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Seleção de registros da planilha, guardada como máscara (um byte por registro)
+
+Cada registro é identificado pela sua posição em arquivo.movimentos, não pela
+posição na visão filtrada: trocar os filtros não muda o que está selecionado.
+A máscara acompanha as alterações do arquivo (inclusões, exclusões, exclusões
+em massa e o desfazer delas), então a marca continua no mesmo registro quando
+os outros mudam de posição. Marcar, desmarcar e consultar custam O(1); marcar
+todos os registros de um filtro percorre só os índices do filtro, sem montar
+um conjunto de inteiros.
+
+A máscara é a mesma usada por ArquivoMovimentacao.manter_mascara: manter ou
+excluir os selecionados é uma única chamada.
+"""
+
+from itertools import compress
+
+_INVERTER_MASCARA = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+
+class SelecaoRegistros:
+    """Registros selecionados de um ArquivoMovimentacao, com interface de conjunto de posições"""
+
+    def __init__(self, arquivo_movimentacao, indices=()):
+        self.arquivo = arquivo_movimentacao
+        self._mascara = bytearray(len(arquivo_movimentacao.movimentos))
+        self._quantidade = 0
+        self._versao = getattr(arquivo_movimentacao, 'versao', None)
+        self._movimentos = arquivo_movimentacao.movimentos
+        acompanhantes = getattr(arquivo_movimentacao, 'acompanhantes', None)
+        if acompanhantes is not None:
+            acompanhantes.add(self)
+        self.marcar(indices)
+
+    def _sincronizar(self):
+        """Descarta a seleção se os registros mudaram sem que a máscara pudesse acompanhar"""
+        movimentos = self.arquivo.movimentos
+        if (movimentos is not self._movimentos or len(self._mascara) != len(movimentos)
+                or self._versao != getattr(self.arquivo, 'versao', None)):
+            self._mascara = bytearray(len(movimentos))
+            self._quantidade = 0
+            self._movimentos = movimentos
+            self._versao = getattr(self.arquivo, 'versao', None)
+
+    # Interface de conjunto de posições
+
+    def __len__(self):
+        self._sincronizar()
+        return self._quantidade
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __contains__(self, indice) -> bool:
+        self._sincronizar()
+        return 0 <= indice < len(self._mascara) and self._mascara[indice] == 1
+
+    def __iter__(self):
+        """Posições selecionadas, em ordem crescente"""
+        self._sincronizar()
+        return compress(range(len(self._mascara)), self._mascara)
+
+    def add(self, indice: int):
+        self._sincronizar()
+        if not self._mascara[indice]:
+            self._mascara[indice] = 1
+            self._quantidade += 1
+
+    def discard(self, indice: int):
+        self._sincronizar()
+        if 0 <= indice < len(self._mascara) and self._mascara[indice]:
+            self._mascara[indice] = 0
+            self._quantidade -= 1
+
+    def clear(self):
+        self._sincronizar()
+        self._mascara = bytearray(len(self._mascara))
+        self._quantidade = 0
+
+    def alternar(self, indice: int) -> bool:
+        """Inverte a seleção de um registro; retorna se ficou selecionado"""
+        if indice in self:
+            self.discard(indice)
+            return False
+        self.add(indice)
+        return True
+
+    def marcar(self, indices):
+        """Seleciona as posições informadas (range, array ou qualquer iterável de índices)"""
+        self._sincronizar()
+        mascara = self._mascara
+        if isinstance(indices, range) and indices.step == 1:
+            # Um intervalo contíguo, como o arquivo inteiro sem filtros, é uma só atribuição
+            inicio, fim, _ = slice(indices.start, indices.stop).indices(len(mascara))
+            mascara[inicio:fim] = b'\x01' * max(0, fim - inicio)
+        else:
+            for indice in indices:
+                mascara[indice] = 1
+        self._quantidade = mascara.count(1)
+
+    def mascara(self) -> bytes:
+        """Máscara dos selecionados (1) para ArquivoMovimentacao.manter_mascara"""
+        self._sincronizar()
+        return bytes(self._mascara)
+
+    def mascara_nao_selecionados(self) -> bytes:
+        """Máscara dos não selecionados (1), para excluir os selecionados com manter_mascara"""
+        return self.mascara().translate(_INVERTER_MASCARA)
+
+    # Acompanhamento das alterações do arquivo (chamados logo depois de cada alteração)
+
+    def _acompanhar(self) -> bool:
+        """Indica se a máscara estava em dia antes da alteração que o arquivo acabou de fazer"""
+        em_dia = (self._versao == self.arquivo.versao - 1 and self._movimentos is self.arquivo.movimentos)
+        self._versao = self.arquivo.versao
+        if not em_dia:
+            self._mascara = bytearray(len(self.arquivo.movimentos))
+            self._quantidade = 0
+            self._movimentos = self.arquivo.movimentos
+        return em_dia
+
+    def linha_alterada(self, indice: int, anterior: str, nova: str):
+        self._acompanhar()
+
+    def inserido(self, indice: int, linha: str):
+        if self._acompanhar():
+            self._mascara.insert(indice, 0)
+
+    def excluido(self, indice: int, linha: str):
+        if self._acompanhar():
+            self._quantidade -= self._mascara.pop(indice)
+
+    def mascara_mantida(self, mascara: bytes):
+        if self._acompanhar() and len(mascara) == len(self._mascara):
+            self._mascara = bytearray(compress(self._mascara, mascara))
+            self._quantidade = self._mascara.count(1)
+
+    def mascara_restaurada(self, mascara: bytes):
+        """Reintercala posições não selecionadas onde os registros removidos voltaram"""
+        if self._acompanhar():
+            origens = (iter(bytes(mascara.count(0))), iter(self._mascara))
+            self._mascara = bytearray(map(next, map(origens.__getitem__, mascara)))
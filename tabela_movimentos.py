@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Representação colunar dos registros de movimento
+
+Cada campo do registro M é guardado em uma coluna contígua: valores em centavos
+como inteiros de 64 bits, códigos e datas como vetores de inteiros pequenos e
+cartão, CVNSU, CPF/CNPJ e pedido como blocos de bytes de largura fixa. Filtros,
+totais e exclusões em massa operam sobre as colunas inteiras, sem percorrer
+objetos Python registro a registro.
+"""
+
+import re
+from array import array
+from itertools import compress
+
+from dinheiro import para_centavos
+from registros_movimentacao import validar_texto, formatar_numero
+from leitor_movimentacao import TAMANHO_REGISTRO, REGISTROS_POR_BLOCO
+
+# Colunas da tabela: (campo, início, fim, tipo do vetor ou None para bytes de largura fixa)
+COLUNAS = (
+    ('codigo_adquirente', 1, 3, 'B'),
+    ('data_movimento', 3, 11, 'I'),
+    ('numero_cartao', 11, 31, None),
+    ('parcelas', 31, 33, 'B'),
+    ('valor_venda', 33, 50, 'q'),
+    ('data_venda', 50, 58, 'I'),
+    ('cvnsu', 58, 67, None),
+    ('zeros_fixos', 67, 69, None),
+    ('cpf_cnpj', 69, 84, None),
+    ('numero_pedido', 84, 91, None),
+)
+
+_INVERTER_MASCARA = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+_NAO_DIGITO = re.compile(rb'[^0-9]')
+_SEQUENCIAS_MANTIDAS = re.compile(rb'\x01+')
+_SEQUENCIAS = re.compile(rb'\x00+|\x01+')
+
+# Acima desta fração de sequências por linha a máscara é considerada fragmentada e
+# as colunas são comprimidas inteiras em vez de copiadas trecho a trecho
+FRACAO_FRAGMENTADA = 1 / 64
+
+# Máscara de exclusão: linhas excluídas viram 0x80, que não ocorre nas colunas ASCII
+_MARCAR_EXCLUIDAS = bytes.maketrans(b'\x00\x01', b'\x80\x00')
+_BYTES_MARCADOS = bytes(range(0x80, 0x100))
+
+
+def _comprimir_bytes(coluna, largura: int, mascara: bytes) -> bytearray:
+    """Comprime uma coluna de bytes de largura fixa pela máscara, sem laço por linha
+
+    A máscara é expandida para a largura da coluna (0x80 nas linhas excluídas),
+    combinada com a coluna por um OU entre inteiros e os bytes marcados são
+    removidos por translate; como as colunas são ASCII, só as linhas excluídas
+    têm o bit alto ligado.
+    """
+    tamanho = len(coluna)
+    marcas = mascara.translate(_MARCAR_EXCLUIDAS)
+    expandida = bytearray(tamanho)
+    for deslocamento in range(largura):
+        expandida[deslocamento::largura] = marcas
+    combinada = int.from_bytes(coluna, 'little') | int.from_bytes(expandida, 'little')
+    return bytearray(combinada.to_bytes(tamanho, 'little').translate(None, _BYTES_MARCADOS))
+
+
+def _numeros(dados: bytes, largura: int, campo: str, tipo: str) -> array:
+    """Converte uma coluna numérica de largura fixa em vetor de inteiros
+
+    Só aceita dígitos: um campo com espaços ou sinal seria regravado em outro
+    formato ao salvar (int(' 12') volta como '0012'), alterando bytes que o
+    usuário não editou. Nesse caso o arquivo é recusado com a posição do campo.
+    """
+    if dados and not dados.isdigit():
+        invalido = _NAO_DIGITO.search(dados)
+        linha = invalido.start() // largura
+        valor = dados[linha * largura:(linha + 1) * largura].decode('latin-1')
+        raise ValueError(f"Campo numérico inválido na coluna {campo} do registro de movimento {linha + 1}: "
+                         f"'{valor}' (use o armazenamento 'lista' ou 'mmap' para preservar o campo como está)")
+    return array(tipo, map(int, re.findall(b'.{%d}' % largura, dados, re.S)))
+
+
+def _linhas(dados: bytes, largura: int):
+    """Itera as linhas de um bloco de bytes de largura fixa"""
+    return map(dados.__getitem__, map(slice, range(0, len(dados), largura), range(largura, len(dados) + largura, largura)))
+
+
+def _propriedade_coluna(nome: str):
+    """Cria a propriedade que lê e grava o campo diretamente na coluna da tabela"""
+
+    def obter(self):
+        return self._tabela.valor_campo(nome, self._indice)
+
+    def definir(self, valor):
+        self._tabela.definir_campo(nome, self._indice, valor)
+
+    return property(obter, definir)
+
+
+class RegistroMovimentoColunar:
+    """Visão de uma linha da tabela com a mesma interface de RegistroMovimento
+
+    A visão guarda apenas a posição da linha; por isso só é válida até a próxima
+    alteração estrutural (exclusão ou inserção) da tabela.
+    """
+
+    __slots__ = ('_tabela', '_indice')
+
+    tipo = 'M'
+
+    def __init__(self, tabela, indice: int):
+        self._tabela = tabela
+        self._indice = indice
+
+    def get_valor_decimal(self) -> float:
+        """Retorna o valor da venda como decimal"""
+        return self._tabela.colunas['valor_venda'][self._indice] / 100
+
+    def set_valor_decimal(self, valor: float):
+        """Define o valor da venda a partir de um decimal (arredondado ao centavo)"""
+        self.set_valor_centavos(para_centavos(valor))
+
+    def get_valor_centavos(self) -> int:
+        """Retorna o valor da venda em centavos"""
+        return self._tabela.colunas['valor_venda'][self._indice]
+
+    def set_valor_centavos(self, valor_centavos: int):
+        """Define o valor da venda em centavos"""
+        formatar_numero(valor_centavos, 17, "Valor de venda")
+        self._tabela.colunas['valor_venda'][self._indice] = valor_centavos
+
+    def __str__(self):
+        return self._tabela.linha(self._indice)
+
+
+for _nome, _inicio, _fim, _tipo in COLUNAS:
+    setattr(RegistroMovimentoColunar, _nome, _propriedade_coluna(_nome))
+del _nome, _inicio, _fim, _tipo
+
+
+class TabelaMovimentos:
+    """Tabela colunar de registros de movimento
+
+    Pode ser usada no lugar da lista de ``RegistroMovimento`` de ``ArquivoMovimentacao``:
+    aceita acesso por índice e fatia, iteração, ``del``, ``append`` e ``insert``.
+    As operações em massa recebem máscaras (bytes com 0 ou 1 por linha).
+    """
+
+    def __init__(self):
+        """Cria uma tabela vazia"""
+        self.colunas = {}
+        self.larguras = {}
+        for campo, inicio, fim, tipo in COLUNAS:
+            self.colunas[campo] = array(tipo) if tipo else bytearray()
+            self.larguras[campo] = fim - inicio
+
+    @classmethod
+    def do_buffer(cls, buffer, tamanho_quadro: int, total: int, inicio: int = 0):
+        """Monta a tabela diretamente a partir de um buffer com registros M de tamanho fixo
+
+        Cada byte de um campo é copiado de todas as linhas de uma vez por uma
+        fatia com passo do tamanho do quadro (buffer[início + deslocamento::quadro]),
+        sem laço por linha.
+        """
+        tabela = cls()
+        limite = inicio + total * tamanho_quadro
+        for campo, ini, fim, tipo in COLUNAS:
+            largura = fim - ini
+            dados = bytearray(largura * total)
+            for deslocamento in range(largura):
+                dados[deslocamento::largura] = buffer[inicio + ini + deslocamento:limite:tamanho_quadro]
+            if tipo:
+                tabela.colunas[campo] = _numeros(dados, fim - ini, campo, tipo)
+            elif not dados.isascii():
+                # _comprimir_bytes e valor_campo contam com colunas ASCII
+                raise ValueError(f"Caractere não ASCII na coluna {campo} de um registro de movimento")
+            else:
+                tabela.colunas[campo] = bytearray(dados)
+        return tabela
+
+    @classmethod
+    def de_registros(cls, registros):
+        """Monta a tabela a partir de qualquer sequência de registros de movimento"""
+        linhas = [str(registro) for registro in registros]
+        buffer = ''.join(linhas).encode('ascii')
+        return cls.do_buffer(buffer, TAMANHO_REGISTRO, len(linhas))
+
+    def valor_campo(self, campo: str, indice: int) -> str:
+        """Retorna o campo de uma linha formatado como no arquivo"""
+        coluna = self.colunas[campo]
+        largura = self.larguras[campo]
+        if isinstance(coluna, array):
+            return f"{coluna[indice]:0{largura}d}"
+        return coluna[indice * largura:(indice + 1) * largura].decode('ascii')
+
+    def definir_campo(self, campo: str, indice: int, valor: str):
+        """Altera o campo de uma linha a partir do texto no formato do arquivo"""
+        coluna = self.colunas[campo]
+        largura = self.larguras[campo]
+        if len(valor) != largura:
+            raise ValueError(f"Campo {campo} deve ter exatamente {largura} caracteres")
+        validar_texto(valor, f"Campo {campo}")
+        if isinstance(coluna, array):
+            coluna[indice] = _numeros(valor.encode('latin-1'), largura, campo, coluna.typecode)[0]
+        else:
+            coluna[indice * largura:(indice + 1) * largura] = valor.encode('ascii')
+
+    def linha(self, indice: int) -> str:
+        """Reconstrói a linha de 91 caracteres de um registro"""
+        return 'M' + ''.join(self.valor_campo(campo, indice) for campo, _, _, _ in COLUNAS)
+
+    def serializar(self, registros_por_bloco: int = REGISTROS_POR_BLOCO):
+        """Produz as linhas da tabela como blocos de bytes terminados em LF
+
+        Cada coluna é formatada de uma vez para o bloco e copiada para as suas
+        posições nas linhas por atribuição de fatias com passo, sem montar as
+        linhas uma a uma.
+        """
+        tamanho_quadro = TAMANHO_REGISTRO + 1
+        total = len(self)
+        for inicio in range(0, total, registros_por_bloco):
+            fim = min(total, inicio + registros_por_bloco)
+            saida = bytearray(b'M' + bytes(TAMANHO_REGISTRO - 1) + b'\n') * (fim - inicio)
+            for campo, ini, fim_campo, tipo in COLUNAS:
+                largura = fim_campo - ini
+                coluna = self.colunas[campo]
+                if tipo:
+                    # Uma única formatação com % para o bloco inteiro da coluna
+                    dados = (f"%0{largura}d" * (fim - inicio) % tuple(coluna[inicio:fim])).encode('ascii')
+                else:
+                    dados = coluna[inicio * largura:fim * largura]
+                for deslocamento in range(largura):
+                    saida[ini + deslocamento::tamanho_quadro] = dados[deslocamento::largura]
+            yield bytes(saida)
+
+    def total_centavos(self) -> int:
+        """Soma dos valores de venda, em centavos"""
+        return sum(self.colunas['valor_venda'])
+
+    def mascara_igual(self, campo: str, valor: str) -> bytes:
+        """Máscara das linhas cujo campo é exatamente igual ao valor informado"""
+        coluna = self.colunas[campo]
+        if isinstance(coluna, array):
+            return bytes(map(int(valor).__eq__, coluna))
+        largura = self.larguras[campo]
+        mascara = self.mascara_contem(campo, valor) if len(valor) == largura else bytearray(len(self))
+        return bytes(mascara)
+
+    def mascara_contem(self, campo: str, texto: str) -> bytearray:
+        """Máscara das linhas cujo campo de texto contém o trecho informado"""
+        coluna = self.colunas[campo]
+        largura = self.larguras[campo]
+        if isinstance(coluna, array):
+            coluna = ''.join(self.valor_campo(campo, i) for i in range(len(self))).encode('ascii')
+        trecho = texto.encode('ascii')
+        mascara = bytearray(len(self))
+        posicao = coluna.find(trecho)
+        while posicao >= 0:
+            # Ignorar ocorrências que atravessam a fronteira entre duas linhas
+            if posicao % largura + len(trecho) <= largura:
+                mascara[posicao // largura] = 1
+            posicao = coluna.find(trecho, posicao + 1)
+        return mascara
+
+    @staticmethod
+    def inverter(mascara) -> bytes:
+        """Inverte uma máscara (linhas mantidas passam a ser excluídas e vice-versa)"""
+        return bytes(mascara).translate(_INVERTER_MASCARA)
+
+    def indices(self, mascara) -> list:
+        """Índices das linhas marcadas na máscara"""
+        return list(compress(range(len(self)), mascara))
+
+    def filtrar(self, mascara) -> 'TabelaMovimentos':
+        """Retorna uma nova tabela apenas com as linhas marcadas na máscara"""
+        if len(mascara) != len(self):
+            raise ValueError("A máscara deve ter uma posição para cada registro")
+        mascara = bytes(mascara)
+        tabela = TabelaMovimentos()
+        quantidade_sequencias = mascara.count(b'\x00\x01') + mascara.startswith(b'\x01')
+        if quantidade_sequencias > len(mascara) * FRACAO_FRAGMENTADA:
+            for campo, coluna in self.colunas.items():
+                if isinstance(coluna, array):
+                    tabela.colunas[campo] = array(coluna.typecode, compress(coluna, mascara))
+                else:
+                    tabela.colunas[campo] = _comprimir_bytes(coluna, self.larguras[campo], mascara)
+            return tabela
+        sequencias = [m.span() for m in _SEQUENCIAS_MANTIDAS.finditer(mascara)]
+        for campo, coluna in self.colunas.items():
+            largura = 1 if isinstance(coluna, array) else self.larguras[campo]
+            nova = tabela.colunas[campo]
+            for inicio, fim in sequencias:
+                nova.extend(coluna[inicio * largura:fim * largura])
+        return tabela
+
+    def manter(self, mascara):
+        """Mantém apenas as linhas marcadas na máscara, reconstruindo as colunas em uma passada"""
+        self.colunas = self.filtrar(mascara).colunas
+
+    def removidos(self, mascara) -> 'TabelaMovimentos':
+        """Linhas que manter(mascara) removeria, para restaurar depois"""
+        return self.filtrar(self.inverter(mascara))
+
+    def restaurar(self, mascara, removidos: 'TabelaMovimentos'):
+        """Desfaz manter(mascara), reintercalando as linhas removidas nas posições de origem
+
+        Cada posição da máscara indica de onde vem a próxima linha: das mantidas
+        (1) ou das removidas (0). Com a máscara fragmentada, as colunas são
+        empacotadas em linhas de bytes e intercaladas de uma vez por iteradores;
+        senão as sequências contíguas de cada coluna são copiadas inteiras.
+        """
+        mascara = bytes(mascara)
+        if len(mascara) != len(self) + len(removidos):
+            raise ValueError("A máscara deve ter uma posição para cada registro")
+        quantidade_sequencias = mascara.count(b'\x00\x01') + mascara.count(b'\x01\x00') + 1
+        if quantidade_sequencias > len(mascara) * FRACAO_FRAGMENTADA:
+            largura = sum(self._largura_bytes(campo) for campo in self.colunas)
+            origens = (_linhas(removidos._empacotar(), largura), _linhas(self._empacotar(), largura))
+            self._desempacotar(b''.join(map(next, map(origens.__getitem__, mascara))), len(mascara))
+            return
+
+        sequencias = [(m.start(), m.end() - m.start()) for m in _SEQUENCIAS.finditer(mascara)]
+        for campo, coluna in self.colunas.items():
+            largura = 1 if isinstance(coluna, array) else self.larguras[campo]
+            nova = array(coluna.typecode) if isinstance(coluna, array) else bytearray()
+            origens = (removidos.colunas[campo], coluna)
+            posicoes = [0, 0]
+            for inicio, tamanho in sequencias:
+                origem = mascara[inicio]
+                posicao = posicoes[origem]
+                nova.extend(origens[origem][posicao:posicao + tamanho * largura])
+                posicoes[origem] = posicao + tamanho * largura
+            self.colunas[campo] = nova
+
+    def _largura_bytes(self, campo: str) -> int:
+        """Bytes ocupados por linha na coluna"""
+        coluna = self.colunas[campo]
+        return coluna.itemsize if isinstance(coluna, array) else self.larguras[campo]
+
+    def _empacotar(self) -> bytearray:
+        """Junta as colunas em linhas de bytes de largura fixa (uma cópia por byte da linha)"""
+        larguras = [self._largura_bytes(campo) for campo in self.colunas]
+        largura_linha = sum(larguras)
+        linhas = bytearray(largura_linha * len(self))
+        posicao = 0
+        for coluna, largura in zip(self.colunas.values(), larguras):
+            dados = coluna.tobytes() if isinstance(coluna, array) else coluna
+            for deslocamento in range(largura):
+                linhas[posicao + deslocamento::largura_linha] = dados[deslocamento::largura]
+            posicao += largura
+        return linhas
+
+    def _desempacotar(self, linhas: bytes, total: int):
+        """Operação inversa de _empacotar: separa as linhas de bytes de volta nas colunas"""
+        larguras = [self._largura_bytes(campo) for campo in self.colunas]
+        largura_linha = sum(larguras)
+        posicao = 0
+        for (campo, coluna), largura in zip(list(self.colunas.items()), larguras):
+            dados = bytearray(largura * total)
+            for deslocamento in range(largura):
+                dados[deslocamento::largura] = linhas[posicao + deslocamento::largura_linha]
+            if isinstance(coluna, array):
+                nova = array(coluna.typecode)
+                nova.frombytes(dados)
+                dados = nova
+            self.colunas[campo] = dados
+            posicao += largura
+
+    def excluir(self, mascara):
+        """Exclui as linhas marcadas na máscara"""
+        self.manter(self.inverter(mascara))
+
+    @staticmethod
+    def _campos_linha(registro) -> list:
+        """Converte e confere todos os campos de um registro antes de qualquer coluna ser alterada
+
+        Retorna (campo, valor) na ordem de COLUNAS: inteiro nas colunas numéricas
+        e bytes nas de texto. Um campo inválido lança ValueError sem efeito na tabela.
+        """
+        linha = str(registro)
+        if len(linha) != TAMANHO_REGISTRO:
+            raise ValueError("Registro de Movimento deve ter exatamente 91 caracteres")
+        validar_texto(linha, "Registro de Movimento")
+        dados = linha.encode('ascii')
+        return [(campo, _numeros(dados[inicio:fim], fim - inicio, campo, tipo)[0] if tipo else dados[inicio:fim])
+                for campo, inicio, fim, tipo in COLUNAS]
+
+    def _inserir_linha(self, indice: int, registro):
+        """Insere as colunas de um registro na posição informada"""
+        for campo, valor in self._campos_linha(registro):
+            coluna = self.colunas[campo]
+            if isinstance(coluna, array):
+                coluna.insert(indice, valor)
+            else:
+                largura = self.larguras[campo]
+                coluna[indice * largura:indice * largura] = valor
+
+    def __len__(self):
+        return len(self.colunas['valor_venda'])
+
+    def __iter__(self):
+        for indice in range(len(self)):
+            yield RegistroMovimentoColunar(self, indice)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [RegistroMovimentoColunar(self, i) for i in range(len(self))[indice]]
+        return RegistroMovimentoColunar(self, range(len(self))[indice])
+
+    def __setitem__(self, indice, registro):
+        if isinstance(indice, slice):
+            raise TypeError("Atribuição por fatia não é suportada")
+        indice = range(len(self))[indice]
+        for campo, valor in self._campos_linha(registro):
+            coluna = self.colunas[campo]
+            if isinstance(coluna, array):
+                coluna[indice] = valor
+            else:
+                largura = self.larguras[campo]
+                coluna[indice * largura:(indice + 1) * largura] = valor
+
+    def __delitem__(self, indice):
+        mascara = bytearray(len(self))
+        if isinstance(indice, slice):
+            for i in range(len(self))[indice]:
+                mascara[i] = 1
+        else:
+            mascara[range(len(self))[indice]] = 1
+        self.excluir(mascara)
+
+    def insert(self, indice: int, registro):
+        if indice < 0:
+            indice += len(self)
+        self._inserir_linha(max(0, min(indice, len(self))), registro)
+
+    def append(self, registro):
+        self._inserir_linha(len(self), registro)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para o armazenamento de movimentos mapeado em memória
+"""
+
+import os
+import sys
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento, deletar_movimento
+from planilha_registros import PlanilhaRegistros
+
+
+class TesteArmazenamentoMmap(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.mmap"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+
+    def tearDown(self):
+        for caminho in (self.arquivo_teste, f"{self.arquivo_teste}.tmp"):
+            if os.path.exists(caminho):
+                os.unlink(caminho)
+
+    def test_mesmos_registros_da_lista(self):
+        """O armazenamento mapeado expõe os mesmos registros do carregamento em lista"""
+        lista = ArquivoMovimentacao(self.arquivo_teste)
+        mapeado = ArquivoMovimentacao(self.arquivo_teste, armazenamento='mmap')
+        mapeado.movimentos.validar()
+
+        self.assertEqual(len(mapeado.movimentos), len(lista.movimentos))
+        self.assertEqual([str(m) for m in mapeado.movimentos], [str(m) for m in lista.movimentos])
+        self.assertEqual(mapeado.movimentos[5].cvnsu, lista.movimentos[5].cvnsu)
+        self.assertEqual(mapeado.movimentos[-1].get_valor_decimal(), lista.movimentos[-1].get_valor_decimal())
+        self.assertEqual([str(m) for m in mapeado.movimentos[10:20]], [str(m) for m in lista.movimentos[10:20]])
+        self.assertEqual(str(mapeado.trailer), str(lista.trailer))
+
+    def test_edicao_exclusao_e_salvamento(self):
+        """Edições e exclusões sobrevivem ao salvamento sobre o próprio arquivo mapeado"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='mmap')
+        total_original = len(arquivo.movimentos)
+
+        arquivo.movimentos[0].set_valor_decimal(123.45)
+        arquivo.movimentos[1].codigo_adquirente = '99'
+        self.assertEqual(arquivo.movimentos[0].valor_venda, '00000000000012345')
+        with self.assertRaises(ValueError):
+            arquivo.movimentos[1].cvnsu = '123'
+
+        deletar_movimento(arquivo, 2)
+        del arquivo.movimentos[10:20]
+        arquivo.movimentos.append(RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='100'))
+        esperado = [str(m) for m in arquivo.movimentos]
+        self.assertEqual(len(esperado), total_original - 11 + 1)
+
+        arquivo.recalcular_trailer()
+        arquivo.salvar_arquivo()
+
+        recarregado = ArquivoMovimentacao(self.arquivo_teste)
+        self.assertEqual([str(m) for m in recarregado.movimentos], esperado)
+        self.assertEqual(recarregado.movimentos[1].codigo_adquirente, '99')
+
+    def test_serializacao_em_blocos(self):
+        """Os blocos copiados do mapeamento reproduzem as linhas, com LF ou CRLF no original"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='mmap')
+        arquivo.movimentos[3].codigo_adquirente = '77'
+        del arquivo.movimentos[40:45]
+        arquivo.movimentos.insert(7, RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='100'))
+        esperado = ''.join(str(m) + '\n' for m in arquivo.movimentos).encode('ascii')
+        for por_bloco in (1, 7, 8192):
+            self.assertEqual(b''.join(arquivo.movimentos.serializar(por_bloco)), esperado)
+
+        with open(self.arquivo_original, 'rb') as f:
+            conteudo_lf = f.read().replace(b'\r\n', b'\n')
+        for conteudo in (conteudo_lf, conteudo_lf.replace(b'\n', b'\r\n')):
+            with open(self.arquivo_teste, 'wb') as f:
+                f.write(conteudo)
+            arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='mmap')
+            self.assertEqual(b''.join(arquivo.serializar()), conteudo_lf)
+            arquivo.movimentos.fechar()
+
+    def test_planilha_sobre_mmap(self):
+        """A planilha pagina e filtra os registros mapeados sem alterações"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='mmap')
+        planilha = PlanilhaRegistros(arquivo)
+        self.assertEqual(len(planilha.obter_registros_pagina()), min(50, len(arquivo.movimentos)))
+
+        codigo = arquivo.movimentos[0].codigo_adquirente
+        planilha.configurar_filtro('adquirente', codigo)
+        self.assertTrue(all(r.codigo_adquirente == codigo for r in planilha.obter_registros_pagina()))
+
+    def test_abertura_confere_tipo_e_total(self):
+        """Como a lista, o mapeamento recusa trailer com soma divergente e registro de tipo errado"""
+        for exemplo in ("exemplo_correto.txt", "exemplo_movimentacao.txt"):
+            with self.subTest(arquivo=exemplo):
+                with self.assertRaisesRegex(ValueError, "não corresponde ao valor no Trailer"):
+                    ArquivoMovimentacao(exemplo, armazenamento='mmap')
+                # Dispensando a conferência, a divergência só aparece em validar()
+                arquivo = ArquivoMovimentacao()
+                arquivo.carregar_arquivo_mapeado(exemplo, validar=False)
+                with self.assertRaises(ValueError):
+                    arquivo.movimentos.validar()
+                arquivo.movimentos.fechar()
+
+        with open(self.arquivo_teste, 'r+b') as f:
+            conteudo = f.read()
+            f.seek(conteudo.index(b'\nM', conteudo.index(b'\nM') + 1) + 1)
+            f.write(b'X')
+        with self.assertRaisesRegex(ValueError, "linha 3 deveria ser do tipo Movimento"):
+            ArquivoMovimentacao(self.arquivo_teste, armazenamento='mmap')
+
+    def test_substituicao_descarta_a_versao_alterada(self):
+        """O registro substituído não deixa a versão alterada dele para a serialização e a restauração"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='mmap')
+        movimentos = arquivo.movimentos
+        quadro = movimentos._quadros[4]
+        movimentos[4].codigo_adquirente = '77'
+        self.assertIn(quadro, movimentos._editados)
+        arquivo.substituir_movimento(4, RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='100'))
+        self.assertNotIn(quadro, movimentos._editados)
+
+        esperado = [str(m) for m in movimentos]
+        arquivo.excluir_indices(range(0, 10))
+        arquivo.desfazer()
+        self.assertEqual([str(m) for m in movimentos], esperado)
+        self.assertEqual(b''.join(movimentos.serializar()), ''.join(linha + '\n' for linha in esperado).encode('ascii'))
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Armazenamento Mapeado em Memória")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteArmazenamentoMmap)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -42,8 +42,8 @@ T00002 0000471009999999999999999999999999999999999999999999999999999999999999999
         assert arquivo.trailer is not None, "Trailer não carregado"
         
         # Verificar valores
-        valor_total = sum(mov.get_valor_decimal() for mov in arquivo.movimentos)
-        assert abs(valor_total - arquivo.trailer.get_valor_total_decimal()) < 0.01, "Valores não batem"
+        valor_total = sum(mov.get_valor_centavos() for mov in arquivo.movimentos)
+        assert valor_total == arquivo.trailer.get_valor_total_centavos(), "Valores não batem"
         
         print("✓ Carregamento de arquivo: OK")
         return True
@@ -80,8 +80,8 @@ T00002 0000471009999999999999999999999999999999999999999999999999999999999999999
         arquivo.recalcular_trailer()
         
         # Verificar se o trailer foi atualizado corretamente
-        novo_valor_total = sum(mov.get_valor_decimal() for mov in arquivo.movimentos)
-        assert abs(novo_valor_total - arquivo.trailer.get_valor_total_decimal()) < 0.01, "Trailer não recalculado corretamente"
+        novo_valor_total = sum(mov.get_valor_centavos() for mov in arquivo.movimentos)
+        assert novo_valor_total == arquivo.trailer.get_valor_total_centavos(), "Trailer não recalculado corretamente"
         
         print("✓ Edição de registro: OK")
         return True
@@ -120,8 +120,8 @@ T00002 0000471009999999999999999999999999999999999999999999999999999999999999999
         assert len(arquivo.movimentos) == total_registros_original - 1, "Registro não deletado"
         assert arquivo.trailer.get_total_registros() == len(arquivo.movimentos), "Contagem de registros no trailer incorreta"
         
-        novo_valor_total = sum(mov.get_valor_decimal() for mov in arquivo.movimentos)
-        assert abs(novo_valor_total - arquivo.trailer.get_valor_total_decimal()) < 0.01, "Trailer não recalculado corretamente"
+        novo_valor_total = sum(mov.get_valor_centavos() for mov in arquivo.movimentos)
+        assert novo_valor_total == arquivo.trailer.get_valor_total_centavos(), "Trailer não recalculado corretamente"
         
         print("✓ Deleção de registro: OK")
         return True
@@ -208,11 +208,11 @@ T00003 0000571009999999999999999999999999999999999999999999999999999999999999999
         assert len(arquivo.movimentos) == 1, f"Número incorreto de registros mantidos: {len(arquivo.movimentos)}"
         
         # Verificar se o registro correto foi mantido
-        assert abs(arquivo.movimentos[0].get_valor_decimal() - 171.00) < 0.01, "Registro incorreto foi mantido"
+        assert arquivo.movimentos[0].get_valor_centavos() == 17100, "Registro incorreto foi mantido"
         
         # Verificar se o trailer foi atualizado corretamente
         assert arquivo.trailer.get_total_registros() == 1, "Contagem de registros no trailer incorreta"
-        assert abs(arquivo.trailer.get_valor_total_decimal() - 171.00) < 0.01, "Valor total no trailer incorreto"
+        assert arquivo.trailer.get_valor_total_centavos() == 17100, "Valor total no trailer incorreto"
         
         print("✓ Seleção por valor: OK")
         return True
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a busca por valor distribuída entre processos
+"""
+
+import sys
+import random
+import unittest
+from itertools import combinations
+from busca_paralela import buscar_em_paralelo, dividir_candidatos, maior_soma_combinada
+from conciliacao import buscar_mais_proximo
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento, RegistroTrailer, selecionar_por_valor
+
+
+class TesteBuscaParalela(unittest.TestCase):
+    def test_divisao_e_cruzamento_das_metades(self):
+        """As metades alternam os candidatos e o cruzamento acha a maior soma combinada"""
+        candidatos = [(1, 900), (3, 700), (4, 500), (2, 300), (0, 100)]
+        self.assertEqual(dividir_candidatos(candidatos), ([(1, 900), (4, 500), (0, 100)], [(3, 700), (2, 300)]))
+
+        def bitset(valores, alvo):
+            somas = {sum(c) for r in range(len(valores) + 1) for c in combinations(valores, r)}
+            return sum(1 << soma for soma in somas if soma <= alvo)
+
+        aleatorio = random.Random(41)
+        for _ in range(200):
+            primeira = [aleatorio.randint(1, 60) for _ in range(aleatorio.randint(0, 5))]
+            segunda = [aleatorio.randint(1, 60) for _ in range(aleatorio.randint(0, 5))]
+            alvo = aleatorio.randint(0, 200)
+            total, soma_primeira = maior_soma_combinada(bitset(primeira, alvo), bitset(segunda, alvo), alvo)
+            self.assertEqual(total, max(s for s in range(alvo + 1) if bitset(primeira + segunda, alvo) >> s & 1))
+            self.assertTrue(bitset(primeira, alvo) >> soma_primeira & 1)
+            self.assertTrue(bitset(segunda, alvo) >> (total - soma_primeira) & 1)
+
+    def test_compara_com_forca_bruta(self):
+        """O resultado é a combinação exata ou a maior soma que não passa do alvo"""
+        aleatorio = random.Random(31)
+        for _ in range(30):
+            valores = [aleatorio.choice([1998, 500, 1710, 3000, 1000, 250, 4322]) for _ in range(aleatorio.randint(1, 9))]
+            alvo = aleatorio.randint(1, 15000)
+            esperado = max(sum(c) for r in range(len(valores) + 1) for c in combinations(valores, r) if sum(c) <= alvo)
+            resultado = buscar_em_paralelo(valores, alvo, operacoes_minimas=0)
+            self.assertEqual(resultado['soma'], esperado)
+            self.assertEqual(sum(valores[i] for i in resultado['indices']), esperado)
+            self.assertEqual(resultado['exato'], esperado == alvo)
+
+    def test_concorda_com_a_busca_serial(self):
+        """Com muitos registros, exatidão e soma são as da busca serial"""
+        aleatorio = random.Random(37)
+        valores = [aleatorio.randint(1000, 500000) for _ in range(3000)]
+        # Alvo alcançado por uma metade sozinha, alvo que exige as duas metades e alvo sem combinação exata
+        poucos = [aleatorio.randint(1000, 50000) for _ in range(400)]
+        pares = [2 * valor for valor in poucos]
+        casos = [(valores, 4_567_891), (poucos, sum(poucos) * 9 // 10 + 1), (pares, sum(pares) * 9 // 10 + 1)]
+        for valores, alvo in casos:
+            with self.subTest(registros=len(valores), alvo=alvo):
+                _, soma_serial, _ = buscar_mais_proximo(valores, alvo)
+                resultado = buscar_em_paralelo(valores, alvo)
+                self.assertEqual((resultado['exato'], resultado['soma']), (soma_serial == alvo, soma_serial))
+                self.assertEqual(sum(valores[i] for i in resultado['indices']), soma_serial)
+                self.assertFalse(resultado['interrompida'])
+        self.assertFalse(resultado['exato'])
+
+    def test_tempo_esgotado_na_primeira_etapa(self):
+        """Com o tempo esgotado antes dos bitsets, volta a aproximação gulosa marcada como interrompida"""
+        aleatorio = random.Random(47)
+        # Valores pares e alvo ímpar: nunca há combinação exata
+        valores = [2 * aleatorio.randint(10 ** 4, 10 ** 5) for _ in range(3000)]
+        alvo = 2 * 10 ** 7 + 1
+        resultado = buscar_em_paralelo(valores, alvo, tempo_limite=0.01, operacoes_minimas=0)
+        self.assertTrue(resultado['interrompida'])
+        self.assertFalse(resultado['completa'])
+        self.assertFalse(resultado['exato'])
+        self.assertEqual(sum(valores[i] for i in resultado['indices']), resultado['soma'])
+        self.assertLessEqual(resultado['soma'], alvo)
+
+        resultado = buscar_em_paralelo(valores, alvo, tempo_limite=60, operacoes_minimas=0,
+                                       deve_cancelar=lambda: True)
+        self.assertTrue(resultado['interrompida'])
+
+    def test_memoria_insuficiente_usa_a_busca_serial(self):
+        """Se as metades não cabem no orçamento, a busca serial decide (sem piorar a exatidão)"""
+        aleatorio = random.Random(43)
+        valores = [aleatorio.randint(1000, 500000) for _ in range(3000)]
+        resultado = buscar_em_paralelo(valores, 4_567_891, limite_memoria=2 ** 20)
+        _, soma_serial, _ = buscar_mais_proximo(valores, 4_567_891, limite_memoria=2 ** 20)
+        self.assertEqual(resultado['soma'], soma_serial)
+        self.assertEqual(sum(valores[i] for i in resultado['indices']), soma_serial)
+
+    def test_backend_de_selecao_por_valor(self):
+        """selecionar_por_valor aceita a busca paralela como backend"""
+        arquivo = ArquivoMovimentacao.criar_arquivo_teste()
+        arquivo.movimentos = [RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda=str(valor))
+                              for valor in (17100, 30000, 10000)]
+        arquivo.trailer = RegistroTrailer("T00003 000057100" + "9" * 75)
+        selecionar_por_valor(arquivo, 400.00, backend='paralelo')
+        self.assertEqual(sorted(int(m.valor_venda) for m in arquivo.movimentos), [10000, 30000])
+        self.assertEqual(arquivo.trailer.get_total_registros(), 2)
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Busca Paralela")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteBuscaParalela)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a busca por valor em segundo plano
+"""
+
+import sys
+import random
+import unittest
+from unittest import mock
+from itertools import combinations
+from conciliacao import buscar_mais_proximo, soma_gulosa, preparar_aproximacao, LIMITE_CANDIDATOS_MEIO
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento, RegistroTrailer, selecionar_por_valor
+from busca_segundo_plano import BuscaEmSegundoPlano
+
+
+class TesteBuscaSegundoPlano(unittest.TestCase):
+    def verificar(self, valores, alvo, resultado):
+        """Confere que a combinação devolvida soma o informado sem passar do alvo"""
+        self.assertIsNotNone(resultado['indices'])
+        self.assertEqual(len(set(resultado['indices'])), len(resultado['indices']))
+        self.assertEqual(sum(valores[i] for i in resultado['indices']), resultado['soma'])
+        self.assertLessEqual(resultado['soma'], alvo)
+
+    def test_mais_proximo_compara_com_forca_bruta(self):
+        """A aproximação é a maior soma que não passa do alvo, pelo bitset e pelo encontro no meio"""
+        aleatorio = random.Random(19)
+        for limite_memoria in (None, 1):
+            for _ in range(100):
+                valores = [aleatorio.choice([1998, 500, 1710, 3000, 1000, 250, 4322]) for _ in range(aleatorio.randint(1, 9))]
+                alvo = aleatorio.randint(1, 15000)
+                esperado = max(sum(c) for r in range(len(valores) + 1) for c in combinations(valores, r) if sum(c) <= alvo)
+                indices, soma, _ = buscar_mais_proximo(valores, alvo, limite_memoria=limite_memoria)
+                self.assertEqual(soma, esperado)
+                self.assertEqual(sum(valores[i] for i in indices), soma)
+
+    def test_resultado_exato_em_processo_filho(self):
+        """O processo filho devolve a combinação exata e informa o progresso"""
+        valores = [17100, 30000, 10000, 2550, 4450]
+        progresso = []
+        busca = BuscaEmSegundoPlano(valores, 27100)
+        resultado = busca.executar(ao_progresso=lambda explorados, diferenca: progresso.append(diferenca))
+        self.verificar(valores, 27100, resultado)
+        self.assertTrue(resultado['exato'])
+        self.assertFalse(resultado['interrompida'])
+        self.assertTrue(progresso)
+
+    def test_orcamento_esgotado_devolve_aproximacao(self):
+        """Com o tempo esgotado a busca é interrompida e devolve a melhor aproximação"""
+        aleatorio = random.Random(29)
+        # Valores pares e alvo ímpar: nunca há combinação exata
+        valores = [2 * aleatorio.randint(10 ** 4, 10 ** 5) for _ in range(3000)]
+        alvo = 2 * 10 ** 7 + 1
+        resultado = BuscaEmSegundoPlano(valores, alvo, tempo_limite=0.05).executar()
+        self.verificar(valores, alvo, resultado)
+        self.assertFalse(resultado['exato'])
+        self.assertTrue(resultado['interrompida'])
+        self.assertGreater(resultado['soma'], 0)
+
+    def test_cancelamento(self):
+        """Cancelar pela função de consulta também devolve a aproximação"""
+        valores = [2 * v for v in range(10 ** 4, 10 ** 4 + 3000)]
+        alvo = 2 * 10 ** 7 + 1
+        resultado = BuscaEmSegundoPlano(valores, alvo, tempo_limite=60).executar(deve_cancelar=lambda: True)
+        self.verificar(valores, alvo, resultado)
+        self.assertTrue(resultado['interrompida'])
+
+    def test_sem_metodo_exaustivo_informa_busca_incompleta(self):
+        """Sem bitset nem encontro no meio dentro do limite, a aproximação gulosa vem marcada como incompleta"""
+        aleatorio = random.Random(31)
+        valores = [aleatorio.randint(10 ** 6, 10 ** 7) for _ in range(LIMITE_CANDIDATOS_MEIO + 16)]
+        alvo = sum(valores) // 2 + 1
+        candidatos, divisor, alvo_reduzido = preparar_aproximacao(valores, alvo)
+        _, soma_gulosa_esperada = soma_gulosa(candidatos, alvo_reduzido)
+        self.assertNotEqual(soma_gulosa_esperada, alvo_reduzido)
+
+        indices, soma, completa = buscar_mais_proximo(valores, alvo, limite_memoria=2 ** 16)
+        self.assertFalse(completa)
+        self.assertEqual(soma, soma_gulosa_esperada * divisor)
+        self.assertEqual(sum(valores[i] for i in indices), soma)
+
+        resultado = BuscaEmSegundoPlano(valores, alvo, limite_memoria=2 ** 16).executar()
+        self.verificar(valores, alvo, resultado)
+        self.assertFalse(resultado['completa'])
+        self.assertFalse(resultado['interrompida'])
+
+        # Com a busca exaustiva a falta da combinação exata é definitiva
+        self.assertTrue(buscar_mais_proximo([2000, 4000], 3000)[2])
+
+    def test_selecao_avisa_que_a_busca_exata_nao_rodou(self):
+        """A seleção por valor não afirma que a combinação exata não existe quando ela não foi buscada"""
+        arquivo = ArquivoMovimentacao.criar_arquivo_teste()
+        arquivo.movimentos = [RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda=str(valor))
+                              for valor in (17100, 30000, 10000)]
+        arquivo.trailer = RegistroTrailer("T00003 000057100" + "9" * 75)
+        incompleta = {'indices': [1], 'soma': 30000, 'exato': False, 'interrompida': False, 'completa': False}
+        with mock.patch('busca_segundo_plano.BuscaEmSegundoPlano.executar', return_value=incompleta), \
+                mock.patch('builtins.input', return_value='N'), mock.patch('builtins.print') as impressao:
+            selecionar_por_valor(arquivo, 400.00)
+        mensagens = ' '.join(str(chamada.args[0]) for chamada in impressao.call_args_list if chamada.args)
+        self.assertIn("Busca exata não realizada", mensagens)
+        self.assertNotIn("Nenhuma combinação", mensagens)
+        self.assertEqual(len(arquivo.movimentos), 3)
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Busca em Segundo Plano")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteBuscaSegundoPlano)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
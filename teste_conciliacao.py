@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para o motor de conciliação por valor (centavos inteiros)
+"""
+
+import sys
+import time
+import random
+import unittest
+from itertools import combinations
+from unittest import mock
+import conciliacao
+from conciliacao import (encontrar_subconjunto, enumerar_subconjuntos, melhores_subconjuntos,
+                         custos_por_criterio, escolher_metodo, somas_da_metade, MascarasPrefixo)
+from registros_movimentacao import RegistroMovimento
+
+
+def existe_subconjunto(valores, alvo):
+    """Verificação por força bruta para listas pequenas"""
+    return any(sum(c) == alvo for r in range(len(valores) + 1) for c in combinations(valores, r))
+
+
+class TesteConciliacao(unittest.TestCase):
+    def verificar(self, valores, alvo, indices):
+        """Confere que os índices são distintos e somam exatamente o alvo"""
+        self.assertIsNotNone(indices)
+        self.assertEqual(len(set(indices)), len(indices))
+        self.assertEqual(sum(valores[i] for i in indices), alvo)
+
+    def test_compara_com_forca_bruta(self):
+        """O motor encontra solução sempre que a força bruta encontra, e só nesses casos"""
+        aleatorio = random.Random(7)
+        for _ in range(200):
+            valores = [aleatorio.choice([1999, 500, 1710, 3000, 1000, 250, 4321, 99]) for _ in range(aleatorio.randint(1, 10))]
+            alvo = aleatorio.randint(1, 12000)
+            indices = encontrar_subconjunto(valores, alvo)
+            if existe_subconjunto(valores, alvo):
+                self.verificar(valores, alvo, indices)
+            else:
+                self.assertIsNone(indices)
+
+    def test_valores_exatos_em_centavos(self):
+        """Valores como 19,99 não sofrem truncamento"""
+        valores = [1999, 1999, 1, 5000]
+        self.verificar(valores, 3998, encontrar_subconjunto(valores, 3998))
+        self.assertIsNone(encontrar_subconjunto(valores, 3997 + 5000 + 3))
+
+    def test_complemento_e_casos_triviais(self):
+        """Alvos próximos do total, iguais ao total e zero"""
+        valores = [100 * i for i in range(1, 200)]
+        total = sum(valores)
+        self.verificar(valores, total - 300, encontrar_subconjunto(valores, total - 300))
+        self.assertEqual(sorted(encontrar_subconjunto(valores, total)), list(range(len(valores))))
+        self.assertEqual(encontrar_subconjunto(valores, 0), [])
+        self.assertIsNone(encontrar_subconjunto(valores, total + 100))
+        self.assertIsNone(encontrar_subconjunto(valores, 150))
+
+    def test_sem_estado_entre_chamadas(self):
+        """Chamadas sucessivas não compartilham memorização"""
+        self.assertIsNone(encontrar_subconjunto([300, 500], 700))
+        self.verificar([300, 400], 700, encontrar_subconjunto([300, 400], 700))
+
+    def test_limite_de_operacoes(self):
+        """Problemas acima do limite são recusados em vez de rodar indefinidamente"""
+        aleatorio = random.Random(3)
+        valores = [aleatorio.randint(1, 10 ** 6) for _ in range(500)]
+        with self.assertRaises(ValueError):
+            encontrar_subconjunto(valores, 10 ** 8 + 1, limite_operacoes=1000)
+
+    def test_bitset_compara_com_forca_bruta(self):
+        """O bitset concorda com a força bruta, inclusive com máscaras em pontos de verificação"""
+        aleatorio = random.Random(11)
+        for limite_memoria in (conciliacao.LIMITE_MEMORIA_MASCARAS, 1):
+            with mock.patch.object(conciliacao, 'LIMITE_MEMORIA_MASCARAS', limite_memoria):
+                for _ in range(150):
+                    valores = [aleatorio.choice([1999, 500, 1710, 3000, 1000, 250, 4321, 99]) for _ in range(aleatorio.randint(1, 10))]
+                    alvo = aleatorio.randint(1, 12000)
+                    indices = encontrar_subconjunto(valores, alvo, metodo='bitset')
+                    if existe_subconjunto(valores, alvo):
+                        self.verificar(valores, alvo, indices)
+                    else:
+                        self.assertIsNone(indices)
+
+    def test_mascaras_prefixo(self):
+        """As máscaras marcam exatamente as somas alcançáveis"""
+        mascaras = MascarasPrefixo([3, 5, 7], 20, parar_no_alvo=False)
+        alcancaveis = {s for s in range(21) if mascaras.alcancavel(s)}
+        self.assertEqual(alcancaveis, {0, 3, 5, 7, 8, 10, 12, 15})
+        posicoes = mascaras.reconstruir(12)
+        self.assertEqual(sum(mascaras.valores[p] for p in posicoes), 12)
+        self.assertIsNone(mascaras.reconstruir(4))
+
+    def test_bitset_em_escala(self):
+        """Milhares de registros e alvo de dezenas de milhares de reais em menos de um segundo"""
+        aleatorio = random.Random(5)
+        valores = [aleatorio.randint(1000, 500000) for _ in range(5000)]
+        alvo = 4_567_891  # R$ 45.678,91
+        inicio = time.perf_counter()
+        indices = encontrar_subconjunto(valores, alvo)
+        tempo = time.perf_counter() - inicio
+        self.verificar(valores, alvo, indices)
+        self.assertLess(tempo, 1.0)
+
+    def test_meio_compara_com_forca_bruta(self):
+        """O encontro no meio concorda com a força bruta"""
+        aleatorio = random.Random(17)
+        for _ in range(150):
+            valores = [aleatorio.choice([1999, 500, 1710, 3000, 1000, 250, 4321, 99]) for _ in range(aleatorio.randint(1, 10))]
+            alvo = aleatorio.randint(1, 12000)
+            indices = encontrar_subconjunto(valores, alvo, metodo='meio')
+            if existe_subconjunto(valores, alvo):
+                self.verificar(valores, alvo, indices)
+            else:
+                self.assertIsNone(indices)
+
+    def test_somas_da_metade(self):
+        """Somas de todos os subconjuntos em ordem, com a máscara dos itens"""
+        somas = somas_da_metade([5, 3, 4])
+        self.assertEqual([soma >> 3 for soma in somas], [0, 3, 4, 5, 7, 8, 9, 12])
+        self.assertEqual(somas[4] & 0b111, 0b110)
+
+    def test_meio_escolhido_para_alvos_altos(self):
+        """Poucos candidatos com alvo de centenas de milhares de reais usam o encontro no meio"""
+        aleatorio = random.Random(23)
+        valores = [aleatorio.randint(10 ** 6, 5 * 10 ** 7) for _ in range(30)]
+        alvo = sum(valores[::3])
+        candidatos = [(i, v) for i, v in enumerate(valores)]
+        self.assertEqual(escolher_metodo(candidatos, alvo), 'meio')
+        self.verificar(valores, alvo, encontrar_subconjunto(valores, alvo))
+
+    def test_enumeracao_completa_sem_repeticao(self):
+        """A enumeração gera exatamente os subconjuntos da força bruta, sem repetir"""
+        aleatorio = random.Random(13)
+        for _ in range(150):
+            valores = [aleatorio.choice([1999, 500, 1710, 3000, 1000, 250, 4321, 99]) for _ in range(aleatorio.randint(1, 9))]
+            alvo = aleatorio.randint(1, 12000)
+            esperado = sorted(c for r in range(1, len(valores) + 1) for c in combinations(range(len(valores)), r)
+                              if sum(valores[i] for i in c) == alvo)
+            self.assertEqual(sorted(tuple(c) for c in enumerar_subconjuntos(valores, alvo)), esperado)
+
+    def test_melhores_subconjuntos_por_custo(self):
+        """As k melhores combinações saem ordenadas pelo custo total"""
+        valores = [5000, 2500, 2500, 1000, 1000, 1000, 1000, 1000]
+        melhores = melhores_subconjuntos(valores, 5000, 3)
+        self.assertEqual(melhores[0], [0])
+        self.assertEqual([len(c) for c in melhores], [1, 2, 5])
+
+        # Registros do adquirente preferido vêm antes mesmo com mais registros
+        custos = [9, 9, 9, 1, 1, 1, 1, 1]
+        self.assertEqual(melhores_subconjuntos(valores, 5000, 1, custos), [[3, 4, 5, 6, 7]])
+
+    def test_custos_por_criterio(self):
+        """Critérios de ranqueamento a partir dos registros de movimento"""
+        movimentos = [RegistroMovimento.criar_registro(codigo_adquirente=adquirente, data_venda=data)
+                      for adquirente, data in [('46', '20250616'), ('03', '20250530'), ('46', '20250601')]]
+        self.assertEqual(custos_por_criterio(movimentos, 'menos_registros'), [1, 1, 1])
+        self.assertEqual(custos_por_criterio(movimentos, 'data_venda_antiga'), [3, 1, 2])
+        self.assertEqual(custos_por_criterio(movimentos, 'adquirente_preferido', '03'), [4, 1, 4])
+        with self.assertRaises(ValueError):
+            custos_por_criterio(movimentos, 'desconhecido')
+
+    def test_enumeracao_em_escala(self):
+        """Com milhares de registros a primeira combinação sai sem esperar as demais"""
+        aleatorio = random.Random(5)
+        valores = [aleatorio.randint(1000, 500000) for _ in range(3000)]
+        alvo = 4_567_891
+        inicio = time.perf_counter()
+        primeira = next(enumerar_subconjuntos(valores, alvo))
+        self.verificar(valores, alvo, primeira)
+        self.assertLess(time.perf_counter() - inicio, 5.0)
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Motor de Conciliação")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteConciliacao)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para o diário de operações e a recuperação da sessão
+"""
+
+import os
+import sys
+import glob
+import random
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento
+from diario_operacoes import compactar_mascara, expandir_mascara, caminho_diario
+
+
+class TesteDiarioOperacoes(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.diario_teste"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+
+    def tearDown(self):
+        for caminho in glob.glob(f"{self.arquivo_teste}*"):
+            os.unlink(caminho)
+
+    def editar_sessao(self, arquivo):
+        """Alterações de todos os tipos anotadas no diário"""
+        arquivo.definir_valor_venda(2, 1999)
+        arquivo.movimentos[5].cvnsu = '000000042'
+        arquivo.marcar_alterado(5)
+        arquivo.excluir_movimento(0)
+        arquivo.inserir_movimento(3, RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='100'))
+        arquivo.excluir_indices(range(10, 40, 3))
+        codigo = arquivo.movimentos[0].codigo_adquirente
+        arquivo.excluir_onde(lambda mov: mov.codigo_adquirente != codigo and int(mov.valor_venda) % 2)
+
+    def test_mascara_compactada(self):
+        """A máscara com um bit por registro volta exatamente à original"""
+        aleatorio = random.Random(3)
+        for total in (0, 1, 7, 8, 9, 1000):
+            mascara = bytes(aleatorio.random() < 0.5 for _ in range(total))
+            compactada = compactar_mascara(mascara)
+            self.assertEqual(len(compactada), (total + 7) // 8)
+            self.assertEqual(expandir_mascara(compactada, total), mascara)
+
+    def test_recuperacao_reconstroi_a_sessao(self):
+        """Depois de uma queda, reaplicar o diário sobre o original reproduz a sessão"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                sessao = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                sessao.iniciar_diario()
+                self.editar_sessao(sessao)
+                esperado = [str(m) for m in sessao.movimentos]
+                trailer = str(sessao.trailer)
+                # Queda: o diário fica em disco sem que o arquivo tenha sido salvo
+                sessao.diario.fechar()
+
+                recuperada = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                self.assertEqual(len(recuperada.operacoes_pendentes()), 6)
+                self.assertEqual(recuperada.recuperar_diario(), 6)
+                self.assertEqual([str(m) for m in recuperada.movimentos], esperado)
+                self.assertEqual(str(recuperada.trailer), trailer)
+
+                # Novas alterações continuam no mesmo diário
+                recuperada.excluir_movimento(0)
+                recuperada.diario.fechar()
+                self.assertEqual(len(ArquivoMovimentacao(self.arquivo_teste).operacoes_pendentes()), 7)
+                recuperada.encerrar_diario()
+                self.assertFalse(os.path.exists(caminho_diario(self.arquivo_teste)))
+
+    def test_registro_incompleto_e_original_alterado(self):
+        """Um registro final truncado é ignorado e um original diferente invalida o diário"""
+        sessao = ArquivoMovimentacao(self.arquivo_teste)
+        sessao.iniciar_diario()
+        sessao.definir_valor_venda(1, 500)
+        sessao.excluir_movimento(4)
+        sessao.diario.fechar()
+
+        with open(caminho_diario(self.arquivo_teste), 'r+b') as f:
+            f.truncate(os.path.getsize(caminho_diario(self.arquivo_teste)) - 3)
+        self.assertEqual(len(ArquivoMovimentacao(self.arquivo_teste).operacoes_pendentes()), 1)
+
+        with open(self.arquivo_teste, 'ab') as f:
+            f.write(b'\n')
+        self.assertIsNone(sessao.operacoes_pendentes())
+
+    def test_texto_fora_da_codificacao_e_recusado_antes(self):
+        """Um caractere não ASCII é recusado sem alterar o registro, o trailer nem o diário"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                sessao = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                sessao.iniciar_diario()
+                sessao.definir_valor_venda(1, 500)
+                antes = [str(m) for m in sessao.movimentos]
+                trailer = str(sessao.trailer)
+
+                with self.assertRaises(ValueError):
+                    sessao.alterar_campo(2, 'numero_pedido', 'Pedição')
+                with self.assertRaises(ValueError):
+                    sessao.movimentos[3].cvnsu = '00000042é'
+                with self.assertRaises(ValueError):
+                    sessao.inserir_movimento(0, RegistroMovimento.criar_registro(numero_cartao='Cartão'))
+                self.assertEqual([str(m) for m in sessao.movimentos], antes)
+                self.assertEqual(str(sessao.trailer), trailer)
+                self.assertFalse(sessao.pode_refazer())
+                sessao.desfazer()
+                self.assertFalse(sessao.pode_desfazer())
+
+                # O diário continua legível e com as operações válidas
+                sessao.diario.fechar()
+                self.assertEqual(len(ArquivoMovimentacao(self.arquivo_teste).operacoes_pendentes()), 2)
+                sessao.encerrar_diario()
+
+    def test_salvar_reinicia_o_diario(self):
+        """Salvar sobre o original deixa o diário vazio e válido para a nova versão"""
+        sessao = ArquivoMovimentacao(self.arquivo_teste)
+        sessao.iniciar_diario()
+        sessao.definir_valor_venda(1, 500)
+        sessao.salvar_arquivo(incremental=True)
+        self.assertEqual(sessao.operacoes_pendentes(), [])
+
+        sessao.excluir_movimento(0)
+        sessao.salvar_arquivo(incremental=True)
+        self.assertEqual(sessao.operacoes_pendentes(), [])
+        sessao.encerrar_diario()
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Diário de Operações")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteDiarioOperacoes)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -62,12 +62,12 @@ class TesteEscolherRegistros(unittest.TestCase):
         print(f"Registros mantidos: {len(arquivo.movimentos)}, Registros excluídos: {registros_excluidos}")
         
         # Calcular a soma dos valores dos registros mantidos
-        soma_valores = sum(mov.get_valor_decimal() for mov in arquivo.movimentos)
-        print(f"Soma dos valores dos registros mantidos: {soma_valores:.2f}")
+        soma_valores = sum(mov.get_valor_centavos() for mov in arquivo.movimentos)
+        print(f"Soma dos valores dos registros mantidos: {soma_valores / 100:.2f}")
         
         # Verificar se o trailer foi atualizado corretamente
         self.assertEqual(arquivo.trailer.get_total_registros(), len(indices_manter))
-        self.assertAlmostEqual(arquivo.trailer.get_valor_total_decimal(), soma_valores, places=2)
+        self.assertEqual(arquivo.trailer.get_valor_total_centavos(), soma_valores)
         print(f"Valor total no trailer: {arquivo.trailer.get_valor_total_decimal():.2f}")
         
         # Salvar o arquivo modificado
@@ -79,7 +79,7 @@ class TesteEscolherRegistros(unittest.TestCase):
         arquivo_modificado = ArquivoMovimentacao(arquivo_salvo)
         self.assertEqual(len(arquivo_modificado.movimentos), len(indices_manter))
         self.assertEqual(arquivo_modificado.trailer.get_total_registros(), len(indices_manter))
-        self.assertAlmostEqual(arquivo_modificado.trailer.get_valor_total_decimal(), soma_valores, places=2)
+        self.assertEqual(arquivo_modificado.trailer.get_valor_total_centavos(), soma_valores)
 
 if __name__ == "__main__":
     print("============================================================")
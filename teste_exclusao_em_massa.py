@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a exclusão em massa por máscara
+"""
+
+import os
+import sys
+import random
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento
+
+
+class TesteExclusaoEmMassa(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.exclusao"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+        self.referencia = ArquivoMovimentacao(self.arquivo_teste)
+
+    def tearDown(self):
+        if os.path.exists(self.arquivo_teste):
+            os.unlink(self.arquivo_teste)
+
+    def abrir(self, armazenamento):
+        return ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+
+    def verificar_trailer(self, arquivo):
+        """O trailer atualizado pelos removidos é igual ao recalculado do zero"""
+        self.assertEqual(int(arquivo.trailer.total_registros), len(arquivo.movimentos))
+        self.assertEqual(arquivo.trailer.get_valor_total_centavos(),
+                         sum(int(mov.valor_venda) for mov in arquivo.movimentos))
+
+    def test_mascara_em_todos_os_armazenamentos(self):
+        """Lista, mmap e colunas mantêm as mesmas linhas, com máscaras em blocos e fragmentadas"""
+        linhas = [str(mov) for mov in self.referencia.movimentos]
+        aleatorio = random.Random(11)
+        mascaras = [
+            bytes(i % 2 for i in range(len(linhas))),
+            bytes(i < len(linhas) // 2 for i in range(len(linhas))),
+            bytes(aleatorio.random() < 0.3 for _ in linhas),
+        ]
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            for mascara in mascaras:
+                with self.subTest(armazenamento=armazenamento, mascara=mascaras.index(mascara)):
+                    arquivo = self.abrir(armazenamento)
+                    excluidos = arquivo.manter_mascara(mascara)
+                    esperado = [linha for linha, manter in zip(linhas, mascara) if manter]
+                    self.assertEqual([str(mov) for mov in arquivo.movimentos], esperado)
+                    self.assertEqual(excluidos, len(linhas) - len(esperado))
+                    self.verificar_trailer(arquivo)
+
+    def test_excluir_onde_e_indices(self):
+        """excluir_onde e excluir_indices removem as mesmas linhas que o laço registro a registro"""
+        codigo = self.referencia.movimentos[0].codigo_adquirente
+        esperado = [str(mov) for mov in self.referencia.movimentos if mov.codigo_adquirente != codigo]
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            arquivo = self.abrir(armazenamento)
+            arquivo.excluir_onde(lambda mov: mov.codigo_adquirente == codigo)
+            self.assertEqual([str(mov) for mov in arquivo.movimentos], esperado)
+            self.verificar_trailer(arquivo)
+
+            arquivo = self.abrir(armazenamento)
+            self.assertEqual(arquivo.excluir_indices([0, 2, 2, 5]), 3)
+            self.assertEqual([str(mov) for mov in arquivo.movimentos],
+                             [str(mov) for i, mov in enumerate(self.referencia.movimentos) if i not in (0, 2, 5)])
+            self.verificar_trailer(arquivo)
+
+    def test_ajustes_incrementais_do_trailer(self):
+        """Edição de valor, inserção e exclusão unitária mantêm o trailer sem recálculo completo"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                arquivo = self.abrir(armazenamento)
+                arquivo.verificar_totais = True
+                arquivo.definir_valor_venda(3, 1999)
+                self.assertEqual(int(arquivo.movimentos[3].valor_venda), 1999)
+                registro = self.referencia.movimentos[0]
+                arquivo.inserir_movimento(1, registro)
+                self.assertEqual(str(arquivo.movimentos[1]), str(registro))
+                arquivo.excluir_movimento(0)
+                arquivo.excluir_movimento(len(arquivo.movimentos) - 1)
+                self.assertEqual(len(arquivo.movimentos), len(self.referencia.movimentos) - 1)
+                self.verificar_trailer(arquivo)
+
+    def test_conferencia_detecta_trailer_divergente(self):
+        """A conferência completa acusa um trailer que não bate com os registros"""
+        self.referencia.conferir_trailer()
+        self.referencia.trailer.set_valor_total_centavos(self.referencia.trailer.get_valor_total_centavos() + 1)
+        with self.assertRaises(ValueError):
+            self.referencia.conferir_trailer()
+
+    def test_trailer_que_nao_comporta_a_alteracao(self):
+        """Total acima de 9 dígitos ou negativo é recusado antes de alterar registros, trailer ou versão"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                arquivo = self.abrir(armazenamento)
+
+                def estado():
+                    return [str(m) for m in arquivo.movimentos], str(arquivo.trailer), arquivo.versao
+
+                antes = estado()
+                folga = 10 ** 9 - arquivo.trailer.get_valor_total_centavos()
+                grande = RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda=str(folga + 10 ** 8))
+                alteracoes = [lambda: arquivo.inserir_movimento(0, grande),
+                              lambda: arquivo.substituir_movimento(3, grande),
+                              lambda: arquivo.definir_valor_venda(3, int(arquivo.movimentos[3].valor_venda) + folga)]
+                for alterar in alteracoes:
+                    with self.assertRaisesRegex(ValueError, "9 dígitos"):
+                        alterar()
+                    self.assertEqual(estado(), antes)
+
+                # Trailer menor que os registros (arquivo recebido com o total errado): a exclusão deixaria o total negativo
+                arquivo.trailer.set_valor_total_centavos(0)
+                antes = estado()
+                for alterar in (lambda: arquivo.excluir_movimento(0), lambda: arquivo.excluir_indices([0, 1])):
+                    with self.assertRaisesRegex(ValueError, "negativo"):
+                        alterar()
+                    self.assertEqual(estado(), antes)
+                self.assertFalse(arquivo.pode_desfazer())
+                arquivo.recalcular_trailer()
+                self.verificar_trailer(arquivo)
+
+    def test_mascara_de_tamanho_errado(self):
+        """Máscara com tamanho diferente da quantidade de registros é rejeitada"""
+        with self.assertRaises(ValueError):
+            self.referencia.manter_mascara(b'\x01')
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Exclusão em Massa")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteExclusaoEmMassa)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
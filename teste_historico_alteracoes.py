@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para desfazer e refazer alterações do arquivo de movimentação
+"""
+
+import os
+import sys
+import glob
+import shutil
+import unittest
+from io import StringIO
+from unittest import mock
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento, AVISO_HISTORICO_DESCARTADO
+import financeiro_app
+
+
+class TesteHistoricoAlteracoes(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.historico"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+
+    def tearDown(self):
+        for caminho in glob.glob(f"{self.arquivo_teste}*"):
+            os.unlink(caminho)
+
+    def estado(self, arquivo):
+        return [str(m) for m in arquivo.movimentos], str(arquivo.trailer)
+
+    def editar_sessao(self, arquivo):
+        """Alterações de todos os tipos, guardando o estado depois de cada uma"""
+        estados = [self.estado(arquivo)]
+        arquivo.definir_valor_venda(2, 1999)
+        estados.append(self.estado(arquivo))
+        arquivo.alterar_campo(5, 'cvnsu', '000000042')
+        estados.append(self.estado(arquivo))
+        arquivo.excluir_movimento(0)
+        estados.append(self.estado(arquivo))
+        arquivo.inserir_movimento(3, RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='100'))
+        estados.append(self.estado(arquivo))
+        arquivo.excluir_indices(range(10, 40, 3))
+        estados.append(self.estado(arquivo))
+        codigo = arquivo.movimentos[0].codigo_adquirente
+        arquivo.excluir_onde(lambda mov: mov.codigo_adquirente != codigo and int(mov.valor_venda) % 2)
+        estados.append(self.estado(arquivo))
+        arquivo.manter_indices(range(0, len(arquivo.movimentos), 2))
+        estados.append(self.estado(arquivo))
+        return estados
+
+    def test_desfazer_e_refazer_tudo(self):
+        """Desfazer volta por cada estado anterior e refazer reproduz a sessão"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                arquivo.verificar_totais = True
+                estados = self.editar_sessao(arquivo)
+
+                for esperado in reversed(estados[:-1]):
+                    arquivo.desfazer()
+                    self.assertEqual(self.estado(arquivo), esperado)
+                self.assertFalse(arquivo.pode_desfazer())
+
+                for esperado in estados[1:]:
+                    arquivo.refazer()
+                    self.assertEqual(self.estado(arquivo), esperado)
+                self.assertFalse(arquivo.pode_refazer())
+
+    def test_nova_alteracao_descarta_refazer(self):
+        """Uma alteração feita depois de desfazer apaga o que havia para refazer"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.excluir_movimento(0)
+        arquivo.desfazer()
+        self.assertTrue(arquivo.pode_refazer())
+        arquivo.definir_valor_venda(0, 500)
+        self.assertFalse(arquivo.pode_refazer())
+        with self.assertRaises(ValueError):
+            arquivo.refazer()
+
+    def test_desfazer_exclusao_em_massa_guarda_so_os_removidos(self):
+        """A exclusão em massa guarda só os registros removidos e a máscara com um bit por registro"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                original = self.estado(arquivo)
+                total = len(arquivo.movimentos)
+                # Máscara fragmentada e máscara em poucos blocos contíguos
+                for mantidos in (range(0, total, 10), range(20, total - 50)):
+                    arquivo.manter_indices(mantidos)
+
+                    tipo, mascara, quantidade, removidos, _ = arquivo.historico._desfazer[-1]
+                    self.assertEqual((tipo, quantidade, len(mascara)), ('manter', total, (total + 7) // 8))
+                    self.assertEqual(len(removidos[0]) if armazenamento == 'mmap' else len(removidos),
+                                     total - len(mantidos))
+
+                    arquivo.desfazer()
+                    self.assertEqual(self.estado(arquivo), original)
+
+    def test_desfazer_mantem_salvamento_e_diario(self):
+        """Desfazer marca o registro para o salvamento incremental e a recuperação repete o desfazer"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.iniciar_diario()
+        self.editar_sessao(arquivo)
+        arquivo.desfazer()
+        arquivo.desfazer()
+        arquivo.refazer()
+        esperado = self.estado(arquivo)
+        arquivo.diario.fechar()
+
+        recuperado = ArquivoMovimentacao(self.arquivo_teste)
+        recuperado.recuperar_diario()
+        self.assertEqual(self.estado(recuperado), esperado)
+        # O histórico é reconstruído: desfazer continua funcionando após a recuperação
+        recuperado.desfazer()
+        arquivo.desfazer()
+        self.assertEqual(self.estado(recuperado), self.estado(arquivo))
+        recuperado.encerrar_diario()
+
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.definir_valor_venda(7, 1234)
+        arquivo.desfazer()
+        arquivo.salvar_arquivo(incremental=True)
+        self.assertEqual(self.estado(ArquivoMovimentacao(self.arquivo_teste)), self.estado(arquivo))
+        arquivo.encerrar_diario()
+
+    def test_salvar_desfazer_e_recuperar(self):
+        """Salvar sobre o original esvazia o histórico; a recuperação depois do salvamento funciona"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                shutil.copy2(self.arquivo_original, self.arquivo_teste)
+                arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                arquivo.iniciar_diario()
+                arquivo.definir_valor_venda(2, 1999)
+                # Salvar com outro nome não reinicia o diário e mantém o histórico
+                self.assertFalse(arquivo.salvar_arquivo(f"{self.arquivo_teste}.copia"))
+                self.assertTrue(arquivo.pode_desfazer())
+                self.assertTrue(arquivo.salvar_arquivo(incremental=True))
+                self.assertFalse(arquivo.pode_desfazer())
+                self.assertFalse(arquivo.salvar_arquivo(incremental=True))
+                self.assertRaises(ValueError, arquivo.desfazer)
+
+                arquivo.alterar_campo(5, 'cvnsu', '000000042')
+                arquivo.definir_valor_venda(7, 1234)
+                arquivo.desfazer()
+                esperado = self.estado(arquivo)
+                arquivo.diario.fechar()
+
+                recuperado = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                self.assertEqual(recuperado.recuperar_diario(), 3)
+                self.assertEqual(self.estado(recuperado), esperado)
+                recuperado.encerrar_diario()
+
+    def test_menu_avisa_que_o_historico_foi_descartado(self):
+        """O salvamento pelo menu informa quando o histórico de desfazer foi descartado"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.iniciar_diario()
+        for alterar, aviso in ((True, True), (False, False)):
+            if alterar:
+                arquivo.definir_valor_venda(2, 1999)
+            with mock.patch('builtins.input', return_value=''), mock.patch('sys.stdout', new=StringIO()) as saida:
+                financeiro_app.salvar_arquivo(arquivo)
+            self.assertEqual(AVISO_HISTORICO_DESCARTADO in saida.getvalue(), aviso)
+        arquivo.encerrar_diario()
+
+    def test_marcas_sem_alteracao_sao_ignoradas(self):
+        """Marcas de desfazer/refazer órfãs no diário não interrompem a recuperação"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.iniciar_diario()
+        arquivo.diario.registrar_desfazer()
+        arquivo.definir_valor_venda(2, 1999)
+        arquivo.diario.registrar_refazer()
+        esperado = self.estado(arquivo)
+        arquivo.diario.fechar()
+
+        recuperado = ArquivoMovimentacao(self.arquivo_teste)
+        self.assertEqual(recuperado.recuperar_diario(), 1)
+        self.assertEqual(self.estado(recuperado), esperado)
+        recuperado.desfazer()
+        self.assertEqual(self.estado(recuperado), self.estado(ArquivoMovimentacao(self.arquivo_teste)))
+        recuperado.encerrar_diario()
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Desfazer e Refazer")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteHistoricoAlteracoes)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
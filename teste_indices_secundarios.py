@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para os índices secundários (adquirente, data, cartão e CVNSU)
+"""
+
+import os
+import sys
+import random
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento
+
+
+class TesteIndicesSecundarios(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.indices"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+
+    def tearDown(self):
+        if os.path.exists(self.arquivo_teste):
+            os.unlink(self.arquivo_teste)
+
+    def conferir(self, arquivo, aleatorio):
+        """Compara as consultas aos índices com uma varredura dos registros"""
+        indices = arquivo.indices_secundarios
+        movimentos = list(arquivo.movimentos)
+        for campo in ('codigo_adquirente', 'data_movimento'):
+            for valor in {getattr(m, campo) for m in movimentos} | {'XX'}:
+                esperado = [i for i, m in enumerate(movimentos) if getattr(m, campo) == valor]
+                self.assertEqual(list(indices.iguais(campo, valor)), esperado, (campo, valor))
+        for campo in ('numero_cartao', 'cvnsu'):
+            for _ in range(8):
+                valor = getattr(aleatorio.choice(movimentos), campo)
+                inicio = aleatorio.randrange(len(valor))
+                trecho = valor[inicio:inicio + aleatorio.randint(1, 8)]
+                esperado = [i for i, m in enumerate(movimentos) if trecho in getattr(m, campo)]
+                self.assertEqual(list(indices.contendo(campo, trecho)), esperado, (campo, trecho))
+
+    def test_consultas_acompanham_as_alteracoes(self):
+        """Os índices continuam corretos depois de cada tipo de alteração, em todos os armazenamentos"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                aleatorio = random.Random(7)
+                arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                self.conferir(arquivo, aleatorio)
+
+                arquivo.alterar_campo(4, 'codigo_adquirente', '77')
+                arquivo.alterar_campo(9, 'cvnsu', '123456789')
+                arquivo.alterar_campo(9, 'numero_cartao', '5555XXXXXX1234      ')
+                # Edições de um registro são aplicadas no lugar, sem refazer o índice
+                self.assertTrue(arquivo.indices_secundarios._trechos)
+                self.conferir(arquivo, aleatorio)
+
+                arquivo.inserir_movimento(2, RegistroMovimento.criar_registro(
+                    codigo_adquirente='46', valor_venda='100', cvnsu='987654321'))
+                arquivo.excluir_movimento(30)
+                self.assertTrue(arquivo.indices_secundarios._igualdade)
+                self.conferir(arquivo, aleatorio)
+
+                arquivo.excluir_indices(range(0, len(arquivo.movimentos), 3))
+                self.conferir(arquivo, aleatorio)
+                arquivo.desfazer()
+                self.conferir(arquivo, aleatorio)
+
+                self.assertGreater(arquivo.excluir_adquirente('77'), 0)
+                self.assertEqual(list(arquivo.indices_secundarios.iguais('codigo_adquirente', '77')), [])
+                self.assertEqual(arquivo.excluir_adquirente('77'), 0)
+                self.conferir(arquivo, aleatorio)
+
+    def test_resultado_nao_muda_com_o_indice(self):
+        """A lista devolvida é uma cópia, não muda quando o índice é atualizado"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        codigo = arquivo.movimentos[0].codigo_adquirente
+        antes = arquivo.indices_secundarios.iguais('codigo_adquirente', codigo)
+        copia = list(antes)
+        arquivo.excluir_movimento(0)
+        self.assertEqual(list(antes), copia)
+
+    def test_inclusoes_e_exclusoes_deslocam_sob_demanda(self):
+        """Inclusões e exclusões só enfileiram o deslocamento; as listas se põem em dia quando usadas"""
+        aleatorio = random.Random(11)
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        indices = arquivo.indices_secundarios
+        self.conferir(arquivo, aleatorio)
+        codigo = arquivo.movimentos[-1].codigo_adquirente
+        ultima = indices._igualdade['codigo_adquirente'][codigo]
+        copia = list(ultima)
+
+        arquivo.excluir_movimento(0)
+        arquivo.inserir_movimento(5, RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='100'))
+        # As listas que não foram consultadas ficam como estavam, com o deslocamento na fila
+        self.assertEqual(len(indices._deslocamentos), 2)
+        if codigo != '46' and arquivo.movimentos[0].codigo_adquirente != codigo:
+            self.assertEqual(list(ultima), copia)
+        self.conferir(arquivo, aleatorio)
+
+        # Mais alterações que o limite da fila, intercaladas com edições e consultas
+        for passo in range(150):
+            posicao = aleatorio.randrange(len(arquivo.movimentos))
+            if passo % 3 == 0:
+                arquivo.excluir_movimento(posicao)
+            elif passo % 3 == 1:
+                arquivo.inserir_movimento(posicao, RegistroMovimento.criar_registro(
+                    codigo_adquirente=aleatorio.choice(['46', '77', codigo]), valor_venda='100'))
+            else:
+                arquivo.alterar_campo(posicao, 'codigo_adquirente', aleatorio.choice(['46', '88']))
+            if passo % 40 == 0:
+                self.conferir(arquivo, aleatorio)
+        self.conferir(arquivo, aleatorio)
+        arquivo.manter_indices(range(0, len(arquivo.movimentos), 2))
+        self.conferir(arquivo, aleatorio)
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Índices Secundários")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteIndicesSecundarios)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
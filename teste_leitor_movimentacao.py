@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a leitura em fluxo de arquivos de movimentação
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from financeiro_app import ArquivoMovimentacao
+from leitor_movimentacao import LeitorMovimentacao
+
+HEADER = "H20250616UN20250616        0000000000000000000000000000000000000000000000000000000000000000"
+MOVIMENTO_1 = "M462025061046607900000098240000020000000000001710020250616335525646000050620030001730000000"
+MOVIMENTO_2 = "M0320250530230888XXXXXX10860000060000000000003000020250616017074932000044309830001570000000"
+TRAILER = "T00002 000047100999999999999999999999999999999999999999999999999999999999999999999999999999"
+
+
+class TesteLeitorMovimentacao(unittest.TestCase):
+    def setUp(self):
+        self.arquivos = []
+
+    def tearDown(self):
+        for caminho in self.arquivos:
+            if os.path.exists(caminho):
+                os.unlink(caminho)
+
+    def criar_arquivo(self, linhas, terminador='\n', final=True):
+        """Cria um arquivo temporário com as linhas informadas"""
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.txt', delete=False) as f:
+            conteudo = terminador.join(linhas) + (terminador if final else '')
+            f.write(conteudo.encode('ascii'))
+            self.arquivos.append(f.name)
+            return f.name
+
+    def test_terminadores(self):
+        """Aceita LF, CRLF e arquivo sem quebra de linha no final"""
+        linhas = [HEADER, MOVIMENTO_1, MOVIMENTO_2, TRAILER]
+        for terminador, final in [('\n', True), ('\r\n', True), ('\n', False), ('\r\n', False)]:
+            caminho = self.criar_arquivo(linhas, terminador, final)
+            arquivo = ArquivoMovimentacao(caminho)
+            self.assertEqual([str(m) for m in arquivo.movimentos], [MOVIMENTO_1, MOVIMENTO_2])
+            self.assertEqual(str(arquivo.header), HEADER)
+            self.assertEqual(str(arquivo.trailer), TRAILER)
+
+    def test_blocos_pequenos(self):
+        """Registros que atravessam a fronteira entre blocos são lidos corretamente"""
+        movimentos = [MOVIMENTO_1] * 7
+        trailer = f"T00007 {171 * 7 * 100:09d}" + "9" * 75
+        caminho = self.criar_arquivo([HEADER] + movimentos + [trailer], '\r\n')
+        leitor = LeitorMovimentacao(caminho, registros_por_bloco=2)
+        tipos = [tipo for tipo, _ in leitor]
+        self.assertEqual(tipos, ['H'] + ['M'] * 7 + ['T'])
+        self.assertEqual(leitor.total_registros, 7)
+        self.assertEqual(leitor.soma_centavos, 171 * 7 * 100)
+
+    def test_leitura_sob_demanda(self):
+        """Os movimentos são produzidos antes do fim do arquivo ser lido"""
+        caminho = self.criar_arquivo([HEADER, MOVIMENTO_1, MOVIMENTO_2, TRAILER])
+        arquivo = ArquivoMovimentacao()
+        iterador = arquivo.iterar_movimentos(caminho)
+        primeiro = next(iterador)
+        self.assertEqual(str(primeiro), MOVIMENTO_1)
+        self.assertIsNone(arquivo.trailer)
+        self.assertEqual(len(list(iterador)), 1)
+        self.assertEqual(str(arquivo.trailer), TRAILER)
+
+    def test_erros_estrutura(self):
+        """Erros de estrutura geram as mesmas mensagens do carregamento tradicional"""
+        casos = [
+            ([HEADER, MOVIMENTO_1[:-1], TRAILER], "Linha 2 tem 90 caracteres"),
+            ([MOVIMENTO_1, MOVIMENTO_2, TRAILER], "Primeiro registro deve ser do tipo Header"),
+            ([HEADER, MOVIMENTO_1, MOVIMENTO_2], "Último registro deve ser do tipo Trailer"),
+            ([HEADER, TRAILER, MOVIMENTO_1, TRAILER], "Registro na linha 2 deveria ser do tipo Movimento"),
+            ([HEADER, MOVIMENTO_1, TRAILER], "Número de registros M (1)"),
+            ([HEADER, MOVIMENTO_1, MOVIMENTO_1, TRAILER], "Soma dos valores dos registros M (342.0)"),
+        ]
+        for linhas, mensagem in casos:
+            caminho = self.criar_arquivo(linhas)
+            with self.assertRaises(ValueError) as contexto:
+                ArquivoMovimentacao(caminho)
+            self.assertIn(mensagem, str(contexto.exception))
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Leitor de Movimentação")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteLeitorMovimentacao)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a linha de comando não interativa
+"""
+
+import os
+import sys
+import glob
+import json
+import shutil
+import unittest
+import tempfile
+import subprocess
+from movimentacao_cli import (interpretar_indices, SAIDA_OK, SAIDA_ARQUIVO_INVALIDO,
+                              SAIDA_USO_INCORRETO, SAIDA_SEM_COMBINACAO)
+
+
+class TesteMovimentacaoCli(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.cli"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+
+    def tearDown(self):
+        for caminho in glob.glob(f"{self.arquivo_teste}*"):
+            os.unlink(caminho)
+
+    def executar(self, *argumentos):
+        """Executa a linha de comando com --json; retorna (código de saída, resultados)"""
+        processo = subprocess.run([sys.executable, "movimentacao_cli.py", *argumentos, "--json"],
+                                  capture_output=True, text=True)
+        return processo.returncode, [json.loads(linha) for linha in processo.stdout.splitlines()]
+
+    def test_validar(self):
+        """Valida vários arquivos e devolve o pior código de saída"""
+        codigo, resultados = self.executar("validar", self.arquivo_teste)
+        self.assertEqual(codigo, SAIDA_OK)
+        self.assertTrue(resultados[0]['valido'])
+        self.assertEqual(resultados[0]['total_movimentos'], 180)
+
+        with open(self.arquivo_teste, 'rb') as f:
+            dados = bytearray(f.read())
+        dados[93 + 33] = ord('A')
+        with open(self.arquivo_teste + ".invalido", 'wb') as f:
+            f.write(dados)
+        codigo, resultados = self.executar("validar", self.arquivo_original, self.arquivo_teste + ".invalido",
+                                           self.arquivo_teste + ".inexistente")
+        self.assertEqual(codigo, SAIDA_ARQUIVO_INVALIDO)
+        self.assertEqual([r['codigo_saida'] for r in resultados], [SAIDA_OK, SAIDA_ARQUIVO_INVALIDO,
+                                                                   SAIDA_ARQUIVO_INVALIDO])
+        self.assertEqual(resultados[1]['erros'][0]['campo'], 'valor_venda')
+
+    def test_transformacoes(self):
+        """Exclusão por adquirente, seleção por valor e índices mantidos, gravando o resultado"""
+        destino = self.arquivo_teste + ".saida"
+        codigo, [resultado] = self.executar("excluir-adquirente", "46", self.arquivo_teste, "--saida", destino)
+        self.assertEqual(codigo, SAIDA_OK)
+        self.assertEqual((resultado['registros_antes'], resultado['registros_depois']), (180, 46))
+        self.assertEqual(self.executar("validar", destino)[1][0]['total_movimentos'], 46)
+
+        # Sem destino nada é gravado
+        codigo, [resultado] = self.executar("manter-indices", "0,3,10-20", self.arquivo_teste,
+                                            "--armazenamento", "lista")
+        self.assertEqual((codigo, resultado['registros_depois']), (SAIDA_OK, 13))
+        self.assertNotIn('salvo_em', resultado)
+        self.assertEqual(self.executar("validar", self.arquivo_teste)[1][0]['total_movimentos'], 180)
+
+        codigo, [resultado] = self.executar("selecionar-valor", "171,00", self.arquivo_teste, "--no-lugar",
+                                            "--armazenamento", "mmap")
+        self.assertEqual((codigo, resultado['total_centavos']), (SAIDA_OK, 17100))
+        validacao = self.executar("validar", self.arquivo_teste)[1][0]
+        self.assertTrue(validacao['valido'])
+        self.assertEqual(validacao['soma_centavos'], 17100)
+
+    def test_erros_e_codigos_de_saida(self):
+        """Cada tipo de falha tem seu código de saída"""
+        codigo, [resultado] = self.executar("selecionar-valor", "0,01", self.arquivo_teste)
+        self.assertEqual(codigo, SAIDA_SEM_COMBINACAO)
+        self.assertIn('erro', resultado)
+
+        codigo, [resultado] = self.executar("manter-indices", "0,999", self.arquivo_teste)
+        self.assertEqual(codigo, SAIDA_USO_INCORRETO)
+
+        self.assertEqual(self.executar("selecionar-valor", "abc", self.arquivo_teste)[0], SAIDA_USO_INCORRETO)
+        self.assertEqual(self.executar("excluir-adquirente", "46", self.arquivo_teste, self.arquivo_original,
+                                       "--saida", "x.008")[0], SAIDA_USO_INCORRETO)
+        self.assertEqual(interpretar_indices("5, 1-3,"), [5, 1, 2, 3])
+        with self.assertRaises(ValueError):
+            interpretar_indices("1-x")
+
+    def test_codigo_log_e_armazenamento_padrao(self):
+        """Código de adquirente fora do formato é uso incorreto; a execução não cria log.txt"""
+        for codigo in ("3", "046", "4a"):
+            with self.subTest(codigo=codigo):
+                self.assertEqual(self.executar("excluir-adquirente", codigo, self.arquivo_teste)[0],
+                                 SAIDA_USO_INCORRETO)
+
+        # Campo numérico com espaço: o armazenamento padrão aceita o arquivo, como a aplicação
+        with open(self.arquivo_teste, 'r+b') as arquivo:
+            posicao = arquivo.read().index(b'\nM') + 1 + 31
+            arquivo.seek(posicao)
+            arquivo.write(b' ')
+        with tempfile.TemporaryDirectory() as diretorio:
+            processo = subprocess.run([sys.executable, os.path.abspath("movimentacao_cli.py"), "excluir-adquirente",
+                                       "46", os.path.abspath(self.arquivo_teste), "--json"],
+                                      capture_output=True, text=True, cwd=diretorio)
+            self.assertEqual(processo.returncode, SAIDA_OK)
+            self.assertEqual(os.listdir(diretorio), [])
+        codigo, _ = self.executar("excluir-adquirente", "46", self.arquivo_teste, "--armazenamento", "colunas")
+        self.assertEqual(codigo, SAIDA_ARQUIVO_INVALIDO)
+
+    def test_nao_importa_interface(self):
+        """A linha de comando não carrega prompt_toolkit nem rich"""
+        codigo = ("import sys, movimentacao_cli;"
+                  f"movimentacao_cli.main(['excluir-adquirente', '46', {self.arquivo_teste!r}]);"
+                  "print(any(m.split('.')[0] in ('prompt_toolkit', 'rich') for m in sys.modules))")
+        processo = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True)
+        self.assertEqual(processo.stdout.splitlines()[-1], "False")
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Linha de Comando")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteMovimentacaoCli)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
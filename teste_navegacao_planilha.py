@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a paginação pela altura da tela e o "ir para" da planilha
+"""
+
+import os
+import sys
+import shutil
+import asyncio
+import unittest
+from prompt_toolkit.application import Application
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.layout import Layout, Window
+from prompt_toolkit.output import DummyOutput
+from financeiro_app import ArquivoMovimentacao
+from planilha_registros import PlanilhaRegistros
+
+
+class TesteNavegacaoPlanilha(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.navegacao"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+        self.arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        self.planilha = PlanilhaRegistros(self.arquivo)
+        self.altura = 12
+        self.planilha.altura_registros = lambda: self.altura
+
+    def tearDown(self):
+        if os.path.exists(self.arquivo_teste):
+            os.unlink(self.arquivo_teste)
+
+    def test_pagina_pela_altura_da_tela(self):
+        """A página tem as linhas que cabem na tela e o cursor continua no mesmo registro"""
+        self.planilha.gerar_cabecalho()
+        total = len(self.arquivo.movimentos)
+        self.assertEqual(self.planilha.registros_por_pagina, self.altura)
+        self.assertEqual(self.planilha.total_paginas, (total + self.altura - 1) // self.altura)
+
+        self.planilha.ir_para_registro(30)
+        self.altura = 7
+        self.planilha.gerar_registros()
+        self.assertEqual(self.planilha.registros_por_pagina, 7)
+        self.assertEqual((self.planilha.pagina_atual, self.planilha.cursor_pos), (4, 2))
+        self.assertEqual(self.planilha.indice_cursor(), 30)
+
+        # Um tamanho fixado deixa de acompanhar a tela
+        self.planilha.registros_por_pagina = 20
+        self.altura = 5
+        self.planilha.gerar_registros()
+        self.assertEqual(self.planilha.registros_por_pagina, 20)
+        self.assertEqual(self.planilha.indice_cursor(), 30)
+
+    def test_inicio_fim_e_numero_do_registro(self):
+        """Home/End e o número do registro levam o cursor direto, também com filtro"""
+        total = len(self.arquivo.movimentos)
+        self.planilha.ir_para_fim()
+        self.assertEqual(self.planilha.indice_cursor(), total - 1)
+        self.assertEqual(self.planilha.pagina_atual, self.planilha.total_paginas - 1)
+        self.planilha.ir_para_inicio()
+        self.assertEqual(self.planilha.indice_cursor(), 0)
+
+        codigo = self.arquivo.movimentos[100].codigo_adquirente
+        esperado = [i for i, m in enumerate(self.arquivo.movimentos) if m.codigo_adquirente == codigo]
+        self.planilha.configurar_filtro('adquirente', codigo)
+        self.assertTrue(self.planilha.ir_para_registro(100))
+        self.assertEqual(self.planilha.indice_cursor(), 100)
+        self.planilha.ir_para_fim()
+        self.assertEqual(self.planilha.indice_cursor(), esperado[-1])
+
+        # Registro fora do filtro: o cursor vai para o próximo que aparece
+        fora = next(i for i in range(esperado[0], total) if i not in esperado)
+        self.assertFalse(self.planilha.ir_para_registro(fora))
+        self.assertEqual(self.planilha.indice_cursor(), min(i for i in esperado if i > fora))
+
+        # Digitado no rodapé
+        self.planilha.configurar_filtro('adquirente', '')
+        self.planilha.iniciar_ir_para('registro', '15')
+        self.planilha.confirmar_ir_para()
+        self.assertEqual(self.planilha.indice_cursor(), 15)
+        self.assertIsNone(self.planilha.modo_ir_para)
+
+    def test_ir_para_valor_e_cvnsu(self):
+        """Valor e CVNSU vão para o próximo registro que casa, voltando ao início"""
+        valor = self.arquivo.movimentos[40].get_valor_decimal()
+        esperado = [i for i, m in enumerate(self.arquivo.movimentos) if m.get_valor_decimal() == valor]
+        self.planilha.ir_para_registro(40)
+        self.assertTrue(self.planilha.ir_para_valor(f"{valor:.2f}".replace('.', ',')))
+        proximo = [i for i in esperado if i > 40] or esperado
+        self.assertEqual(self.planilha.indice_cursor(), proximo[0])
+
+        cvnsu = self.arquivo.movimentos[77].cvnsu.strip()
+        self.planilha.ir_para_inicio()
+        self.planilha.iniciar_ir_para('cvnsu', cvnsu)
+        self.planilha.confirmar_ir_para()
+        esperado = [i for i, m in enumerate(self.arquivo.movimentos) if cvnsu in m.cvnsu]
+        self.assertEqual(self.planilha.indice_cursor(), [i for i in esperado if i > 0][0])
+        self.assertEqual(self.planilha.mensagem, "")
+
+        # Sem combinação, o cursor fica onde estava e o rodapé avisa
+        atual = self.planilha.indice_cursor()
+        self.planilha.iniciar_ir_para('valor', '999999999,99')
+        self.planilha.confirmar_ir_para()
+        self.assertEqual(self.planilha.indice_cursor(), atual)
+        self.assertIn("não encontrado", self.planilha.mensagem)
+        self.planilha.iniciar_ir_para('valor', '1,2,3')
+        self.planilha.confirmar_ir_para()
+        self.assertIn("inválido", self.planilha.mensagem)
+
+    def teclar(self, teclas: str, espera: float = 0.3) -> bool:
+        """Envia as teclas aos atalhos da planilha; retorna se a aplicação terminou sozinha"""
+        async def executar(entrada):
+            app = Application(layout=Layout(Window()), key_bindings=self.planilha.criar_atalhos(),
+                              input=entrada, output=DummyOutput())
+            tarefa = asyncio.ensure_future(app.run_async())
+            await asyncio.sleep(espera)
+            if tarefa.done():
+                return True
+            app.exit()
+            await tarefa
+            return False
+
+        with create_pipe_input() as entrada:
+            entrada.send_text(teclas)
+            return asyncio.run(executar(entrada))
+
+    def test_digitacao_do_ir_para_ignora_comandos(self):
+        """Com o ir para aberto, q, a, A, d, espaço e a navegação não agem; Enter confirma"""
+        self.planilha.registros_selecionados.add(3)
+        # \x7f é o Backspace e \r o Enter; as setas chegam como sequências de escape
+        self.assertFalse(self.teclar("1qaAd \x1b[B2\x7f5\r"))
+        self.assertEqual(self.planilha.indice_cursor(), 15)
+        self.assertIsNone(self.planilha.modo_ir_para)
+        self.assertEqual(list(self.planilha.registros_selecionados), [3])
+
+        # Os separadores só entram no valor; fora da digitação, q volta a sair
+        self.planilha.iniciar_ir_para('cvnsu')
+        self.assertFalse(self.teclar("4,2.d"))
+        self.assertEqual(self.planilha.texto_ir_para, "42")
+        self.planilha.iniciar_ir_para('valor')
+        self.assertFalse(self.teclar("1,5"))
+        self.assertEqual(self.planilha.texto_ir_para, "1,5")
+
+        # Esc cancela sem ir a lugar nenhum (o Esc sozinho só é reconhecido após uma pausa)
+        self.planilha.ir_para_inicio()
+        self.assertFalse(self.teclar("7\x1b", espera=1.0))
+        self.assertIsNone(self.planilha.modo_ir_para)
+        self.assertEqual(self.planilha.indice_cursor(), 0)
+        self.assertTrue(self.teclar("q"))
+        self.assertEqual(list(self.planilha.registros_selecionados), [3])
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Navegação da Planilha")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteNavegacaoPlanilha)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para os registros compactos (Header, Movimento e Trailer)
+"""
+
+import sys
+import unittest
+from financeiro_app import RegistroHeader, RegistroMovimento, RegistroTrailer
+from dinheiro import para_centavos, formatar_centavos
+
+HEADER = "H20250616UN20250616        0000000000000000000000000000000000000000000000000000000000000000"
+MOVIMENTO = "M462025061046607900000098240000020000000000001710020250616335525646000050620030001730000000"
+TRAILER = "T00002 000047100999999999999999999999999999999999999999999999999999999999999999999999999999"
+
+
+class TesteRegistrosMovimentacao(unittest.TestCase):
+    def test_campos_e_linha(self):
+        """Os campos são fatias da linha original e __str__ devolve a própria linha"""
+        registro = RegistroMovimento(MOVIMENTO)
+        self.assertFalse(hasattr(registro, '__dict__'))
+        self.assertEqual(registro.tipo, 'M')
+        self.assertEqual(registro.codigo_adquirente, '46')
+        self.assertEqual(registro.numero_cartao, '46607900000098240000')
+        self.assertEqual(registro.valor_venda, '00000000000017100')
+        self.assertEqual(registro.cvnsu, '335525646')
+        self.assertEqual(registro.numero_pedido, '0000000')
+        self.assertEqual(str(registro), MOVIMENTO)
+
+    def test_alteracao_de_campos(self):
+        """Alterar um campo reconstrói a linha mantendo a largura fixa"""
+        registro = RegistroMovimento(MOVIMENTO)
+        registro.cvnsu = '000000001'
+        registro.set_valor_decimal(2.5)
+        self.assertEqual(registro.cvnsu, '000000001')
+        self.assertEqual(registro.get_valor_decimal(), 2.5)
+        self.assertEqual(len(str(registro)), 91)
+        self.assertEqual(str(registro)[58:67], '000000001')
+
+        with self.assertRaises(ValueError):
+            registro.cvnsu = '1'
+
+    def test_header_e_trailer(self):
+        """Header e trailer expõem os mesmos atributos do layout anterior"""
+        header = RegistroHeader(HEADER)
+        self.assertEqual(header.data_processamento, '20250616')
+        self.assertEqual(header.codigo_unidade, 'UN')
+        self.assertEqual(str(header), HEADER)
+
+        trailer = RegistroTrailer(TRAILER)
+        self.assertEqual(trailer.get_total_registros(), 2)
+        self.assertEqual(trailer.espaco, ' ')
+        trailer.set_total_registros(3)
+        trailer.set_valor_total_decimal(12.34)
+        self.assertEqual(str(trailer)[:16], "T00003 000001234")
+        self.assertEqual(len(str(trailer)), 91)
+
+    def test_valores_em_centavos_sem_truncamento(self):
+        """Decimais viram centavos sem passar por float: 19.99 não vira 1998"""
+        registro = RegistroMovimento(MOVIMENTO)
+        registro.set_valor_decimal(19.99)
+        self.assertEqual(registro.get_valor_centavos(), 1999)
+        trailer = RegistroTrailer(TRAILER)
+        trailer.set_valor_total_decimal(0.29)
+        self.assertEqual(trailer.get_valor_total_centavos(), 29)
+
+        self.assertEqual(para_centavos('19,99'), 1999)
+        self.assertEqual(para_centavos('R$ 1.234,56'), 123456)
+        self.assertEqual(para_centavos('171'), 17100)
+        self.assertEqual(formatar_centavos(123456), '1234.56')
+        self.assertEqual(formatar_centavos(-5), '-0.05')
+        with self.assertRaises(ValueError):
+            para_centavos('abc')
+
+    def test_valores_negativos_e_longos_sao_recusados(self):
+        """Negativos e valores maiores que o campo são recusados antes de alterar a linha"""
+        registro = RegistroMovimento(MOVIMENTO)
+        trailer = RegistroTrailer(TRAILER)
+        casos = [(registro.set_valor_centavos, -1, "negativo"), (registro.set_valor_centavos, 10 ** 17, "17 dígitos"),
+                 (trailer.set_valor_total_centavos, -5, "negativo"),
+                 (trailer.set_valor_total_centavos, 10 ** 9, "9 dígitos"),
+                 (trailer.set_total_registros, -1, "negativo"), (trailer.set_total_registros, 10 ** 5, "5 dígitos")]
+        for definir, valor, mensagem in casos:
+            with self.subTest(valor=valor):
+                with self.assertRaisesRegex(ValueError, mensagem):
+                    definir(valor)
+        self.assertEqual(str(registro), MOVIMENTO)
+        self.assertEqual(str(trailer), TRAILER)
+        trailer.set_valor_total_centavos(10 ** 9 - 1)
+        self.assertEqual(trailer.valor_total, '9' * 9)
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Registros Compactos")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteRegistrosMovimentacao)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
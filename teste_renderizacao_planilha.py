@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a renderização virtualizada da planilha de registros
+"""
+
+import os
+import sys
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao
+from planilha_registros import PlanilhaRegistros
+
+
+def texto(fragmentos) -> str:
+    return ''.join(trecho for _, trecho in fragmentos)
+
+
+class TesteRenderizacaoPlanilha(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.renderizacao"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+        self.arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        self.planilha = PlanilhaRegistros(self.arquivo)
+        self.altura = 8
+        self.planilha.altura_registros = lambda: self.altura
+        # Página maior que a tela, para exercitar a rolagem dentro da página
+        self.planilha.registros_por_pagina = 50
+
+        # Contar as linhas montadas
+        self.montadas = 0
+        montar = self.planilha._montar_linha
+
+        def montar_contando(*argumentos):
+            self.montadas += 1
+            return montar(*argumentos)
+        self.planilha._montar_linha = montar_contando
+
+    def tearDown(self):
+        if os.path.exists(self.arquivo_teste):
+            os.unlink(self.arquivo_teste)
+
+    def test_formato_das_linhas(self):
+        """Cada linha tem as mesmas colunas e larguras de antes"""
+        registro = self.arquivo.movimentos[1]
+        self.planilha.registros_selecionados.add(1)
+        linhas = texto(self.planilha.gerar_registros()).split('\n')
+        esperado = (f"{1:^5}{'✓':^5}{registro.codigo_adquirente:^12}{registro.data_movimento:^10}"
+                    f"{registro.numero_cartao.strip():^22}R$ {registro.get_valor_decimal():^10.2f}"
+                    f"{registro.cvnsu.strip():^11}")
+        self.assertEqual(linhas[1], esperado)
+
+    def test_so_as_linhas_que_cabem_na_tela(self):
+        """Só as linhas visíveis são geradas e a parte visível acompanha o cursor"""
+        linhas = texto(self.planilha.gerar_registros()).splitlines()
+        self.assertEqual(len(linhas), self.altura)
+        self.assertEqual(self.montadas, self.altura)
+
+        for _ in range(self.altura + 2):
+            self.planilha.navegar_cursor("baixo")
+        linhas = texto(self.planilha.gerar_registros()).splitlines()
+        self.assertEqual(len(linhas), self.altura)
+        self.assertEqual(int(linhas[-1][:5]), self.altura + 2)
+        self.assertEqual(self.planilha.primeira_visivel, 3)
+
+    def test_mover_cursor_monta_so_duas_linhas(self):
+        """Ao mover o cursor ou marcar um registro só as linhas afetadas são montadas de novo"""
+        self.planilha.gerar_registros()
+        self.montadas = 0
+        self.planilha.navegar_cursor("baixo")
+        self.planilha.gerar_registros()
+        self.assertEqual(self.montadas, 2)
+
+        self.montadas = 0
+        self.planilha.alternar_selecao()
+        self.planilha.gerar_registros()
+        self.assertEqual(self.montadas, 1)
+
+        self.montadas = 0
+        self.planilha.gerar_registros()
+        self.assertEqual(self.montadas, 0)
+
+    def test_alteracao_refaz_as_celulas(self):
+        """Uma alteração no arquivo descarta as células formatadas"""
+        self.planilha.gerar_registros()
+        self.arquivo.alterar_campo(0, 'cvnsu', '000000042')
+        linhas = texto(self.planilha.gerar_registros()).splitlines()
+        self.assertTrue(linhas[0].rstrip().endswith('000000042'))
+
+    def test_alteracao_de_um_registro_refaz_so_a_linha_dele(self):
+        """Editar um registro descarta só as células dele; inclusões e exclusões descartam tudo"""
+        self.planilha.gerar_registros()
+        self.montadas = 0
+        self.arquivo.definir_valor_venda(2, 1999)
+        linhas = texto(self.planilha.gerar_registros()).splitlines()
+        self.assertEqual(self.montadas, 1)
+        self.assertIn('19.99', linhas[2])
+        self.assertEqual(len(self.planilha._celulas), self.altura)
+
+        # Com o desfazer (também uma alteração de linha) só a mesma linha volta
+        self.montadas = 0
+        self.arquivo.desfazer()
+        self.planilha.gerar_registros()
+        self.assertEqual(self.montadas, 1)
+
+        self.montadas = 0
+        self.arquivo.excluir_movimento(0)
+        linhas = texto(self.planilha.gerar_registros()).splitlines()
+        self.assertEqual(self.montadas, self.altura)
+        self.assertEqual(int(linhas[0][:5]), 0)
+        self.assertTrue(linhas[0].rstrip().endswith(self.arquivo.movimentos[0].cvnsu.strip()))
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Renderização da Planilha")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteRenderizacaoPlanilha)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para o salvamento atômico e incremental do arquivo de movimentação
+"""
+
+import os
+import sys
+import glob
+import shutil
+import unittest
+from unittest import mock
+import financeiro_app
+from financeiro_app import ArquivoMovimentacao
+
+
+class TesteSalvamento(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.salvamento"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+
+    def tearDown(self):
+        for caminho in glob.glob(f"{self.arquivo_teste}*"):
+            os.unlink(caminho)
+
+    def temporarios(self):
+        return glob.glob(f"{self.arquivo_teste}.*.tmp")
+
+    def test_falha_no_meio_preserva_o_original(self):
+        """Uma falha durante a gravação não trunca o arquivo nem deixa o temporário"""
+        with open(self.arquivo_teste, 'rb') as f:
+            conteudo_original = f.read()
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        del arquivo.movimentos[0]
+
+        def serializar_com_falha():
+            yield b'H' * 92
+            raise OSError("Disco cheio")
+
+        arquivo.serializar = serializar_com_falha
+        with self.assertRaises(OSError):
+            arquivo.salvar_arquivo()
+
+        with open(self.arquivo_teste, 'rb') as f:
+            self.assertEqual(f.read(), conteudo_original)
+        self.assertEqual(self.temporarios(), [])
+
+    def test_salvamento_duravel_e_rapido(self):
+        """Os dois modos gravam o mesmo conteúdo e mantêm as permissões do original"""
+        os.chmod(self.arquivo_teste, 0o640)
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.excluir_movimento(0)
+        esperado = b''.join(arquivo.serializar())
+
+        for duravel in (True, False):
+            arquivo.salvar_arquivo(duravel=duravel)
+            with open(self.arquivo_teste, 'rb') as f:
+                self.assertEqual(f.read(), esperado)
+            self.assertEqual(os.stat(self.arquivo_teste).st_mode & 0o777, 0o640)
+            self.assertEqual(self.temporarios(), [])
+
+        recarregado = ArquivoMovimentacao(self.arquivo_teste)
+        self.assertEqual(len(recarregado.movimentos), len(arquivo.movimentos))
+
+    def test_salvar_como_arquivo_novo(self):
+        """Salvar em um caminho novo cria o arquivo com as permissões padrão"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        novo = f"{self.arquivo_teste}.novo"
+        arquivo.salvar_arquivo(novo)
+
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(novo).st_mode & 0o777, 0o666 & ~umask)
+        self.assertEqual(len(ArquivoMovimentacao(novo).movimentos), len(arquivo.movimentos))
+
+    def test_salvamento_incremental_regrava_so_os_alterados(self):
+        """Após edições sem mudar a disposição, só os quadros alterados e o trailer são regravados"""
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            with self.subTest(armazenamento=armazenamento):
+                shutil.copy2(self.arquivo_original, self.arquivo_teste)
+                arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+                arquivo.definir_valor_venda(4, 1999)
+                arquivo.movimentos[9].cvnsu = '123456789'
+                arquivo.marcar_alterado(9)
+                inode = os.stat(self.arquivo_teste).st_ino
+
+                arquivo.salvar_arquivo(incremental=True)
+                self.assertEqual(os.stat(self.arquivo_teste).st_ino, inode)
+                self.assertEqual(arquivo.alterados, set())
+
+                recarregado = ArquivoMovimentacao(self.arquivo_teste)
+                self.assertEqual(recarregado.movimentos[4].get_valor_centavos(), 1999)
+                self.assertEqual(recarregado.movimentos[9].cvnsu, '123456789')
+                self.assertEqual([str(m) for m in recarregado.movimentos], [str(m) for m in arquivo.movimentos])
+                self.assertEqual(str(recarregado.trailer), str(arquivo.trailer))
+
+    def test_mudanca_de_disposicao_reescreve_o_arquivo(self):
+        """Exclusões ou alterações externas no arquivo levam à regravação completa"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.excluir_movimento(0)
+        self.assertFalse(arquivo.pode_salvar_incremental(self.arquivo_teste))
+        inode = os.stat(self.arquivo_teste).st_ino
+        arquivo.salvar_arquivo(incremental=True)
+        self.assertNotEqual(os.stat(self.arquivo_teste).st_ino, inode)
+
+        # Depois da regravação completa, a nova disposição (com LF) volta a permitir o incremental
+        self.assertTrue(arquivo.pode_salvar_incremental(self.arquivo_teste))
+        with open(self.arquivo_teste, 'ab') as f:
+            f.write(b'\n')
+        self.assertFalse(arquivo.pode_salvar_incremental(self.arquivo_teste))
+
+    def test_salvar_do_menu_e_atomico(self):
+        """O Salvar do menu troca o arquivo inteiro (os.replace), mesmo com só um registro editado"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        arquivo.definir_valor_venda(4, 1999)
+        self.assertTrue(arquivo.pode_salvar_incremental(self.arquivo_teste))
+        inode = os.stat(self.arquivo_teste).st_ino
+        with mock.patch('builtins.input', return_value=''), mock.patch('builtins.print'):
+            financeiro_app.salvar_arquivo(arquivo)
+        self.assertNotEqual(os.stat(self.arquivo_teste).st_ino, inode)
+        self.assertEqual(ArquivoMovimentacao(self.arquivo_teste).movimentos[4].get_valor_centavos(), 1999)
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Salvamento do Arquivo")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteSalvamento)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
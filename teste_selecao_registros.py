@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a seleção de registros da planilha sob filtros
+"""
+
+import os
+import sys
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento
+from planilha_registros import PlanilhaRegistros
+from selecao_registros import SelecaoRegistros
+
+
+class TesteSelecaoRegistros(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.selecao"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+        self.arquivo = ArquivoMovimentacao(self.arquivo_teste)
+
+    def tearDown(self):
+        if os.path.exists(self.arquivo_teste):
+            os.unlink(self.arquivo_teste)
+
+    def test_selecao_sob_filtro_usa_a_posicao_no_arquivo(self):
+        """Com filtro ativo, cursor, seleção e edição apontam para o registro exibido"""
+        planilha = PlanilhaRegistros(self.arquivo)
+        planilha.registros_por_pagina = 10
+        # O adquirente menos frequente com ao menos duas páginas: as posições filtradas diferem das do arquivo
+        codigos = [m.codigo_adquirente for m in self.arquivo.movimentos]
+        codigo = min((c for c in set(codigos) if codigos.count(c) > 12), key=codigos.count)
+        esperado = [i for i, m in enumerate(self.arquivo.movimentos) if m.codigo_adquirente == codigo]
+        planilha.configurar_filtro('adquirente', codigo)
+
+        planilha.navegar_cursor("pagina_baixo")
+        planilha.navegar_cursor("baixo")
+        planilha.navegar_cursor("baixo")
+        self.assertNotEqual(esperado[12], 12)
+        self.assertEqual(planilha.indice_cursor(), esperado[12])
+        planilha.alternar_selecao()
+        self.assertEqual(list(planilha.registros_selecionados), [esperado[12]])
+        self.assertEqual(planilha.obter_registros_selecionados(), [self.arquivo.movimentos[esperado[12]]])
+
+        # Trocar o filtro não muda a seleção
+        planilha.configurar_filtro('adquirente', '')
+        self.assertIn(esperado[12], planilha.registros_selecionados)
+        self.assertEqual(len(planilha.registros_selecionados), 1)
+
+        planilha.configurar_filtro('adquirente', codigo)
+        planilha.selecionar_todos_filtrados()
+        self.assertEqual(list(planilha.registros_selecionados), esperado)
+        self.arquivo.manter_mascara(planilha.registros_selecionados.mascara_nao_selecionados())
+        self.assertTrue(all(m.codigo_adquirente != codigo for m in self.arquivo.movimentos))
+
+    def test_selecao_acompanha_as_alteracoes(self):
+        """A marca continua no mesmo registro quando os outros mudam de posição"""
+        selecao = SelecaoRegistros(self.arquivo, [5, 50, 100])
+        marcados = [str(self.arquivo.movimentos[i]) for i in selecao]
+
+        self.arquivo.excluir_movimento(0)
+        self.arquivo.inserir_movimento(10, RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='1'))
+        self.arquivo.excluir_indices(range(60, 90))
+        self.arquivo.definir_valor_venda(3, 1)
+        self.assertEqual([str(self.arquivo.movimentos[i]) for i in selecao], marcados)
+        self.assertEqual(len(selecao), 3)
+
+        self.arquivo.desfazer()
+        self.arquivo.desfazer()
+        self.assertEqual([str(self.arquivo.movimentos[i]) for i in selecao], marcados)
+
+        # Excluir um registro marcado tira a marca; carregar de novo limpa a seleção
+        self.arquivo.excluir_movimento(next(iter(selecao)))
+        self.assertEqual(len(selecao), 2)
+        self.arquivo.carregar_arquivo(self.arquivo_teste)
+        self.assertEqual((len(selecao), list(selecao)), (0, []))
+
+    def test_selecionar_muitos_registros(self):
+        """Selecionar o arquivo inteiro ou um filtro grande não monta um conjunto de inteiros"""
+        selecao = SelecaoRegistros(self.arquivo)
+        total = len(self.arquivo.movimentos)
+        selecao.marcar(range(total))
+        self.assertEqual(len(selecao), total)
+        self.assertEqual(selecao.mascara(), b'\x01' * total)
+        selecao.discard(7)
+        selecao.discard(7)
+        self.assertEqual(selecao.alternar(8), False)
+        self.assertEqual(len(selecao), total - 2)
+        self.assertNotIn(total, selecao)
+        selecao.clear()
+        self.assertFalse(selecao)
+
+        # Atribuição de um conjunto, como antes
+        planilha = PlanilhaRegistros(self.arquivo)
+        planilha.registros_selecionados = {0, 1, 2}
+        self.assertEqual(list(planilha.registros_selecionados), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Seleção de Registros")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteSelecaoRegistros)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -39,11 +39,11 @@ T00003 0000571009999999999999999999999999999999999999999999999999999999999999999
         assert len(arquivo.movimentos) == 1, f"Número incorreto de registros mantidos: {len(arquivo.movimentos)}"
         
         # Verificar se o registro correto foi mantido
-        assert abs(arquivo.movimentos[0].get_valor_decimal() - 171.00) < 0.01, "Registro incorreto foi mantido"
+        assert arquivo.movimentos[0].get_valor_centavos() == 17100, "Registro incorreto foi mantido"
         
         # Verificar se o trailer foi atualizado corretamente
         assert arquivo.trailer.get_total_registros() == 1, "Contagem de registros no trailer incorreta"
-        assert abs(arquivo.trailer.get_valor_total_decimal() - 171.00) < 0.01, "Valor total no trailer incorreto"
+        assert arquivo.trailer.get_valor_total_centavos() == 17100, "Valor total no trailer incorreto"
         
         print("✓ Seleção por valor: OK")
         return True
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a tabela colunar de registros de movimento
+"""
+
+import os
+import sys
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao, RegistroMovimento
+from tabela_movimentos import TabelaMovimentos
+
+
+class TesteTabelaMovimentos(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.colunas"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+        self.lista = ArquivoMovimentacao(self.arquivo_teste)
+
+    def tearDown(self):
+        if os.path.exists(self.arquivo_teste):
+            os.unlink(self.arquivo_teste)
+
+    def test_intercambiavel_com_lista(self):
+        """A tabela reproduz as linhas e campos da lista de RegistroMovimento"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='colunas')
+        tabela = arquivo.movimentos
+
+        self.assertIsInstance(tabela, TabelaMovimentos)
+        self.assertEqual([str(m) for m in tabela], [str(m) for m in self.lista.movimentos])
+        self.assertEqual(tabela[3].numero_cartao, self.lista.movimentos[3].numero_cartao)
+        self.assertEqual(tabela[-1].valor_venda, self.lista.movimentos[-1].valor_venda)
+        self.assertEqual(tabela.total_centavos(), int(self.lista.trailer.valor_total))
+
+        copia = TabelaMovimentos.de_registros(self.lista.movimentos)
+        self.assertEqual([str(m) for m in copia], [str(m) for m in tabela])
+
+    def test_filtros_e_exclusao_em_massa(self):
+        """Máscaras selecionam as mesmas linhas que os laços sobre a lista"""
+        tabela = TabelaMovimentos.de_registros(self.lista.movimentos)
+        codigo = self.lista.movimentos[0].codigo_adquirente
+        data = self.lista.movimentos[0].data_movimento
+        trecho = self.lista.movimentos[7].cvnsu[2:6]
+
+        esperado = [i for i, m in enumerate(self.lista.movimentos) if m.codigo_adquirente == codigo]
+        self.assertEqual(tabela.indices(tabela.mascara_igual('codigo_adquirente', codigo)), esperado)
+
+        esperado = [i for i, m in enumerate(self.lista.movimentos) if m.data_movimento == data]
+        self.assertEqual(tabela.indices(tabela.mascara_igual('data_movimento', data)), esperado)
+
+        esperado = [i for i, m in enumerate(self.lista.movimentos) if trecho in m.cvnsu]
+        self.assertEqual(tabela.indices(tabela.mascara_contem('cvnsu', trecho)), esperado)
+
+        tabela.excluir(tabela.mascara_igual('codigo_adquirente', codigo))
+        restantes = [str(m) for m in self.lista.movimentos if m.codigo_adquirente != codigo]
+        self.assertEqual([str(m) for m in tabela], restantes)
+
+    def test_edicao_e_salvamento(self):
+        """Edições, exclusões e inserções pela interface de lista são salvas corretamente"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='colunas')
+        arquivo.movimentos[0].set_valor_decimal(10.50)
+        arquivo.movimentos[1].cvnsu = '123456789'
+        del arquivo.movimentos[2]
+        del arquivo.movimentos[5:10]
+        arquivo.movimentos.insert(0, RegistroMovimento.criar_registro(codigo_adquirente='46', valor_venda='100'))
+        esperado = [str(m) for m in arquivo.movimentos]
+
+        arquivo.recalcular_trailer()
+        arquivo.salvar_arquivo()
+
+        recarregado = ArquivoMovimentacao(self.arquivo_teste)
+        self.assertEqual([str(m) for m in recarregado.movimentos], esperado)
+        self.assertEqual(recarregado.movimentos[1].valor_venda, '00000000000001050')
+        self.assertEqual(recarregado.movimentos[2].cvnsu, '123456789')
+
+    def test_serializacao_por_colunas(self):
+        """Os blocos montados coluna a coluna são iguais às linhas reconstruídas uma a uma"""
+        tabela = TabelaMovimentos.de_registros(self.lista.movimentos)
+        esperado = ''.join(str(m) + '\n' for m in self.lista.movimentos).encode('ascii')
+        for por_bloco in (1, 13, 8192):
+            self.assertEqual(b''.join(tabela.serializar(por_bloco)), esperado)
+        self.assertEqual(list(TabelaMovimentos().serializar()), [])
+
+    def test_campo_numerico_fora_do_formato(self):
+        """Um campo numérico com espaço não é regravado com zeros: a tabela recusa o arquivo"""
+        with open(self.arquivo_teste, 'r+b') as arquivo:
+            conteudo = arquivo.read()
+            # Parcelas do primeiro registro M com espaço à esquerda
+            posicao = conteudo.index(b'\nM') + 1 + 31
+            arquivo.seek(posicao)
+            arquivo.write(b' ' + conteudo[posicao + 1:posicao + 2])
+
+        with self.assertRaises(ValueError) as contexto:
+            ArquivoMovimentacao(self.arquivo_teste, armazenamento='colunas')
+        self.assertIn("parcelas do registro de movimento 1", str(contexto.exception))
+
+        # A lista carrega e salva o campo como está
+        lista = ArquivoMovimentacao(self.arquivo_teste)
+        lista.salvar_arquivo()
+        with open(self.arquivo_teste, 'rb') as arquivo:
+            esperado = conteudo[:posicao] + b' ' + conteudo[posicao + 1:]
+            self.assertEqual(arquivo.read().splitlines(), esperado.splitlines())
+
+        # Edições também não aceitam um número fora do formato
+        tabela = TabelaMovimentos.de_registros(ArquivoMovimentacao(self.arquivo_original).movimentos)
+        with self.assertRaises(ValueError):
+            tabela[0].parcelas = ' 1'
+        with self.assertRaises(ValueError):
+            tabela.append(RegistroMovimento.criar_registro(codigo_adquirente='-1', valor_venda='100'))
+        self.assertEqual(len(tabela), len(self.lista.movimentos))
+
+    def test_linha_invalida_nao_altera_a_tabela(self):
+        """Substituir ou inserir uma linha com um campo inválido no fim não deixa a linha pela metade"""
+        tabela = TabelaMovimentos.de_registros(self.lista.movimentos)
+        antes = [str(m) for m in tabela]
+        # Campos iniciais válidos e diferentes; pedido (último campo) com caractere fora da codificação
+        invalida = RegistroMovimento.criar_registro(codigo_adquirente='99', valor_venda='12345')
+        linha = str(invalida)[:84] + 'PEDIDO\u00e7'
+        for alterar in (lambda: tabela.__setitem__(2, linha), lambda: tabela.insert(2, linha)):
+            with self.assertRaises(ValueError):
+                alterar()
+            self.assertEqual([str(m) for m in tabela], antes)
+        # Valor de venda (campo numérico do meio) fora do formato
+        linha = str(invalida)[:33] + ' ' * 17 + str(invalida)[50:]
+        with self.assertRaises(ValueError):
+            tabela[2] = linha
+        self.assertEqual([str(m) for m in tabela], antes)
+
+        tabela[2] = invalida
+        self.assertEqual(str(tabela[2]), str(invalida))
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Tabela Colunar de Movimentos")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteTabelaMovimentos)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a validação completa do layout do arquivo de movimentação
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from validador_movimentacao import ValidadorMovimentacao, validar_arquivo
+
+HEADER = "H20250616UN20250616        0000000000000000000000000000000000000000000000000000000000000000"
+MOVIMENTO_1 = "M462025061046607900000098240000020000000000001710020250616335525646000050620030001730000000"
+MOVIMENTO_2 = "M0320250530230888XXXXXX10860000060000000000003000020250616017074932000044309830001570000000"
+TRAILER = "T00002 000047100999999999999999999999999999999999999999999999999999999999999999999999999999"
+
+
+def alterar(linha: str, inicio: int, texto: str) -> str:
+    """Troca o trecho da linha a partir da posição informada"""
+    return linha[:inicio] + texto + linha[inicio + len(texto):]
+
+
+class TesteValidadorMovimentacao(unittest.TestCase):
+    def setUp(self):
+        self.arquivos = []
+
+    def tearDown(self):
+        for caminho in self.arquivos:
+            if os.path.exists(caminho):
+                os.unlink(caminho)
+
+    def criar_arquivo(self, linhas, terminador='\n'):
+        """Cria um arquivo temporário com as linhas informadas"""
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.txt', delete=False) as f:
+            f.write((terminador.join(linhas) + terminador).encode('latin-1'))
+            self.arquivos.append(f.name)
+            return f.name
+
+    def test_arquivos_validos(self):
+        """Arquivos corretos, com LF ou CRLF, não têm violações"""
+        for terminador in ('\n', '\r\n'):
+            relatorio = validar_arquivo(self.criar_arquivo([HEADER, MOVIMENTO_1, MOVIMENTO_2, TRAILER], terminador))
+            self.assertTrue(relatorio.valido, str(relatorio))
+            self.assertEqual((relatorio.total_movimentos, relatorio.soma_centavos), (2, 47100))
+
+        if os.path.exists("rc160625.008"):
+            relatorio = validar_arquivo("rc160625.008")
+            self.assertTrue(relatorio.valido, str(relatorio))
+            self.assertEqual(relatorio.total_movimentos, 180)
+
+    def test_relatorio_com_todas_as_violacoes(self):
+        """Todas as violações são apontadas com a linha e o campo, sem parar na primeira"""
+        movimentos = [MOVIMENTO_1] * 40
+        movimentos[3] = alterar(MOVIMENTO_1, 33, '00000000000A')           # valor não numérico
+        movimentos[10] = alterar(MOVIMENTO_1, 50, '20251301')              # mês 13
+        movimentos[11] = alterar(MOVIMENTO_1, 3, '20250230')               # 30 de fevereiro
+        movimentos[20] = alterar(MOVIMENTO_1, 67, '07')                    # zeros fixos
+        movimentos[25] = alterar(MOVIMENTO_1, 58, '3355X5646')             # X fora do cartão
+        movimentos[30] = alterar(MOVIMENTO_1, 0, 'T')                      # tipo
+        movimentos[35] = alterar(alterar(MOVIMENTO_1, 1, 'A6'), 84, '73 ')  # dois campos na mesma linha
+        header = alterar(HEADER, 19, '   X    ')
+        trailer = alterar(f"T00040 {171 * 40 * 100:09d}" + "9" * 75, 90, '8')
+
+        for terminador in ('\n', '\r\n'):
+            relatorio = ValidadorMovimentacao(registros_por_bloco=8).validar_arquivo(
+                self.criar_arquivo([header] + movimentos + [trailer], terminador))
+            erros = [(linha, campo) for linha, campo, _ in relatorio.erros]
+            self.assertEqual(erros, [
+                (1, 'espacos'), (5, 'valor_venda'), (12, 'data_venda'), (13, 'data_movimento'),
+                (22, 'zeros_fixos'), (27, 'cvnsu'), (32, 'tipo'), (37, 'codigo_adquirente'),
+                (37, 'numero_pedido'), (42, 'noves'), (42, 'total_registros'), (42, 'valor_total'),
+            ])
+            self.assertEqual(relatorio.total_movimentos, 39)
+
+    def test_linhas_com_tamanho_incorreto(self):
+        """Linhas fora do tamanho são apontadas e as demais continuam sendo conferidas"""
+        linhas = [HEADER, MOVIMENTO_1[:-1], MOVIMENTO_2 + '0', alterar(MOVIMENTO_1, 31, 'AB'), MOVIMENTO_2, TRAILER]
+        relatorio = validar_arquivo(self.criar_arquivo(linhas))
+        mensagens = [mensagem for _, _, mensagem in relatorio.erros]
+        self.assertIn("Linha 2 tem 90 caracteres, deveria ter 91", mensagens)
+        self.assertIn("Linha 3 tem 92 caracteres, deveria ter 91", mensagens)
+        self.assertEqual([(linha, campo) for linha, campo, _ in relatorio.erros],
+                         [(2, None), (3, None), (4, 'parcelas')])
+        # Os registros com o tamanho correto entram na contagem conferida com o trailer
+        self.assertEqual((relatorio.total_movimentos, relatorio.soma_centavos), (2, 47100))
+
+    def test_estrutura_e_limite_de_erros(self):
+        """Header e trailer ausentes são apontados e o limite só resume o relatório"""
+        relatorio = validar_arquivo(self.criar_arquivo([MOVIMENTO_1, MOVIMENTO_2]))
+        mensagens = [mensagem for _, _, mensagem in relatorio.erros]
+        self.assertIn("Primeiro registro deve ser do tipo Header (H)", mensagens)
+        self.assertIn("Último registro deve ser do tipo Trailer (T)", mensagens)
+
+        invalidos = [alterar(MOVIMENTO_1, 84, 'ABCDEFG')] * 30
+        relatorio = validar_arquivo(self.criar_arquivo([HEADER] + invalidos + [TRAILER]), limite_erros=5)
+        self.assertEqual(len(relatorio.erros), 5)
+        self.assertEqual(relatorio.total_erros, 32)
+        self.assertFalse(relatorio.como_dicionario()['valido'])
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Validador de Movimentação")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteValidadorMovimentacao)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste automatizado para a visão filtrada em cache da planilha
+"""
+
+import os
+import sys
+import shutil
+import unittest
+from financeiro_app import ArquivoMovimentacao
+from planilha_registros import PlanilhaRegistros
+from visao_filtrada import VisaoFiltrada, registro_passa
+
+
+class TesteVisaoFiltrada(unittest.TestCase):
+    def setUp(self):
+        self.arquivo_original = "rc160625.008"
+        self.arquivo_teste = "rc160625.008.visao"
+
+        if not os.path.exists(self.arquivo_original):
+            self.skipTest(f"Arquivo de teste {self.arquivo_original} não encontrado")
+
+        shutil.copy2(self.arquivo_original, self.arquivo_teste)
+
+    def tearDown(self):
+        if os.path.exists(self.arquivo_teste):
+            os.unlink(self.arquivo_teste)
+
+    def test_mesmos_registros_que_o_filtro_por_registro(self):
+        """A visão encontra os mesmos registros em todos os armazenamentos"""
+        referencia = ArquivoMovimentacao(self.arquivo_teste).movimentos
+        codigo = referencia[0].codigo_adquirente
+        data = referencia[0].data_movimento
+        casos = [
+            {},
+            {'adquirente': codigo},
+            {'adquirente': codigo, 'data': data},
+            {'cartao': referencia[3].numero_cartao[6:10]},
+            {'cvnsu': referencia[7].cvnsu[2:6], 'adquirente': ''},
+            {'adquirente': '0' + codigo},
+            {'adquirente': 'AB'},
+        ]
+        for armazenamento in ('lista', 'mmap', 'colunas'):
+            arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento=armazenamento)
+            visao = VisaoFiltrada(arquivo)
+            for filtros in casos:
+                with self.subTest(armazenamento=armazenamento, filtros=filtros):
+                    esperado = [i for i, m in enumerate(referencia) if registro_passa(m, filtros)]
+                    self.assertEqual(list(visao.indices(filtros)), esperado)
+
+    def test_cache_e_invalidacao(self):
+        """A filtragem só é refeita quando os filtros ou os registros mudam"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste, armazenamento='colunas')
+        visao = VisaoFiltrada(arquivo)
+        codigo = arquivo.movimentos[0].codigo_adquirente
+        filtros = {'adquirente': codigo}
+
+        indices = visao.indices(filtros)
+        self.assertIs(visao.indices(filtros), indices)
+        self.assertIs(visao.indices(dict(filtros)), indices)
+
+        # Exclusão pelo arquivo: a versão avança e a visão é refeita
+        arquivo.excluir_movimento(indices[0])
+        self.assertEqual(len(visao.indices(filtros)), len(indices) - 1)
+
+        # Edição que tira o registro do filtro
+        primeiro = visao.indices(filtros)[0]
+        arquivo.alterar_campo(primeiro, 'codigo_adquirente', '99' if codigo != '99' else '98')
+        self.assertNotIn(primeiro, visao.indices(filtros))
+
+        # Desfazer também é uma alteração
+        arquivo.desfazer()
+        self.assertIn(primeiro, visao.indices(filtros))
+
+        # Carregar de novo substitui os registros
+        arquivo.carregar_arquivo(self.arquivo_teste)
+        self.assertEqual(len(visao.indices(filtros)), len(indices))
+
+        # Alteração direta, fora dos métodos do arquivo, exige invalidar
+        arquivo.movimentos[indices[0]].codigo_adquirente = '99' if codigo != '99' else '98'
+        visao.invalidar()
+        self.assertNotIn(indices[0], visao.indices(filtros))
+
+    def test_planilha_pagina_pela_visao(self):
+        """A planilha pagina, navega e reflete exclusões sem refiltrar a cada tecla"""
+        arquivo = ArquivoMovimentacao(self.arquivo_teste)
+        planilha = PlanilhaRegistros(arquivo)
+        codigo = arquivo.movimentos[0].codigo_adquirente
+        esperado = [m for m in arquivo.movimentos if m.codigo_adquirente == codigo]
+
+        planilha.registros_por_pagina = 10
+        planilha.configurar_filtro('adquirente', codigo)
+        self.assertEqual(planilha.total_registros, len(esperado))
+        self.assertEqual(planilha.obter_registros_pagina(), esperado[:10])
+
+        visao = planilha.indices_visiveis()
+        for _ in range(15):
+            planilha.navegar_cursor("baixo")
+        self.assertEqual(planilha.cursor_pos, 9)
+        planilha.navegar_cursor("pagina_baixo")
+        self.assertEqual(planilha.obter_registros_pagina(), esperado[10:20])
+        self.assertIs(planilha.indices_visiveis(), visao)
+
+        arquivo.excluir_adquirente(codigo)
+        planilha.atualizar_paginacao()
+        self.assertEqual((planilha.total_registros, planilha.total_paginas, planilha.pagina_atual), (0, 1, 0))
+        self.assertEqual(planilha.obter_registros_pagina(), [])
+
+
+if __name__ == "__main__":
+    print("============================================================")
+    print("TESTE AUTOMATIZADO - Visão Filtrada da Planilha")
+    print("============================================================")
+
+    # Executar o teste
+    suite = unittest.TestLoader().loadTestsFromTestCase(TesteVisaoFiltrada)
+    result = unittest.TextTestRunner().run(suite)
+
+    # Verificar resultado
+    if result.wasSuccessful():
+        print("\nTeste passou! ✓")
+        sys.exit(0)
+    else:
+        print("\nTeste falhou! ✗")
+        sys.exit(1)
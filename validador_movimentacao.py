@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Validação completa do layout de arquivos de movimentação financeira
+
+Confere todas as regras de estrutura_arquivo_movimentacao.md em uma passada
+sobre o conteúdo bruto do arquivo e devolve um relatório com todas as violações
+e os números das linhas, em vez de parar no primeiro erro.
+
+Os registros M são conferidos em blocos de quadros de tamanho fixo: cada bloco
+é traduzido para classes de caractere (dígitos viram '0') e comparado de uma vez
+com o padrão esperado; datas são conferidas pelos valores distintos do bloco e
+a soma dos valores é feita por posição de dígito. Só os blocos com alguma
+violação são percorridos registro a registro para localizar os erros.
+"""
+
+import mmap
+from array import array
+from datetime import date
+from functools import lru_cache
+
+from leitor_movimentacao import (TAMANHO_REGISTRO, REGISTROS_POR_BLOCO, CAMPOS_HEADER,
+                                 CAMPOS_MOVIMENTO, CAMPOS_TRAILER)
+
+DIGITOS = b'0123456789'
+
+# Dígitos (e o X do número de cartão mascarado) viram '0'; os demais bytes ficam como estão
+_CLASSES = bytes.maketrans(DIGITOS + b'X', b'0' * 11)
+_PADRAO_MOVIMENTO = b'M' + b'0' * (TAMANHO_REGISTRO - 1)
+
+# Formato de cada campo: 'numerico', 'cartao' (dígitos ou X), 'data' (AAAAMMDD),
+# 'alfanumerico' ou o conteúdo fixo exigido
+FORMATOS_HEADER = {
+    'tipo': b'H',
+    'data_processamento': 'data',
+    'codigo_unidade': 'alfanumerico',
+    'data_processamento2': 'data',
+    'espacos': b' ' * 8,
+    'zeros': b'0' * 64,
+}
+
+FORMATOS_MOVIMENTO = {
+    'tipo': b'M',
+    'codigo_adquirente': 'numerico',
+    'data_movimento': 'data',
+    'numero_cartao': 'cartao',
+    'parcelas': 'numerico',
+    'valor_venda': 'numerico',
+    'data_venda': 'data',
+    'cvnsu': 'numerico',
+    'zeros_fixos': b'00',
+    'cpf_cnpj': 'numerico',
+    'numero_pedido': 'numerico',
+}
+
+FORMATOS_TRAILER = {
+    'tipo': b'T',
+    'total_registros': 'numerico',
+    'espaco': b' ',
+    'valor_total': 'numerico',
+    'noves': b'9' * 75,
+}
+
+_CAMPOS_DATA = [(inicio, fim) for campo, inicio, fim in CAMPOS_MOVIMENTO if FORMATOS_MOVIMENTO[campo] == 'data']
+_INICIO_CARTAO, _FIM_CARTAO = next((inicio, fim) for campo, inicio, fim in CAMPOS_MOVIMENTO if campo == 'numero_cartao')
+_INICIO_VALOR, _FIM_VALOR = next((inicio, fim) for campo, inicio, fim in CAMPOS_MOVIMENTO if campo == 'valor_venda')
+_INICIO_ZEROS, _FIM_ZEROS = next((inicio, fim) for campo, inicio, fim in CAMPOS_MOVIMENTO if campo == 'zeros_fixos')
+
+
+@lru_cache(maxsize=4096)
+def data_valida(texto: bytes) -> bool:
+    """Indica se o texto é uma data AAAAMMDD existente"""
+    if len(texto) != 8 or texto.translate(None, DIGITOS):
+        return False
+    try:
+        date(int(texto[:4]), int(texto[4:6]), int(texto[6:]))
+    except ValueError:
+        return False
+    return True
+
+
+def _texto(valor: bytes) -> str:
+    return valor.decode('ascii', 'replace')
+
+
+class RelatorioValidacao:
+    """Resultado da validação: todas as violações encontradas, com o número da linha"""
+
+    def __init__(self, caminho_arquivo: str = None, limite_erros: int = None):
+        self.caminho_arquivo = caminho_arquivo
+        self.limite_erros = limite_erros
+        self.erros = []
+        self.erros_omitidos = 0
+        self.total_linhas = 0
+        self.total_movimentos = 0
+        self.soma_centavos = 0
+
+    @property
+    def valido(self) -> bool:
+        return not self.erros and not self.erros_omitidos
+
+    @property
+    def total_erros(self) -> int:
+        return len(self.erros) + self.erros_omitidos
+
+    def adicionar(self, numero_linha: int, campo: str, mensagem: str):
+        """Anota uma violação; além do limite, as violações são só contadas"""
+        if self.limite_erros is not None and len(self.erros) >= self.limite_erros:
+            self.erros_omitidos += 1
+        else:
+            self.erros.append((numero_linha, campo, mensagem))
+
+    def como_dicionario(self) -> dict:
+        """Relatório em estruturas simples, pronto para JSON"""
+        return {
+            'arquivo': self.caminho_arquivo,
+            'valido': self.valido,
+            'total_linhas': self.total_linhas,
+            'total_movimentos': self.total_movimentos,
+            'soma_centavos': self.soma_centavos,
+            'total_erros': self.total_erros,
+            'erros': [{'linha': linha, 'campo': campo, 'mensagem': mensagem}
+                      for linha, campo, mensagem in self.erros],
+        }
+
+    def __str__(self):
+        if self.valido:
+            return f"Arquivo válido: {self.total_movimentos} registros de movimento"
+        linhas = [f"Linha {linha}: {mensagem}" for linha, _, mensagem in self.erros]
+        if self.erros_omitidos:
+            linhas.append(f"... e mais {self.erros_omitidos} erro(s)")
+        return '\n'.join(linhas)
+
+
+class ValidadorMovimentacao:
+    """Confere um arquivo de movimentação inteiro contra o layout, acumulando as violações"""
+
+    def __init__(self, limite_erros: int = None, registros_por_bloco: int = REGISTROS_POR_BLOCO):
+        self.limite_erros = limite_erros
+        self.registros_por_bloco = registros_por_bloco
+
+    def validar_arquivo(self, caminho_arquivo: str) -> RelatorioValidacao:
+        """Valida o arquivo em disco, lendo-o por mapeamento em memória"""
+        with open(caminho_arquivo, 'rb') as f:
+            if not f.seek(0, 2):
+                return self.validar_buffer(b'', caminho_arquivo)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                return self.validar_buffer(mapa, caminho_arquivo)
+
+    def validar_buffer(self, buffer, caminho_arquivo: str = None) -> RelatorioValidacao:
+        """Valida o conteúdo de um arquivo já em memória (bytes ou mmap)"""
+        relatorio = RelatorioValidacao(caminho_arquivo, self.limite_erros)
+        if not len(buffer):
+            relatorio.adicionar(1, 'tipo', "Primeiro registro deve ser do tipo Header (H)")
+            return relatorio
+
+        terminador = b'\r\n' if buffer[TAMANHO_REGISTRO:TAMANHO_REGISTRO + 2] == b'\r\n' else b'\n'
+        if not self._validar_quadros(buffer, terminador, relatorio):
+            # Quebras de linha fora do lugar: a disposição em quadros fixos não vale,
+            # e o arquivo é separado em linhas para apontar cada tamanho incorreto
+            relatorio = RelatorioValidacao(caminho_arquivo, self.limite_erros)
+            self._validar_linhas(bytes(buffer), terminador, relatorio)
+
+        relatorio.erros.sort(key=lambda erro: erro[0])
+        return relatorio
+
+    def _validar_quadros(self, buffer, terminador: bytes, relatorio: RelatorioValidacao) -> bool:
+        """Valida o arquivo como sequência de quadros fixos; retorna False se não estiver assim disposto"""
+        tamanho_quadro = TAMANHO_REGISTRO + len(terminador)
+        tamanho = len(buffer)
+        if tamanho % tamanho_quadro == TAMANHO_REGISTRO:
+            # Última linha sem quebra de linha
+            tamanho += len(terminador)
+        if tamanho % tamanho_quadro:
+            return False
+        total_linhas = tamanho // tamanho_quadro
+        fim_movimentos = (total_linhas - 1) * tamanho_quadro
+
+        # As quebras de linha são conferidas antes de qualquer outra regra
+        for inicio in range(0, fim_movimentos, self.registros_por_bloco * tamanho_quadro):
+            bloco = buffer[inicio:min(inicio + self.registros_por_bloco * tamanho_quadro, fim_movimentos)]
+            quantidade = len(bloco) // tamanho_quadro
+            if bloco[TAMANHO_REGISTRO::tamanho_quadro].count(terminador[:1]) != quantidade:
+                return False
+            if len(terminador) == 2 and bloco[TAMANHO_REGISTRO + 1::tamanho_quadro].count(b'\n') != quantidade:
+                return False
+
+        relatorio.total_linhas = total_linhas
+        self._conferir_header(buffer[:TAMANHO_REGISTRO], 1, relatorio)
+        for inicio in range(tamanho_quadro, fim_movimentos, self.registros_por_bloco * tamanho_quadro):
+            bloco = bytes(buffer[inicio:min(inicio + self.registros_por_bloco * tamanho_quadro, fim_movimentos)])
+            self._validar_bloco(bloco, tamanho_quadro, inicio // tamanho_quadro + 1, None, relatorio)
+        if total_linhas > 1:
+            self._conferir_trailer(buffer[fim_movimentos:fim_movimentos + TAMANHO_REGISTRO], total_linhas, relatorio)
+        else:
+            relatorio.adicionar(2, 'tipo', "Último registro deve ser do tipo Trailer (T)")
+        return True
+
+    def _validar_linhas(self, conteudo: bytes, terminador: bytes, relatorio: RelatorioValidacao):
+        """Valida um arquivo com linhas de tamanho incorreto, separando-o linha a linha"""
+        linhas = conteudo.split(b'\n')
+        if linhas[-1] == b'':
+            linhas.pop()
+        if terminador == b'\r\n':
+            linhas = [linha[:-1] if linha.endswith(b'\r') else linha for linha in linhas]
+        relatorio.total_linhas = len(linhas)
+
+        corretas = []
+        numeros = []
+        for numero_linha, linha in enumerate(linhas, 1):
+            if len(linha) != TAMANHO_REGISTRO:
+                relatorio.adicionar(numero_linha, None,
+                                    f"Linha {numero_linha} tem {len(linha)} caracteres, deveria ter 91")
+            elif numero_linha == 1:
+                self._conferir_header(linha, 1, relatorio)
+            elif numero_linha < len(linhas):
+                corretas.append(linha)
+                numeros.append(numero_linha)
+
+        for inicio in range(0, len(corretas), self.registros_por_bloco):
+            fim = inicio + self.registros_por_bloco
+            bloco = b'\n'.join(corretas[inicio:fim]) + b'\n'
+            self._validar_bloco(bloco, TAMANHO_REGISTRO + 1, None, numeros[inicio:fim], relatorio)
+        # Os totais do trailer são conferidos depois de contados os registros M
+        if len(linhas) < 2:
+            relatorio.adicionar(2, 'tipo', "Último registro deve ser do tipo Trailer (T)")
+        elif len(linhas[-1]) == TAMANHO_REGISTRO:
+            self._conferir_trailer(linhas[-1], len(linhas), relatorio)
+
+    def _validar_bloco(self, bloco: bytes, tamanho_quadro: int, primeira_linha: int, numeros,
+                       relatorio: RelatorioValidacao):
+        """Valida um bloco de registros M de uma vez
+
+        Um trecho com alguma violação é dividido ao meio até isolar os registros
+        com erro, que são então conferidos campo a campo; o custo fica
+        proporcional à quantidade de erros, e não ao tamanho do bloco.
+        """
+        padrao = _PADRAO_MOVIMENTO + bloco[TAMANHO_REGISTRO:tamanho_quadro]
+        pendentes = [(0, len(bloco) // tamanho_quadro)]
+        while pendentes:
+            inicio, fim = pendentes.pop()
+            trecho = bloco[inicio * tamanho_quadro:fim * tamanho_quadro]
+            quantidade = fim - inicio
+            if self._trecho_valido(trecho, tamanho_quadro, quantidade, padrao):
+                # Todos os valores são numéricos: a soma é feita por posição de dígito
+                soma = 0
+                for posicao in range(_INICIO_VALOR, _FIM_VALOR):
+                    soma = soma * 10 + sum(trecho[posicao::tamanho_quadro]) - ord('0') * quantidade
+                relatorio.total_movimentos += quantidade
+                relatorio.soma_centavos += soma
+            elif quantidade == 1:
+                numero_linha = numeros[inicio] if numeros is not None else primeira_linha + inicio
+                self._conferir_movimento(trecho[:TAMANHO_REGISTRO], numero_linha, relatorio)
+            else:
+                meio = (inicio + fim) // 2
+                pendentes.append((meio, fim))
+                pendentes.append((inicio, meio))
+
+    @staticmethod
+    def _trecho_valido(trecho: bytes, tamanho_quadro: int, quantidade: int, padrao: bytes) -> bool:
+        """Confere todas as regras do registro M sobre um trecho de quadros, sem laço por registro"""
+        if trecho.translate(_CLASSES) != padrao * quantidade:
+            return False
+
+        # O X de mascaramento só é aceito no número do cartão
+        total_x = trecho.count(b'X')
+        if total_x and total_x != sum(trecho[posicao::tamanho_quadro].count(b'X')
+                                      for posicao in range(_INICIO_CARTAO, _FIM_CARTAO)):
+            return False
+        for posicao in range(_INICIO_ZEROS, _FIM_ZEROS):
+            if trecho[posicao::tamanho_quadro].count(b'0') != quantidade:
+                return False
+
+        # As datas são montadas em uma coluna de inteiros de 8 bytes e só os valores distintos são conferidos
+        for inicio, fim in _CAMPOS_DATA:
+            coluna = bytearray(8 * quantidade)
+            for deslocamento in range(8):
+                coluna[deslocamento::8] = trecho[inicio + deslocamento::tamanho_quadro]
+            datas = array('Q')
+            datas.frombytes(coluna)
+            if not all(data_valida(data.to_bytes(8, 'little')) for data in set(datas)):
+                return False
+        return True
+
+    def _conferir_campos(self, linha: bytes, numero_linha: int, campos, formatos, nome_tipo: str,
+                         relatorio: RelatorioValidacao) -> bool:
+        """Confere cada campo de um registro contra o seu formato; retorna True se não houver erro"""
+        correto = True
+        for campo, inicio, fim in campos:
+            valor = linha[inicio:fim]
+            formato = formatos[campo]
+            if campo == 'tipo':
+                if valor != formato:
+                    correto = False
+                    relatorio.adicionar(numero_linha, campo, nome_tipo)
+                continue
+            if formato == 'numerico':
+                invalido = bool(valor.translate(None, DIGITOS))
+                descricao = "deve ser numérico"
+            elif formato == 'cartao':
+                invalido = bool(valor.translate(None, DIGITOS + b'X'))
+                descricao = "deve conter apenas dígitos (ou X no cartão mascarado)"
+            elif formato == 'data':
+                invalido = not data_valida(valor)
+                descricao = "deve ser uma data válida no formato AAAAMMDD"
+            elif formato == 'alfanumerico':
+                invalido = not valor.isalnum()
+                descricao = "deve ser alfanumérico"
+            else:
+                invalido = valor != formato
+                descricao = f"deve ser '{_texto(formato[:10])}'" + ("..." if len(formato) > 10 else "")
+            if invalido:
+                correto = False
+                relatorio.adicionar(numero_linha, campo, f"Campo {campo} {descricao}: '{_texto(valor)}'")
+        return correto
+
+    def _conferir_header(self, linha: bytes, numero_linha: int, relatorio: RelatorioValidacao):
+        self._conferir_campos(linha, numero_linha, CAMPOS_HEADER, FORMATOS_HEADER,
+                              "Primeiro registro deve ser do tipo Header (H)", relatorio)
+
+    def _conferir_movimento(self, linha: bytes, numero_linha: int, relatorio: RelatorioValidacao):
+        self._conferir_campos(linha, numero_linha, CAMPOS_MOVIMENTO, FORMATOS_MOVIMENTO,
+                              f"Registro na linha {numero_linha} deveria ser do tipo Movimento (M)", relatorio)
+        if linha[:1] == b'M':
+            relatorio.total_movimentos += 1
+            valor = linha[_INICIO_VALOR:_FIM_VALOR]
+            if not valor.translate(None, DIGITOS):
+                relatorio.soma_centavos += int(valor)
+
+    def _conferir_trailer(self, linha: bytes, numero_linha: int, relatorio: RelatorioValidacao):
+        """Confere o trailer e os seus totais contra os registros M contados"""
+        self._conferir_campos(linha, numero_linha, CAMPOS_TRAILER, FORMATOS_TRAILER,
+                              "Último registro deve ser do tipo Trailer (T)", relatorio)
+        if linha[:1] != b'T':
+            return
+        total_registros = linha[1:6]
+        if not total_registros.translate(None, DIGITOS) and int(total_registros) != relatorio.total_movimentos:
+            relatorio.adicionar(numero_linha, 'total_registros',
+                                f"Número de registros M ({relatorio.total_movimentos}) não corresponde "
+                                f"ao valor no Trailer ({int(total_registros)})")
+        valor_total = linha[7:16]
+        if not valor_total.translate(None, DIGITOS) and int(valor_total) != relatorio.soma_centavos:
+            relatorio.adicionar(numero_linha, 'valor_total',
+                                f"Soma dos valores dos registros M ({relatorio.soma_centavos / 100}) não "
+                                f"corresponde ao valor no Trailer ({int(valor_total) / 100})")
+
+
+def validar_arquivo(caminho_arquivo: str, limite_erros: int = None) -> RelatorioValidacao:
+    """Valida um arquivo de movimentação e retorna o relatório com todas as violações"""
+    return ValidadorMovimentacao(limite_erros).validar_arquivo(caminho_arquivo)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Visão filtrada dos registros de movimentação, usada pela planilha
+
+A visão guarda os índices (posições em arquivo.movimentos) dos registros que
+passam pelos filtros e só refaz a filtragem quando os filtros ou os registros
+mudam. Paginar e mover o cursor passam a custar o tamanho da página, não o
+tamanho do arquivo. A filtragem em si consulta os índices secundários do
+arquivo (indices_secundarios.py) em vez de percorrer os registros.
+
+A mudança dos registros é percebida pela versão do ArquivoMovimentacao, que
+avança a cada alteração feita pelos seus métodos; quem altera os registros
+diretamente deve chamar invalidar().
+"""
+
+from array import array
+
+# Filtros de igualdade: nome do filtro -> campo do registro
+FILTROS_IGUALDADE = {'adquirente': 'codigo_adquirente', 'data': 'data_movimento'}
+# Filtros por trecho contido no campo: nome do filtro -> campo do registro
+FILTROS_TRECHO = {'cartao': 'numero_cartao', 'cvnsu': 'cvnsu'}
+
+
+def registro_passa(registro, filtros: dict) -> bool:
+    """Indica se o registro atende a todos os filtros preenchidos"""
+    for nome, valor in filtros.items():
+        if not valor:
+            continue
+        if nome in FILTROS_IGUALDADE:
+            if getattr(registro, FILTROS_IGUALDADE[nome]) != valor:
+                return False
+        elif nome in FILTROS_TRECHO:
+            if valor not in getattr(registro, FILTROS_TRECHO[nome]):
+                return False
+    return True
+
+
+class VisaoFiltrada:
+    """Índices dos registros que passam pelos filtros, recalculados só quando necessário"""
+
+    def __init__(self, arquivo_movimentacao):
+        self.arquivo = arquivo_movimentacao
+        self._chave = None
+        self._movimentos = None
+        self._indices = range(0)
+
+    def invalidar(self):
+        """Descarta os índices guardados (e os secundários do arquivo); a próxima consulta refaz a filtragem"""
+        self._chave = None
+        self._movimentos = None
+        indices = getattr(self.arquivo, 'indices_secundarios', None)
+        if indices is not None:
+            indices.descartar()
+
+    def indices(self, filtros: dict):
+        """Índices globais dos registros visíveis (range sem filtros, array('q') com filtros)"""
+        movimentos = self.arquivo.movimentos
+        ativos = tuple(sorted((nome, valor) for nome, valor in filtros.items() if valor))
+        chave = (len(movimentos), getattr(self.arquivo, 'versao', None), ativos)
+        # A lista de movimentos é comparada por identidade: carregar outro arquivo a substitui
+        if chave != self._chave or movimentos is not self._movimentos:
+            self._indices = self._filtrar(movimentos, dict(ativos))
+            self._chave, self._movimentos = chave, movimentos
+        return self._indices
+
+    def _filtrar(self, movimentos, filtros: dict):
+        if not filtros:
+            return range(len(movimentos))
+        indices = getattr(self.arquivo, 'indices_secundarios', None)
+        if indices is None:
+            return array('q', (i for i, registro in enumerate(movimentos) if registro_passa(registro, filtros)))
+        # Cada filtro é uma consulta ao índice; o resultado é a interseção, a partir da menor lista
+        listas = []
+        for nome, valor in filtros.items():
+            if nome in FILTROS_IGUALDADE:
+                listas.append(indices.iguais(FILTROS_IGUALDADE[nome], valor))
+            elif nome in FILTROS_TRECHO:
+                listas.append(indices.contendo(FILTROS_TRECHO[nome], valor))
+        if not listas:
+            return range(len(movimentos))
+        listas.sort(key=len)
+        if len(listas) == 1:
+            return listas[0]
+        comuns = set(listas[0])
+        for lista in listas[1:]:
+            comuns.intersection_update(lista)
+        return array('q', sorted(comuns))